@@ -0,0 +1 @@
+# Hand-history analytics package
@@ -0,0 +1,385 @@
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..game.batch_engine import (
+    ACTION_TYPES, STREETS, FOLD, CHECK, CALL, BET, RAISE, ALL_IN, USER, PLAYERS
+)
+from ..game.hand_history import EV_ACTIONS, STRATEGY_FIELDS, HandBlock, HandLogReader
+
+STATE_FILE = "store.json"
+
+# Column files per table: name -> (dtype, values per row)
+COLUMNS: Dict[str, Dict[str, Tuple[str, int]]] = {
+    "hands": {
+        "session": ("<i4", 1),
+        "hand_number": ("<u4", 1),
+        "timestamp": ("<u4", 1),
+        "winner": ("i1", 1),
+        "showdown": ("?", 1),
+        "board_size": ("i1", 1),
+        "pot": ("<i4", 1),
+        "user_invested": ("<i4", 1),
+        "user_net": ("<f4", 1),
+        "first_action": ("<i8", 1),
+        "num_actions": ("u1", 1),
+        "cards": ("i1", 9),
+    },
+    "actions": {
+        "hand": ("<i8", 1),
+        "seq": ("u1", 1),
+        "player": ("i1", 1),
+        "street": ("i1", 1),
+        "action": ("i1", 1),
+        "amount": ("<i4", 1),
+    },
+    "decisions": {
+        "hand": ("<i8", 1),
+        "action_index": ("u1", 1),
+        # Street and action code of the action the user then took (-1 if none was logged)
+        "street": ("i1", 1),
+        "taken": ("i1", 1),
+        "equity": ("<f4", 1),
+        "ev": ("<f4", len(EV_ACTIONS)),
+        "recommended": ("i1", len(STRATEGY_FIELDS)),
+        "recommended_amount": ("<u2", len(STRATEGY_FIELDS)),
+    },
+}
+
+AGGRESSIVE = np.array([BET, RAISE, ALL_IN])
+VOLUNTARY = np.array([CALL, BET, RAISE, ALL_IN])
+# DecisionRecord.ev slot priced for each action code (bets, raises and all-ins are all "bet")
+EV_SLOT = np.array([EV_ACTIONS.index(name) for name in ["fold", "check", "call", "bet", "bet", "bet"]])
+# Action codes compared for agreement: bet, raise and all-in count as the same choice
+ACTION_CLASS = np.array([FOLD, CHECK, CALL, BET, BET, BET])
+
+
+class HandStore:
+    """
+    Columnar store of hands, actions and decision overlays for analytics
+
+    Each table is a directory of raw column files (one fixed-width NumPy
+    dtype per column) that are only ever appended to, and read back
+    memory-mapped. store.json holds the row counts, the session-id
+    dictionary (hands store a session code) and how far each hand log
+    has been ingested; it's replaced atomically after the columns are
+    written, and columns longer than it records (an ingest cut short) are
+    truncated on open.
+
+    Actions and decisions point at their hand's row. Queries select hands
+    by session (through a session -> rows index built on first use), by
+    the last N hands or by time, and aggregate with vectorized NumPy over
+    the selected rows.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for table in COLUMNS:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+        state_path = os.path.join(directory, STATE_FILE)
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        else:
+            state = {"rows": {table: 0 for table in COLUMNS}, "sessions": [], "ingested": {}}
+        self.rows: Dict[str, int] = state["rows"]
+        self.session_names: List[str] = state["sessions"]
+        self.session_codes = {name: code for code, name in enumerate(self.session_names)}
+        # Log directory -> segment file -> blocks ingested
+        self.ingested: Dict[str, Dict[str, int]] = state["ingested"]
+
+        for table, columns in COLUMNS.items():
+            for name, (dtype, width) in columns.items():
+                path = self._path(table, name)
+                size = self.rows[table] * np.dtype(dtype).itemsize * width
+                if not os.path.exists(path):
+                    open(path, "wb").close()
+                elif os.path.getsize(path) != size:
+                    with open(path, "r+b") as f:
+                        f.truncate(size)
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+        self._session_index: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _path(self, table: str, name: str) -> str:
+        return os.path.join(self.directory, table, name + ".bin")
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """A column, memory-mapped read-only"""
+        key = (table, name)
+        if key not in self._columns:
+            dtype, width = COLUMNS[table][name]
+            rows = self.rows[table]
+            if rows == 0:
+                self._columns[key] = np.zeros((0, width) if width > 1 else 0, dtype=dtype)
+            else:
+                self._columns[key] = np.memmap(self._path(table, name), dtype=dtype, mode="r",
+                                               shape=(rows, width) if width > 1 else (rows,))
+        return self._columns[key]
+
+    # Ingest
+
+    def ingest(self, log_directory: str) -> int:
+        """Append every hand of a hand log not ingested yet, returning how many were added"""
+        log_key = os.path.abspath(log_directory)
+        done = self.ingested.setdefault(log_key, {})
+        batches: Dict[str, Dict[str, List[np.ndarray]]] = {
+            table: {name: [] for name in columns} for table, columns in COLUMNS.items()
+        }
+        rows = dict(self.rows)
+        with HandLogReader(log_directory) as reader:
+            for block in reader.blocks(done=done):
+                # Copied out of the mapping, as the reader is closed before they're written
+                for table, columns in self._block_columns(block, rows).items():
+                    for name, values in columns.items():
+                        batches[table][name].append(np.asarray(values).astype(COLUMNS[table][name][0]))
+                rows["hands"] += len(block)
+                rows["actions"] += len(block.codes)
+                rows["decisions"] += len(block.decisions)
+                done[block.segment] = block.number + 1
+
+        added = rows["hands"] - self.rows["hands"]
+        for table, columns in batches.items():
+            for name, parts in columns.items():
+                if not parts:
+                    continue
+                with open(self._path(table, name), "ab") as f:
+                    f.write(np.concatenate(parts).tobytes())
+        self.rows = rows
+        self._save_state()
+        self._columns = {}
+        self._session_index = None
+        return added
+
+    def _block_columns(self, block: HandBlock, rows: Dict[str, int]) -> Dict[str, Dict[str, np.ndarray]]:
+        hands = block.hands
+        sessions = np.array([self._session_code(name) for name in block.sessions], dtype=np.int32)
+        offsets = block.action_offsets
+        num_actions = hands["num_actions"].astype(np.int64)
+        first_action = rows["actions"] + offsets[:-1]
+
+        action_hand = np.repeat(np.arange(len(hands)), num_actions)
+        actions = {
+            "hand": rows["hands"] + action_hand,
+            "seq": np.arange(len(block.codes)) - offsets[:-1][action_hand],
+            "player": block.action_players,
+            "street": block.action_streets,
+            "action": block.action_types,
+            "amount": block.amounts,
+        }
+
+        decision_hand = block.decisions["hand"].astype(np.int64)
+        action_index = block.decisions["action_index"].astype(np.int64)
+        logged = action_index < num_actions[decision_hand]
+        action_row = np.where(logged, offsets[:-1][decision_hand] + action_index, 0)
+        decisions = {
+            "hand": rows["hands"] + decision_hand,
+            "action_index": action_index,
+            "street": np.where(logged, block.action_streets[action_row] if len(block.codes) else 0, -1),
+            "taken": np.where(logged, block.action_types[action_row] if len(block.codes) else 0, -1),
+            "equity": block.decisions["equity"],
+            "ev": block.decisions["ev"],
+            "recommended": block.decisions["actions"],
+            "recommended_amount": block.decisions["amounts"],
+        }
+
+        return {
+            "hands": {
+                "session": sessions[hands["session"]] if len(hands) else np.zeros(0, dtype=np.int32),
+                "hand_number": hands["hand_number"],
+                "timestamp": hands["timestamp"],
+                "winner": block.winner,
+                "showdown": block.showdown,
+                "board_size": block.board_size,
+                "pot": block.pot,
+                "user_invested": block.user_invested,
+                "user_net": block.user_net(),
+                "first_action": first_action,
+                "num_actions": hands["num_actions"],
+                "cards": block.cards(),
+            },
+            "actions": actions,
+            "decisions": decisions,
+        }
+
+    def _session_code(self, name: str) -> int:
+        if name not in self.session_codes:
+            self.session_codes[name] = len(self.session_names)
+            self.session_names.append(name)
+        return self.session_codes[name]
+
+    def _save_state(self):
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"rows": self.rows, "sessions": self.session_names, "ingested": self.ingested}, f)
+        os.replace(path + ".tmp", path)
+
+    # Queries
+
+    def sessions(self) -> List[str]:
+        return list(self.session_names)
+
+    def select_hands(self, session: Optional[str] = None, last_hands: Optional[int] = None,
+                     since: Optional[int] = None) -> np.ndarray:
+        """
+        Row numbers of the hands matching every filter given: one session,
+        the last last_hands hands (of the session, if one is given), and
+        hands finished at or after the Unix time since
+        """
+        if session is not None:
+            code = self.session_codes.get(session)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            order, bounds = self._get_session_index()
+            selected = order[bounds[code]:bounds[code + 1]]
+        else:
+            selected = np.arange(self.rows["hands"], dtype=np.int64)
+        if last_hands is not None:
+            selected = selected[max(0, len(selected) - last_hands):]
+        if since is not None:
+            selected = selected[self.column("hands", "timestamp")[selected] >= since]
+        return selected
+
+    def _get_session_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Hand rows grouped by session code (in row order within each), and each code's start"""
+        if self._session_index is None:
+            codes = self.column("hands", "session")
+            order = np.argsort(codes, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(codes[order], np.arange(len(self.session_names) + 1))
+            self._session_index = (order, bounds)
+        return self._session_index
+
+    def _hand_mask(self, hands: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.rows["hands"], dtype=bool)
+        mask[hands] = True
+        return mask
+
+    def player_stats(self, player: str = "user", session: Optional[str] = None, last_hands: Optional[int] = None,
+                     since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        VPIP, PFR, aggression by street and results for one seat ("user"
+        or "bot") over the selected hands
+
+        Aggression factor is (bets + raises) / calls; aggression frequency
+        is (bets + raises) / (bets + raises + calls + folds).
+        """
+        hands = self.select_hands(session, last_hands, since)
+        seat = PLAYERS.index(player)
+        in_selection = self._hand_mask(hands)
+        action_hand = self.column("actions", "hand")
+        mine = in_selection[action_hand] & (self.column("actions", "player") == seat)
+        action_hand = action_hand[mine]
+        street = self.column("actions", "street")[mine]
+        action = self.column("actions", "action")[mine]
+
+        preflop = street == 0
+        vpip = np.zeros(self.rows["hands"], dtype=bool)
+        vpip[action_hand[preflop & np.isin(action, VOLUNTARY)]] = True
+        pfr = np.zeros(self.rows["hands"], dtype=bool)
+        pfr[action_hand[preflop & np.isin(action, AGGRESSIVE)]] = True
+
+        counts = np.bincount(street.astype(np.int64) * len(ACTION_TYPES) + action,
+                             minlength=len(STREETS) * len(ACTION_TYPES)).reshape(len(STREETS), len(ACTION_TYPES))
+        aggression = {}
+        for code, name in enumerate(STREETS):
+            aggressive = int(counts[code, AGGRESSIVE].sum())
+            calls, folds = int(counts[code, CALL]), int(counts[code, FOLD])
+            aggression[name.value] = {
+                "actions": int(counts[code].sum()),
+                "factor": aggressive / calls if calls else None,
+                "frequency": aggressive / (aggressive + calls + folds) if aggressive + calls + folds else None,
+            }
+
+        n = len(hands)
+        net = self.column("hands", "user_net")[hands].astype(np.float64) * (1 if seat == USER else -1)
+        showdown = self.column("hands", "showdown")[hands]
+        won = self.column("hands", "winner")[hands] == seat
+        return {
+            "player": player,
+            "hands": n,
+            "vpip": vpip[hands].mean() if n else None,
+            "pfr": pfr[hands].mean() if n else None,
+            "aggression": aggression,
+            "showdown_rate": showdown.mean() if n else None,
+            "won_at_showdown": won[showdown].mean() if showdown.any() else None,
+            "bb_per_100": net.mean() / 2 * 100 if n else None,
+        }
+
+    def ev_lost(self, session: Optional[str] = None, last_hands: Optional[int] = None,
+                since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        EV given up against the EV strategy's recommendations, over the
+        user decisions (with a logged overlay) in the selected hands
+
+        Each decision loses the best EV the strategy priced minus the EV
+        it priced for the action taken. Also reports how often the user's
+        choice agreed with each strategy (bets, raises and all-ins
+        counting as the same choice).
+        """
+        hands = self.select_hands(session, last_hands, since)
+        in_selection = self._hand_mask(hands)
+        taken = self.column("decisions", "taken")
+        selected = in_selection[self.column("decisions", "hand")] & (taken >= 0)
+        taken = taken[selected].astype(np.int64)
+        ev = self.column("decisions", "ev")[selected].astype(np.float64)
+        street = self.column("decisions", "street")[selected]
+        recommended = self.column("decisions", "recommended")[selected].astype(np.int64)
+
+        ev_taken = ev[np.arange(len(taken)), EV_SLOT[taken]] if len(taken) else np.zeros(0)
+        with np.errstate(invalid="ignore"):
+            best = np.nanmax(ev, axis=1) if len(taken) else np.zeros(0)
+        lost = best - ev_taken
+        priced = ~np.isnan(lost)
+
+        by_street = {}
+        for code, name in enumerate(STREETS):
+            on_street = priced & (street == code)
+            by_street[name.value] = {
+                "decisions": int(on_street.sum()),
+                "ev_lost": float(lost[on_street].sum()),
+            }
+        agreement = {
+            field: float((ACTION_CLASS[recommended[:, i]] == ACTION_CLASS[taken]).mean()) if len(taken) else None
+            for i, field in enumerate(STRATEGY_FIELDS)
+        }
+        return {
+            "hands": len(hands),
+            "decisions": len(taken),
+            "priced_decisions": int(priced.sum()),
+            "ev_lost": float(lost[priced].sum()),
+            "ev_lost_per_decision": float(lost[priced].mean()) if priced.any() else None,
+            "by_street": by_street,
+            "agreement": agreement,
+        }
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """Plain-text player_stats"""
+    def pct(value):
+        return "-" if value is None else f"{value:.1%}"
+
+    lines = [f"{stats['player']}: {stats['hands']:,} hands, VPIP {pct(stats['vpip'])}, PFR {pct(stats['pfr'])}, "
+             f"showdown {pct(stats['showdown_rate'])}, won at showdown {pct(stats['won_at_showdown'])}"]
+    for street, values in stats["aggression"].items():
+        factor = "-" if values["factor"] is None else f"{values['factor']:.2f}"
+        lines.append(f"  {street:<8} {values['actions']:>9,} actions  AF {factor:>6}  AFq {pct(values['frequency'])}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest hand logs and report player statistics")
+    parser.add_argument("--store", required=True, help="Analytics store directory")
+    parser.add_argument("--ingest", nargs="*", default=[], metavar="LOG_DIR", help="Hand logs to ingest first")
+    parser.add_argument("--session", default=None)
+    parser.add_argument("--last", type=int, default=None, help="Only the last N hands")
+    args = parser.parse_args()
+
+    store = HandStore(args.store)
+    for log_directory in args.ingest:
+        print(f"Ingested {store.ingest(log_directory):,} hands from {log_directory}")
+    for player in ("user", "bot"):
+        print(format_stats(store.player_stats(player, session=args.session, last_hands=args.last)))
+    lost = store.ev_lost(session=args.session, last_hands=args.last)
+    if lost["priced_decisions"]:
+        print(f"EV lost vs the EV strategy: ${lost['ev_lost']:.2f} over {lost['priced_decisions']:,} decisions "
+              f"(${lost['ev_lost_per_decision']:.2f} each)")
@@ -1,18 +1,42 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
-import uuid
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import asyncio
+import copy
+import json
+import os
+import time
+from contextlib import asynccontextmanager
 
 from .models.game_models import (
     GameResponse, ActionType, Card, GameState, 
-    StrategyOverlay, PlayerAction, ActionRequest
+    StrategyOverlay, PlayerAction, ActionRequest,
+    AnalyzeSpot, AnalyzeBatchRequest, Street
 )
-from .game.poker_engine import PokerEngine
 from .game.bot_logic import PokerBot
+from .game.session_store import GameSession, SessionConflictError, SessionStore
+from .game.session_backends import create_session_backend
+from .game.hand_history import DecisionRecord, HandLogWriter
+from .game.hand_evaluator import card_to_int
 from .strategies.strategy_engine import StrategyEngine
 from .utils.action_generator import ActionGenerator
+from .utils.state_delta import StateTracker, parse_fields, select_delta
+from .game.canonical import equity_cache, simulation_cache, overlay_cache
+from .utils.compute_pool import ComputePool, ComputeBusyError, ComputeTimeoutError
 
-app = FastAPI(title="Quantitative Finance Poker Training API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the idle-session sweeper while the server is up"""
+    session_store.start_sweeper(interval=float(os.environ.get("POKER_SESSION_SWEEP_INTERVAL", "60")))
+    yield
+    await session_store.stop_sweeper()
+    session_store.backend.close()
+    if hand_log is not None:
+        hand_log.close()
+    compute_pool.shutdown()
+
+app = FastAPI(title="Quantitative Finance Poker Training API", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -21,72 +45,190 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Game-Version"],
 )
 
-# In-memory game sessions (in production, use Redis or database)
-game_sessions: Dict[str, Dict[str, Any]] = {}
+# Game sessions, each with its own engine. POKER_SESSION_BACKEND picks where snapshots
+# live: memory:// (default, single worker), sqlite:///sessions.db or redis://host:6379/0
+# (shared, so several uvicorn workers can serve the same sessions). Idle sessions
+# expire after POKER_SESSION_TTL seconds; the store also caps the session count and,
+# if POKER_SESSION_MAX_BYTES is set, the estimated bytes of session state.
+session_store = SessionStore(
+    idle_ttl=float(os.environ.get("POKER_SESSION_TTL", "1800")),
+    max_sessions=int(os.environ.get("POKER_MAX_SESSIONS", "10000")),
+    max_bytes=int(os.environ["POKER_SESSION_MAX_BYTES"]) if "POKER_SESSION_MAX_BYTES" in os.environ else None,
+    backend=create_session_backend(os.environ.get("POKER_SESSION_BACKEND", "memory://"))
+)
 
-# Initialize engines
-poker_engine = PokerEngine()
-strategy_engine = StrategyEngine()
+# Initialize engines shared by every session
+# Set POKER_MC_WORKERS > 1 to run Monte Carlo trials on a process pool. Strategies run
+# concurrently within POKER_STRATEGY_BUDGET_MS (0 runs them sequentially with no deadline).
+strategy_engine = StrategyEngine(
+    monte_carlo_workers=int(os.environ.get("POKER_MC_WORKERS", "0")),
+    budget_ms=float(os.environ.get("POKER_STRATEGY_BUDGET_MS", "150")) or None
+)
 poker_bot = PokerBot()
 
+# Every finished hand is appended to the binary hand log in POKER_HAND_LOG (set it
+# empty to turn logging off; the default is hand_history/ in the project root, not
+# the working directory). Hands are written in blocks of up to 256, at most
+# POKER_HAND_LOG_FLUSH seconds after the first one of a block finished; each worker
+# process writes its own files, created when its first block is written.
+HAND_LOG_DIR = os.environ.get(
+    "POKER_HAND_LOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hand_history")
+)
+hand_log = HandLogWriter(
+    os.path.abspath(HAND_LOG_DIR),
+    prefix=f"api-{os.getpid()}",
+    block_hands=256,
+    flush_interval=float(os.environ.get("POKER_HAND_LOG_FLUSH", "5"))
+) if HAND_LOG_DIR else None
+
+# Strategy and bot computations run here, off the event loop. At most
+# POKER_COMPUTE_WORKERS run at once with POKER_COMPUTE_QUEUE more waiting;
+# overlays taking longer than POKER_OVERLAY_TIMEOUT seconds are dropped.
+compute_pool = ComputePool(
+    max_workers=int(os.environ.get("POKER_COMPUTE_WORKERS", "2")),
+    max_queue=int(os.environ.get("POKER_COMPUTE_QUEUE", "32")),
+    timeout=float(os.environ.get("POKER_OVERLAY_TIMEOUT", "10"))
+)
+
+# Largest batch accepted by /api/analyze/batch
+MAX_BATCH_SPOTS = int(os.environ.get("POKER_BATCH_MAX_SPOTS", "1000"))
+
+# Street implied by the number of community cards
+BOARD_STREETS = {0: Street.PREFLOP, 3: Street.FLOP, 4: Street.TURN, 5: Street.RIVER}
+
+async def _get_session(session_id: str) -> GameSession:
+    """Look up a session or raise a 404"""
+    session = await session_store.get_async(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Game session not found")
+    return session
+
+@app.exception_handler(SessionConflictError)
+async def session_conflict(request: Request, exc: SessionConflictError):
+    """Another worker saved the game first; the client should reload its state"""
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+async def _strategy_overlay(game_state: GameState, session: GameSession) -> Optional[StrategyOverlay]:
+    """
+    Strategy overlay computed on the compute pool; None if it's not the user's turn or it fails
+    
+    The overlay is also kept on the session, to be logged with the hand
+    once it's over; call with session.lock held.
+    """
+    if game_state.active_player != "user":
+        return None
+    
+    try:
+        overlay = await compute_pool.run(
+            strategy_engine.calculate_all_strategies,
+            player_cards=game_state.user_cards,
+            community_cards=game_state.community_cards,
+            pot_size=game_state.pot_size,
+            to_call=game_state.to_call,
+            player_stack=game_state.user_stack,
+            action_history=game_state.action_history,
+            street=game_state.street
+        )
+    except (ComputeBusyError, ComputeTimeoutError) as e:
+        print(f"Skipping strategy overlay: {e}")
+        return None
+    except Exception as e:
+        print(f"Error calculating strategies: {e}")
+        return None
+    await _record_decision(session, len(session.poker_engine.action_history), overlay)
+    return overlay
+
+async def _record_decision(session: GameSession, action_index: int, overlay: StrategyOverlay):
+    """
+    Keep the overlay shown before the action_index-th action for the hand
+    log, and save the session so the stored snapshot has it too (another
+    worker may finish the hand); call with session.lock held
+    """
+    record = DecisionRecord.from_overlay(action_index, overlay)
+    current = session.decisions.get(action_index)
+    # repr, so an equity that's NaN (the EV strategy failed) still compares equal
+    if current is not None and repr(current.to_list()) == repr(record.to_list()):
+        return
+    session.decisions[action_index] = record
+    await session_store.save_async(session)
+
 @app.post("/api/game/new", response_model=GameResponse)
-async def start_new_game():
-    """Start a new poker game session"""
+async def start_new_game(overlay: bool = True, fields: Optional[str] = None):
+    """Start a new poker game session (overlay=false leaves the overlay to /overlay/stream)"""
     
-    session_id = str(uuid.uuid4())
+    include = _parse_fields(fields)
+    session = await session_store.create_async()
     
+    async with session.lock:
+        response = _start_game(session)
+        await session_store.save_async(session)
+        
+        # Generate strategy overlay if it's user's turn
+        if overlay:
+            response.strategy_overlay = await _strategy_overlay(response.game_state, session)
+        return _respond(session, response, include)
+
+def _start_game(session: GameSession) -> GameResponse:
+    """Deal a new session's first hand, without the overlay"""
     # Initialize new game
-    game_state = poker_engine.deal_new_hand()
-    game_state.session_id = session_id
+    game_state = session.poker_engine.deal_new_hand()
+    game_state.session_id = session.session_id
     
     # Store bot cards separately (hidden from user)
-    bot_cards = poker_engine.bot_cards
-    
-    # Store session
-    game_sessions[session_id] = {
-        "poker_engine": poker_engine,
-        "bot_cards": bot_cards,
-        "hand_count": 1
-    }
+    session.bot_cards = session.poker_engine.bot_cards
+    session.hand_count = 1
     
     # Generate available actions
     available_actions = ActionGenerator.get_available_actions(game_state)
     
-    # Generate strategy overlay if it's user's turn
-    strategy_overlay = None
-    if game_state.active_player == "user":
-        try:
-            strategy_overlay = strategy_engine.calculate_all_strategies(
-                player_cards=game_state.user_cards,
-                community_cards=game_state.community_cards,
-                pot_size=game_state.pot_size,
-                to_call=game_state.to_call,
-                player_stack=game_state.user_stack,
-                action_history=game_state.action_history,
-                street=game_state.street
-            )
-        except Exception as e:
-            print(f"Error calculating strategies: {e}")
-    
     return GameResponse(
         game_state=game_state,
         available_actions=available_actions,
-        strategy_overlay=strategy_overlay,
+        strategy_overlay=None,
         message="New hand dealt! You are in the Big Blind."
     )
 
 @app.post("/api/game/{session_id}/action", response_model=GameResponse)
-async def make_action(session_id: str, action_request: ActionRequest):
-    """Make a player action"""
+async def make_action(session_id: str, action_request: ActionRequest, overlay: bool = True,
+                      fields: Optional[str] = None, since: Optional[int] = None):
+    """Make a player action (overlay=false leaves the overlay to /overlay/stream)"""
     
-    if session_id not in game_sessions:
-        raise HTTPException(status_code=404, detail="Game session not found")
+    include = _parse_fields(fields)
+    session = await _get_session(session_id)
     
-    session = game_sessions[session_id]
-    poker_engine = session["poker_engine"]
-    bot_cards = session["bot_cards"]
+    async with session.lock:
+        try:
+            # Game state changes must run to completion, so they get no timeout
+            response = await compute_pool.run(_process_action, session, action_request, timeout=None)
+        except ComputeBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        finally:
+            await session_store.save_async(session)
+        
+        # Generate strategy overlay if it's user's turn
+        if overlay and not response.game_state.is_hand_over:
+            response.strategy_overlay = await _strategy_overlay(response.game_state, session)
+        return _respond(session, response, include, since)
+
+def _log_finished_hand(session: GameSession):
+    """Append a session's finished hand to the hand log, if there is one"""
+    if hand_log is None:
+        return
+    try:
+        decisions = [session.decisions[index] for index in sorted(session.decisions)]
+        hand_log.record_engine(session.poker_engine, session.session_id, session.hand_count, decisions)
+    except Exception as e:
+        print(f"Error writing hand history: {e}")
+
+def _process_action(session: GameSession, action_request: ActionRequest) -> GameResponse:
+    """Apply the user's action (and the bot's reply) to one session, without the overlay"""
+    session_id = session.session_id
+    poker_engine = session.poker_engine
+    bot_cards = session.bot_cards
     
     try:
         print(f"DEBUG: Received action - type: {action_request.action_type}, amount: {action_request.amount}")
@@ -104,6 +246,7 @@ async def make_action(session_id: str, action_request: ActionRequest):
         if game_state.is_hand_over:
             # Reveal bot cards when hand is over
             game_state.bot_cards = bot_cards
+            _log_finished_hand(session)
             
             if game_state.winner == "user":
                 message += f". You win ${game_state.pot_size}!"
@@ -137,6 +280,7 @@ async def make_action(session_id: str, action_request: ActionRequest):
             
             # Check if hand is over after bot action
             if game_state.is_hand_over:
+                _log_finished_hand(session)
                 if game_state.winner == "user":
                     message += f" You win ${game_state.pot_size}!"
                 elif game_state.winner == "bot":
@@ -154,26 +298,10 @@ async def make_action(session_id: str, action_request: ActionRequest):
         # Generate available actions for user
         available_actions = ActionGenerator.get_available_actions(game_state)
         
-        # Generate strategy overlay if it's user's turn
-        strategy_overlay = None
-        if game_state.active_player == "user":
-            try:
-                strategy_overlay = strategy_engine.calculate_all_strategies(
-                    player_cards=game_state.user_cards,
-                    community_cards=game_state.community_cards,
-                    pot_size=game_state.pot_size,
-                    to_call=game_state.to_call,
-                    player_stack=game_state.user_stack,
-                    action_history=game_state.action_history,
-                    street=game_state.street
-                )
-            except Exception as e:
-                print(f"Error calculating strategies: {e}")
-        
         return GameResponse(
             game_state=game_state,
             available_actions=available_actions,
-            strategy_overlay=strategy_overlay,
+            strategy_overlay=None,
             message=message
         )
         
@@ -184,14 +312,28 @@ async def make_action(session_id: str, action_request: ActionRequest):
         raise HTTPException(status_code=400, detail=f"Error processing action: {str(e)}")
 
 @app.post("/api/game/{session_id}/next-hand", response_model=GameResponse)
-async def deal_next_hand(session_id: str):
-    """Deal the next hand in the session"""
+async def deal_next_hand(session_id: str, overlay: bool = True,
+                         fields: Optional[str] = None, since: Optional[int] = None):
+    """Deal the next hand in the session (overlay=false leaves the overlay to /overlay/stream)"""
     
-    if session_id not in game_sessions:
-        raise HTTPException(status_code=404, detail="Game session not found")
+    include = _parse_fields(fields)
+    session = await _get_session(session_id)
     
-    session = game_sessions[session_id]
-    poker_engine = session["poker_engine"]
+    async with session.lock:
+        try:
+            response = _deal_next_hand(session)
+        finally:
+            await session_store.save_async(session)
+        
+        # Generate strategy overlay
+        if overlay:
+            response.strategy_overlay = await _strategy_overlay(response.game_state, session)
+        return _respond(session, response, include, since)
+
+def _deal_next_hand(session: GameSession) -> GameResponse:
+    """Deal the next hand of one session, without the overlay"""
+    session_id = session.session_id
+    poker_engine = session.poker_engine
     
     try:
         # Deal new hand
@@ -199,88 +341,508 @@ async def deal_next_hand(session_id: str):
         game_state.session_id = session_id
         
         # Update bot cards
-        session["bot_cards"] = poker_engine.bot_cards
-        session["hand_count"] += 1
+        session.bot_cards = poker_engine.bot_cards
+        session.hand_count += 1
+        session.decisions = {}
         
         # Generate available actions
         available_actions = ActionGenerator.get_available_actions(game_state)
         
-        # Generate strategy overlay
-        strategy_overlay = None
-        if game_state.active_player == "user":
-            try:
-                strategy_overlay = strategy_engine.calculate_all_strategies(
-                    player_cards=game_state.user_cards,
-                    community_cards=game_state.community_cards,
-                    pot_size=game_state.pot_size,
-                    to_call=game_state.to_call,
-                    player_stack=game_state.user_stack,
-                    action_history=game_state.action_history,
-                    street=game_state.street
-                )
-            except Exception as e:
-                print(f"Error calculating strategies: {e}")
-        
         return GameResponse(
             game_state=game_state,
             available_actions=available_actions,
-            strategy_overlay=strategy_overlay,
-            message=f"Hand #{session['hand_count']} dealt!"
+            strategy_overlay=None,
+            message=f"Hand #{session.hand_count} dealt!"
         )
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error dealing new hand: {str(e)}")
 
 @app.get("/api/game/{session_id}/status", response_model=GameResponse)
-async def get_game_status(session_id: str):
-    """Get current game status"""
+async def get_game_status(session_id: str, request: Request, overlay: bool = True,
+                          fields: Optional[str] = None, since: Optional[int] = None):
+    """
+    Get current game status (overlay=false leaves the overlay to /overlay/stream)
     
-    if session_id not in game_sessions:
-        raise HTTPException(status_code=404, detail="Game session not found")
+    The ETag is the session's version (marked when the overlay is
+    included), so a client polling with If-None-Match gets a 304 until
+    the game changes. A status whose overlay was skipped or degraded gets
+    no ETag, so the next poll computes it again instead of keeping it.
+    """
+    
+    include = _parse_fields(fields)
+    session = await _get_session(session_id)
+    
+    etag = lambda: f'W/"{session.version}-overlay"' if overlay else f'W/"{session.version}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag()):
+        return Response(status_code=304, headers={"ETag": etag(), "X-Game-Version": str(session.version)})
+    
+    async with session.lock:
+        response = _game_status(session)
+        
+        # Generate strategy overlay if it's user's turn
+        if overlay:
+            response.strategy_overlay = await _strategy_overlay(response.game_state, session)
+        shaped = _respond(session, response, include, since)
+    
+    # Recording the overlay's decision saves the session, so take the version after it
+    if not overlay or _overlay_complete(response):
+        shaped.headers["ETag"] = etag()
+    return shaped
+
+def _overlay_complete(response: GameResponse) -> bool:
+    """Whether a response has every strategy's full recommendation, or isn't due an overlay"""
+    if response.game_state.active_player != "user":
+        return True
+    overlay = response.strategy_overlay
+    return overlay is not None and not any(getattr(overlay, name).degraded for name in StrategyOverlay.model_fields)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    opaque = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or opaque(etag) in map(opaque, tags)
+
+def _parse_fields(fields: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Include tree of a fields= query parameter, or a 400 if it names unknown fields"""
+    if fields is None:
+        return None
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _respond(session: GameSession, response: GameResponse, include: Optional[Dict[str, Any]] = None,
+             since: Optional[int] = None) -> Response:
+    """
+    A GameResponse as JSON, shaped by the fields= and since= parameters
+    
+    It is serialized directly instead of being re-validated against the
+    response model. include (from fields=) keeps only the selected parts.
+    With since, a version from the X-Game-Version header of an earlier
+    response, only what changed since then is sent: the changed GameState
+    fields, the new actions, the available actions if they changed, the
+    message and the overlay, marked "delta": true. A full response is sent
+    instead if this worker no longer has that version.
+    """
+    version = session.version
+    headers = {"X-Game-Version": str(version)}
+    if since is None:
+        return Response(response.model_dump_json(include=include), media_type="application/json",
+                        headers=headers)
     
-    session = game_sessions[session_id]
-    poker_engine = session["poker_engine"]
+    base = session.sent_states.get(since)
+    tracker = copy.copy(base) if base is not None else StateTracker()
+    if base is None:
+        tracker.full(response, session.hand_count)
+        session.remember_state(version, tracker)
+        return Response(response.model_dump_json(include=include), media_type="application/json",
+                        headers=headers)
+    
+    body = {"delta": True, **select_delta(tracker.delta(response, session.hand_count), include)}
+    overlay_include = include.get("strategy_overlay") if include is not None else True
+    if response.strategy_overlay is not None and overlay_include:
+        body["strategy_overlay"] = response.strategy_overlay.model_dump(
+            mode="json", include=None if overlay_include is True else overlay_include
+        )
+    session.remember_state(version, tracker)
+    return JSONResponse(body, headers=headers)
+
+def _game_status(session: GameSession) -> GameResponse:
+    """Current state of one session, without the overlay"""
+    poker_engine = session.poker_engine
     
     # Get current game state
     game_state = poker_engine._get_game_state(poker_engine._get_next_active_player())
-    game_state.session_id = session_id
+    game_state.session_id = session.session_id
     
     # Generate available actions
     available_actions = ActionGenerator.get_available_actions(game_state)
     
-    # Generate strategy overlay if it's user's turn
-    strategy_overlay = None
-    if game_state.active_player == "user":
-        try:
-            strategy_overlay = strategy_engine.calculate_all_strategies(
-                player_cards=game_state.user_cards,
-                community_cards=game_state.community_cards,
-                pot_size=game_state.pot_size,
-                to_call=game_state.to_call,
-                player_stack=game_state.user_stack,
-                action_history=game_state.action_history,
-                street=game_state.street
-            )
-        except Exception as e:
-            print(f"Error calculating strategies: {e}")
-    
     return GameResponse(
         game_state=game_state,
         available_actions=available_actions,
-        strategy_overlay=strategy_overlay,
+        strategy_overlay=None,
         message="Current game status"
     )
 
+@app.get("/api/game/{session_id}/overlay/stream")
+async def stream_overlay(session_id: str):
+    """
+    Strategy overlay for the current decision as server-sent events
+    
+    A recommendation event goes out as soon as each strategy finishes, so
+    the fast ones arrive almost at once; monte_carlo events carry the
+    running estimate (trials so far and its 95% CI) until the simulation
+    converges, and a done event ends the stream.
+    """
+    session = await _get_session(session_id)
+    poker_engine = session.poker_engine
+    
+    async with session.lock:
+        game_state = poker_engine._get_game_state(poker_engine._get_next_active_player())
+        hand_number = session.hand_count
+        action_index = len(poker_engine.action_history)
+    
+    events = _overlay_updates(game_state, session, hand_number, action_index)
+    return StreamingResponse((_sse(event, data) async for event, data in events),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _overlay_updates(game_state: GameState, session: GameSession, hand_number: int,
+                           action_index: int) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Progressive overlay as (event, data) pairs, relayed from the compute pool as the strategies report
+    
+    Events are recommendation, monte_carlo, then done (or error).
+    """
+    start = time.perf_counter()
+    if game_state.active_player != "user" or game_state.is_hand_over:
+        yield "done", {"strategies": 0, "message": "Not the user's turn"}
+        return
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def publish(event: str, data: Dict[str, Any]):
+        data["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+        except RuntimeError:
+            pass  # The loop is gone; nobody is listening any more
+    
+    job = asyncio.ensure_future(compute_pool.run(
+        strategy_engine.calculate_all_strategies,
+        player_cards=game_state.user_cards,
+        community_cards=game_state.community_cards,
+        pot_size=game_state.pot_size,
+        to_call=game_state.to_call,
+        player_stack=game_state.user_stack,
+        action_history=game_state.action_history,
+        street=game_state.street,
+        on_recommendation=lambda field, recommendation: publish(
+            "recommendation", {"strategy": field, "recommendation": recommendation.model_dump(mode="json")}
+        ),
+        on_progress=lambda estimate: publish("monte_carlo", estimate)
+    ))
+    job.add_done_callback(lambda _: events.put_nowait(None))
+    
+    try:
+        sent = 0
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            event, data = item
+            sent += event == "recommendation"
+            yield event, data
+        
+        try:
+            overlay = job.result()
+        except (ComputeBusyError, ComputeTimeoutError) as e:
+            yield "error", {"message": str(e)}
+            return
+        except Exception as e:
+            print(f"Error streaming strategies: {e}")
+            yield "error", {"message": "Error calculating strategies"}
+            return
+        
+        # Kept for the hand log, unless the hand has moved on in the meantime
+        async with session.lock:
+            if session.hand_count == hand_number and len(session.poker_engine.action_history) == action_index:
+                try:
+                    await _record_decision(session, action_index, overlay)
+                except SessionConflictError:
+                    pass  # Another worker moved the game on; the overlay is for a stale decision
+        
+        yield "done", {"strategies": sent, "elapsed_ms": (time.perf_counter() - start) * 1000}
+    finally:
+        job.cancel()
+
+@app.websocket("/api/game/ws")
+async def game_socket(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Persistent transport for one game session
+    
+    Connecting without a session_id starts a new game; with one, it resumes
+    that session. The server sends the full state once ({"type": "state"}),
+    then answers each client message with a delta: the changed GameState
+    fields, the actions added since (the user's and the bot's reply) and
+    the available actions if they changed. On the user's turn the overlay
+    follows progressively as overlay_recommendation and overlay_monte_carlo
+    messages, ended by overlay_done. State, delta and overlay messages all
+    carry the hand_number and action_index of the decision they belong to.
+    
+    Client messages: {"type": "action", "action_type": "raise", "amount": 6},
+    {"type": "next_hand"} and {"type": "sync"} (resend the full state).
+    """
+    await websocket.accept()
+    
+    def capture(response: GameResponse) -> Tuple[GameResponse, int, int, int]:
+        """
+        The response with the session's hand number, version and action
+        count it goes with; call with session.lock held, as another
+        connection's move changes them
+        """
+        return response, session.hand_count, session.version, len(session.poker_engine.action_history)
+    
+    if session_id is None:
+        session = await session_store.create_async()
+        async with session.lock:
+            response = _start_game(session)
+            await session_store.save_async(session)
+            update = capture(response)
+    else:
+        session = await session_store.get_async(session_id)
+        if session is None:
+            await websocket.send_json({"type": "error", "message": "Game session not found"})
+            await websocket.close(code=4404)
+            return
+        async with session.lock:
+            update = capture(_game_status(session))
+    
+    tracker = StateTracker()
+    overlay_task: Optional[asyncio.Task] = None
+    
+    async def send_overlay(game_state: GameState, hand_number: int, action_index: int):
+        # Tagged with its decision, so a client can drop what arrives after it moved on
+        async for event, data in _overlay_updates(game_state, session, hand_number, action_index):
+            await websocket.send_json({"type": f"overlay_{event}", "hand_number": hand_number,
+                                       "action_index": action_index, **data})
+    
+    async def push(update: Tuple[GameResponse, int, int, int], full: bool = False):
+        nonlocal overlay_task
+        response, hand_number, version, action_index = update
+        decision = {"version": version, "hand_number": hand_number, "action_index": action_index}
+        if full:
+            await websocket.send_json({"type": "state", **decision, **tracker.full(response, hand_number)})
+        else:
+            await websocket.send_json({"type": "delta", **decision, **tracker.delta(response, hand_number)})
+        game_state = response.game_state
+        if game_state.active_player == "user" and not game_state.is_hand_over:
+            overlay_task = asyncio.ensure_future(send_overlay(game_state, hand_number, action_index))
+    
+    try:
+        await push(update, full=True)
+        while True:
+            text = await websocket.receive_text()
+            
+            # An overlay still streaming is for a decision that's being replaced
+            if overlay_task is not None:
+                overlay_task.cancel()
+                overlay_task = None
+            
+            try:
+                message = json.loads(text)
+                kind = message.get("type")
+                if kind == "action":
+                    action_request = ActionRequest(action_type=message["action_type"],
+                                                   amount=message.get("amount") or 0)
+                    async with session.lock:
+                        try:
+                            response = await compute_pool.run(_process_action, session, action_request, timeout=None)
+                        finally:
+                            await session_store.save_async(session)
+                        update = capture(response)
+                    await push(update)
+                elif kind == "next_hand":
+                    async with session.lock:
+                        try:
+                            response = _deal_next_hand(session)
+                        finally:
+                            await session_store.save_async(session)
+                        update = capture(response)
+                    await push(update)
+                elif kind == "sync":
+                    async with session.lock:
+                        update = capture(_game_status(session))
+                    await push(update, full=True)
+                else:
+                    await websocket.send_json({"type": "error", "message": f"Unknown message type {kind!r}"})
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "message": e.detail})
+            except SessionConflictError as e:
+                # The session was reloaded with the other worker's change; resend it in full
+                await websocket.send_json({"type": "error", "message": str(e)})
+                async with session.lock:
+                    update = capture(_game_status(session))
+                await push(update, full=True)
+            except ComputeBusyError as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+            except (KeyError, ValueError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "message": f"Malformed message: {e}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if overlay_task is not None:
+            overlay_task.cancel()
+
 @app.delete("/api/game/{session_id}")
 async def end_game(session_id: str):
     """End a game session"""
     
-    if session_id not in game_sessions:
+    if not await session_store.delete_async(session_id):
         raise HTTPException(status_code=404, detail="Game session not found")
     
-    del game_sessions[session_id]
     return {"message": "Game session ended"}
 
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: AnalyzeBatchRequest):
+    """
+    Strategy overlays for a batch of spots, streamed back as NDJSON
+    
+    Each line holds the index of a spot with its strategy_overlay (or an
+    error), in the order the spots finish, and a final line summarizes the
+    batch. Spots with the same decision key are computed once, overlays
+    already cached are sent first, and the rest get one vectorized equity
+    pass before their strategies run on the compute pool.
+    """
+    if len(request.spots) > MAX_BATCH_SPOTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SPOTS} spots per batch")
+    
+    return StreamingResponse(_analyze_batch(request), media_type="application/x-ndjson")
+
+def _spot_street(spot: AnalyzeSpot) -> Street:
+    """Street of a batch spot; raises ValueError if its cards don't make a legal spot"""
+    if len(spot.player_cards) != 2:
+        raise ValueError(f"Expected 2 player cards, got {len(spot.player_cards)}")
+    if len(spot.community_cards) not in BOARD_STREETS:
+        raise ValueError(f"Expected 0, 3, 4 or 5 community cards, got {len(spot.community_cards)}")
+    
+    cards = [card_to_int(card) for card in spot.player_cards + spot.community_cards]
+    if len(set(cards)) != len(cards):
+        raise ValueError("Duplicate cards in spot")
+    
+    street = BOARD_STREETS[len(spot.community_cards)]
+    if spot.street is not None and spot.street != street:
+        raise ValueError(f"A {spot.street.value} spot can't have {len(spot.community_cards)} community cards")
+    return street
+
+def _ndjson(row: Dict[str, Any]) -> str:
+    return json.dumps(row) + "\n"
+
+async def _analyze_batch(request: AnalyzeBatchRequest) -> AsyncIterator[str]:
+    """NDJSON rows of /api/analyze/batch, yielded as each unique spot finishes"""
+    start = time.perf_counter()
+    errors = 0
+    
+    # Group the spots by decision key, keeping the arguments of the first spot of each
+    indices: Dict[Tuple, List[int]] = {}
+    arguments: Dict[Tuple, Dict[str, Any]] = {}
+    for index, spot in enumerate(request.spots):
+        try:
+            street = _spot_street(spot)
+        except ValueError as e:
+            errors += 1
+            yield _ndjson({"index": index, "error": str(e)})
+            continue
+        
+        spot_arguments = dict(
+            player_cards=spot.player_cards,
+            community_cards=spot.community_cards,
+            pot_size=spot.pot_size,
+            to_call=spot.to_call,
+            player_stack=spot.player_stack,
+            action_history=spot.action_history,
+            street=street
+        )
+        key = strategy_engine.decision_key(**spot_arguments)
+        if key not in indices:
+            indices[key] = []
+            arguments[key] = spot_arguments
+        indices[key].append(index)
+    
+    def rows(key: Tuple, result: Dict[str, Any]) -> str:
+        return "".join(_ndjson({"index": index, **result}) for index in indices[key])
+    
+    # Overlays already cached go out straight away
+    pending = []
+    cached = 0
+    for key in indices:
+        overlay = overlay_cache.get(key)
+        if overlay is None:
+            pending.append(key)
+        else:
+            cached += 1
+            yield rows(key, {"strategy_overlay": overlay.model_dump(mode="json")})
+    
+    if pending:
+        # Equity of every remaining spot in one pass, so the strategies find it cached
+        try:
+            await compute_pool.run(
+                strategy_engine.poker_engine.prime_equities,
+                [(arguments[key]["player_cards"], arguments[key]["community_cards"]) for key in pending],
+                timeout=None
+            )
+        except ComputeBusyError as e:
+            print(f"Skipping batch equity pass: {e}")
+        
+        # At most one spot per compute worker, leaving the queue to live games
+        slots = asyncio.Semaphore(compute_pool.max_workers)
+        
+        async def analyze(key: Tuple) -> Tuple[Tuple, Dict[str, Any]]:
+            async with slots:
+                try:
+                    overlay = await compute_pool.run(
+                        strategy_engine.calculate_all_strategies, **arguments[key], budget_ms=request.budget_ms
+                    )
+                    return key, {"strategy_overlay": overlay.model_dump(mode="json")}
+                except Exception as e:
+                    print(f"Error analyzing batch spot: {e}")
+                    return key, {"error": str(e) or type(e).__name__}
+        
+        tasks = [asyncio.ensure_future(analyze(key)) for key in pending]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, result = await finished
+                if "error" in result:
+                    errors += len(indices[key])
+                yield rows(key, result)
+        finally:
+            # The client went away; drop the spots that haven't started
+            for task in tasks:
+                task.cancel()
+    
+    yield _ndjson({
+        "done": True,
+        "spots": len(request.spots),
+        "unique_spots": len(indices),
+        "cached": cached,
+        "errors": errors,
+        "elapsed_ms": (time.perf_counter() - start) * 1000
+    })
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the equity, Monte Carlo and overlay caches"""
+    return {
+        "equity": equity_cache.stats(),
+        "monte_carlo": simulation_cache.stats(),
+        "overlay": overlay_cache.stats()
+    }
+
+@app.get("/api/sessions/stats")
+async def session_stats():
+    """Resident sessions, estimated bytes and eviction counts"""
+    return session_store.stats()
+
+@app.get("/api/compute/stats")
+async def compute_stats():
+    """Queue depth, rejections and timeouts of the compute pool"""
+    return compute_pool.stats()
+
+@app.get("/api/hand-history/stats")
+async def hand_history_stats():
+    """Hands and blocks written to the hand log by this worker"""
+    if hand_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **hand_log.stats()}
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,243 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Union
+from ..models.game_models import ActionType, Street
+from .hand_evaluator import RANKS, SUITS
+from .lookup_evaluator import get_lookup_evaluator
+
+# Integer codes used in the batch arrays
+ACTION_TYPES: List[ActionType] = [
+    ActionType.FOLD, ActionType.CHECK, ActionType.CALL, ActionType.BET, ActionType.RAISE, ActionType.ALL_IN
+]
+ACTION_CODES: Dict[ActionType, int] = {action: code for code, action in enumerate(ACTION_TYPES)}
+FOLD, CHECK, CALL, BET, RAISE, ALL_IN = range(len(ACTION_TYPES))
+
+STREETS: List[Street] = [Street.PREFLOP, Street.FLOP, Street.TURN, Street.RIVER]
+PREFLOP, FLOP, TURN, RIVER = range(len(STREETS))
+
+PLAYERS = ["user", "bot"]
+NO_PLAYER, USER, BOT, TIE = -1, 0, 1, 2
+
+STARTING_STACK = 100
+# Cards dealt to the board when leaving each street (preflop, flop, turn)
+_BOARD_CARDS_DEALT = [3, 1, 1]
+
+
+def _card_str(card: int) -> str:
+    return RANKS[card >> 2] + SUITS[card & 3]
+
+
+class BatchPokerEngine:
+    """
+    N independent hands of the PokerEngine game, stepped in lockstep
+
+    State is held as NumPy arrays with one row per hand (struct of
+    arrays): decks, hole cards, board, pot, stacks, bets, street and the
+    action history. process_actions applies one action to every hand at
+    once, streets are dealt for every hand whose betting round finished,
+    and showdowns are scored with one call to the vectorized evaluator.
+
+    The rules are exactly PokerEngine's - process_action, _advance_street
+    and _determine_winner - including its simplifications (fixed blinds,
+    user acts first on every street, stacks reset each hand). Cards use
+    the evaluator's 0-51 encoding and actions, streets and players the
+    integer codes above.
+    """
+
+    def __init__(self, num_hands: int, seed: Optional[Union[int, np.random.SeedSequence]] = None,
+                 max_actions: int = 32):
+        self.num_hands = num_hands
+        self.rng = np.random.default_rng(seed)
+        self.hand_evaluator = get_lookup_evaluator()
+        self.max_actions = max_actions
+        self.deal_new_hands()
+
+    def deal_new_hands(self, decks: Optional[np.ndarray] = None):
+        """
+        Shuffle and deal a new hand in every row, posting the blinds
+
+        decks optionally fixes the card order, one row of 52 card ints per
+        hand; cards are dealt from the front like PokerEngine's deck.
+        """
+        n = self.num_hands
+        if decks is None:
+            decks = self.rng.permuted(np.tile(np.arange(52, dtype=np.int8), (n, 1)), axis=1)
+        self.decks = np.asarray(decks, dtype=np.int8)
+        self.user_cards = self.decks[:, 0:2]
+        self.bot_cards = self.decks[:, 2:4]
+        self.deck_position = np.full(n, 4, dtype=np.int32)
+        self.board = np.full((n, 5), -1, dtype=np.int8)
+        self.board_size = np.zeros(n, dtype=np.int32)
+
+        # Blinds (simplified: user posts 2, bot posts 1)
+        self.pot = np.full(n, 3, dtype=np.int32)
+        self.user_stack = np.full(n, STARTING_STACK - 2, dtype=np.int32)
+        self.bot_stack = np.full(n, STARTING_STACK - 1, dtype=np.int32)
+        self.current_bet = np.full(n, 2, dtype=np.int32)
+        self.user_bet = np.full(n, 2, dtype=np.int32)
+        self.bot_bet = np.full(n, 1, dtype=np.int32)
+        self.street = np.zeros(n, dtype=np.int8)
+        self.hand_over = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, NO_PLAYER, dtype=np.int8)
+
+        # Action history: (player, action code, amount, street code) per action
+        self.num_actions = np.zeros(n, dtype=np.int32)
+        self.history_player = np.zeros((n, self.max_actions), dtype=np.int8)
+        self.history_action = np.zeros((n, self.max_actions), dtype=np.int8)
+        self.history_amount = np.zeros((n, self.max_actions), dtype=np.int32)
+        self.history_street = np.zeros((n, self.max_actions), dtype=np.int8)
+        self.user_action_count = np.zeros(n, dtype=np.int32)
+        self.bot_action_count = np.zeros(n, dtype=np.int32)
+
+    def next_players(self) -> np.ndarray:
+        """Who acts next in each hand (USER, BOT, or NO_PLAYER once it's over)"""
+        players = np.where(self.user_bet < self.current_bet, USER, BOT)
+        players[self.user_bet == self.bot_bet] = USER  # User acts first on new streets
+
+        # Simplified: user always acts first preflop, then the bot
+        preflop = self.street == PREFLOP
+        players[preflop & (self.bot_action_count == 0)] = BOT
+        players[preflop & (self.user_action_count == 0)] = USER
+
+        players[self.hand_over] = NO_PLAYER
+        return players.astype(np.int8)
+
+    def process_actions(self, actions: np.ndarray, amounts: Optional[np.ndarray] = None,
+                        players: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None):
+        """
+        Apply one action to every hand in mask (default: every hand still in play)
+
+        actions are action codes, amounts the chips for bets and raises,
+        and players who acts (default: next_players()). Finished hands are
+        never changed. Like PokerEngine.process_action, a betting round
+        that completes deals the next street or goes to showdown.
+        """
+        n = self.num_hands
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int8), (n,))
+        amounts = np.zeros(n, dtype=np.int32) if amounts is None else \
+            np.broadcast_to(np.asarray(amounts, dtype=np.int32), (n,))
+        players = self.next_players() if players is None else \
+            np.broadcast_to(np.asarray(players, dtype=np.int8), (n,))
+        acting = ~self.hand_over & (players != NO_PLAYER)
+        if mask is not None:
+            acting &= mask
+        rows = np.flatnonzero(acting)
+        if len(rows) == 0:
+            return
+
+        self._record(rows, players[rows], actions[rows], amounts[rows])
+        for player, stack, bet in ((USER, self.user_stack, self.user_bet), (BOT, self.bot_stack, self.bot_bet)):
+            player_rows = rows[players[rows] == player]
+            self._apply(player_rows, player, actions[player_rows], amounts[player_rows], stack, bet)
+
+        complete = rows[self._betting_round_complete(rows)]
+        self._advance_streets(complete)
+
+    def _record(self, rows: np.ndarray, players: np.ndarray, actions: np.ndarray, amounts: np.ndarray):
+        if self.num_actions[rows].max() >= self.max_actions:
+            grow = self.max_actions
+            self.history_player = np.pad(self.history_player, ((0, 0), (0, grow)))
+            self.history_action = np.pad(self.history_action, ((0, 0), (0, grow)))
+            self.history_amount = np.pad(self.history_amount, ((0, 0), (0, grow)))
+            self.history_street = np.pad(self.history_street, ((0, 0), (0, grow)))
+            self.max_actions += grow
+        slots = self.num_actions[rows]
+        self.history_player[rows, slots] = players
+        self.history_action[rows, slots] = actions
+        self.history_amount[rows, slots] = amounts
+        self.history_street[rows, slots] = self.street[rows]
+        self.num_actions[rows] += 1
+        self.user_action_count[rows] += players == USER
+        self.bot_action_count[rows] += players == BOT
+
+    def _apply(self, rows: np.ndarray, player: int, actions: np.ndarray, amounts: np.ndarray,
+               stack: np.ndarray, bet: np.ndarray):
+        """One player's actions, as PokerEngine._process_user_action/_process_bot_action"""
+        folds = rows[actions == FOLD]
+        self.hand_over[folds] = True
+        self.winner[folds] = BOT if player == USER else USER
+
+        calls = rows[actions == CALL]
+        chips = np.minimum(self.current_bet[calls] - bet[calls], stack[calls])
+        self._put_in(calls, chips, stack, bet)
+
+        raises = (actions == BET) | (actions == RAISE)
+        chips = np.minimum(amounts[raises], stack[rows[raises]])
+        self._put_in(rows[raises], chips, stack, bet)
+        self.current_bet[rows[raises]] = bet[rows[raises]]
+
+        all_ins = rows[actions == ALL_IN]
+        self._put_in(all_ins, stack[all_ins].copy(), stack, bet)
+        self.current_bet[all_ins] = bet[all_ins]
+
+    def _put_in(self, rows: np.ndarray, chips: np.ndarray, stack: np.ndarray, bet: np.ndarray):
+        stack[rows] -= chips
+        self.pot[rows] += chips
+        bet[rows] += chips
+
+    def _betting_round_complete(self, rows: np.ndarray) -> np.ndarray:
+        """PokerEngine._is_betting_round_complete for the given rows (finished hands excluded)"""
+        user_bet, bot_bet = self.user_bet[rows], self.bot_bet[rows]
+        user_all_in, bot_all_in = self.user_stack[rows] == 0, self.bot_stack[rows] == 0
+        complete = (user_bet == bot_bet) & (bot_bet == self.current_bet[rows])
+        # An all-in is complete once the other player has matched it (or is all-in too)
+        complete |= user_all_in & ((bot_bet >= user_bet) | bot_all_in)
+        complete |= bot_all_in & ((user_bet >= bot_bet) | user_all_in)
+        return complete & ~self.hand_over[rows]
+
+    def _advance_streets(self, rows: np.ndarray):
+        """Deal the next street for the given rows, or settle them at showdown after the river"""
+        if len(rows) == 0:
+            return
+        self.user_bet[rows] = 0
+        self.bot_bet[rows] = 0
+        self.current_bet[rows] = 0
+
+        streets = self.street[rows]
+        for street in (PREFLOP, FLOP, TURN):
+            street_rows = rows[streets == street]
+            for _ in range(_BOARD_CARDS_DEALT[street]):
+                self.board[street_rows, self.board_size[street_rows]] = \
+                    self.decks[street_rows, self.deck_position[street_rows]]
+                self.board_size[street_rows] += 1
+                self.deck_position[street_rows] += 1
+            self.street[street_rows] = street + 1
+
+        self._determine_winners(rows[streets == RIVER])
+
+    def _determine_winners(self, rows: np.ndarray):
+        """Score both hands at showdown (higher is better) for the given rows"""
+        if len(rows) == 0:
+            return
+        board = self.board[rows]
+        user_scores = self.hand_evaluator.evaluate_batch(np.concatenate([self.user_cards[rows], board], axis=1))
+        bot_scores = self.hand_evaluator.evaluate_batch(np.concatenate([self.bot_cards[rows], board], axis=1))
+        self.winner[rows] = np.select([user_scores > bot_scores, bot_scores > user_scores], [USER, BOT], TIE)
+        self.hand_over[rows] = True
+
+    def user_net(self) -> np.ndarray:
+        """Chips won or lost by the user seat in each finished hand (0 for hands still in play)"""
+        won = np.select([self.winner == USER, self.winner == TIE], [self.pot, self.pot / 2], 0.0)
+        return np.where(self.hand_over, won - (STARTING_STACK - self.user_stack), 0.0)
+
+    def to_snapshot(self, index: int) -> Dict[str, Any]:
+        """One hand's state in the format of PokerEngine.to_snapshot"""
+        history = [
+            [PLAYERS[self.history_player[index, i]], ACTION_TYPES[self.history_action[index, i]].value,
+             int(self.history_amount[index, i]), STREETS[self.history_street[index, i]].value]
+            for i in range(self.num_actions[index])
+        ]
+        winner = int(self.winner[index])
+        return {
+            "deck": "".join(_card_str(card) for card in self.decks[index, self.deck_position[index]:]),
+            "user_cards": "".join(_card_str(card) for card in self.user_cards[index]),
+            "bot_cards": "".join(_card_str(card) for card in self.bot_cards[index]),
+            "board": "".join(_card_str(card) for card in self.board[index, :self.board_size[index]]),
+            "pot": int(self.pot[index]),
+            "stacks": [int(self.user_stack[index]), int(self.bot_stack[index])],
+            "bets": [int(self.user_bet[index]), int(self.bot_bet[index])],
+            "current_bet": int(self.current_bet[index]),
+            "street": STREETS[self.street[index]].value,
+            "history": history,
+            "hand_over": bool(self.hand_over[index]),
+            "winner": None if winner == NO_PLAYER else ["user", "bot", "tie"][winner]
+        }
@@ -1,11 +1,17 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from ..models.game_models import Card, ActionType, GameState
 from ..game.poker_engine import PokerEngine
 
+# The fold estimate behind a bet or raise is nudged by up to this much either way, uniformly
+FOLD_JITTER = 0.1
+
+
 class PokerBot:
-    def __init__(self):
+    def __init__(self, seed: Optional[np.random.SeedSequence] = None):
         self.name = "EV Bot"
-        self.poker_engine = PokerEngine()
+        # The engine's RNG also drives the bot's randomness, so a seed replays its decisions
+        self.poker_engine = PokerEngine(seed)
     
     def decide_action(self, game_state: GameState, bot_cards: List[Card]) -> Tuple[ActionType, int]:
         """
@@ -61,6 +67,59 @@ class PokerBot:
             else:
                 return ActionType.CHECK, 0
     
+    def action_probabilities(self, game_state: GameState, bot_cards: List[Card]) -> Dict[Tuple[ActionType, int], float]:
+        """
+        The chance of each action decide_action would take here
+        
+        Its only randomness is the nudge to the fold estimate, and a bet's
+        or raise's EV is linear in that estimate, so each chance is the
+        share of the nudge's range past one threshold. Draws nothing from
+        the RNG, so asking doesn't change the bot's play.
+        """
+        equity = self.poker_engine.get_hand_equity(bot_cards, game_state.community_cards)
+        pot_size = game_state.pot_size
+        to_call = game_state.to_call
+        bot_stack = game_state.bot_stack
+        
+        if to_call > 0:
+            # Raising must beat both folding (0) and calling; ties go to the earlier action
+            ev_call = self._calculate_call_ev(equity, pot_size, to_call)
+            raise_size = min(pot_size, bot_stack)
+            p_raise = self._chance_bet_ev_above(equity, pot_size, raise_size, max(0.0, ev_call))
+            otherwise = (ActionType.CALL, 0) if ev_call > 0 else (ActionType.FOLD, 0)
+            probabilities = {(ActionType.RAISE, raise_size): p_raise, otherwise: 1 - p_raise}
+        else:
+            bet_size = min(pot_size // 2, bot_stack)
+            p_bet = self._chance_bet_ev_above(equity, pot_size, bet_size, max(0.0, equity * pot_size))
+            probabilities = {(ActionType.BET, bet_size): p_bet, (ActionType.CHECK, 0): 1 - p_bet}
+        
+        return {action: p for action, p in probabilities.items() if p > 0}
+    
+    def _chance_bet_ev_above(self, equity: float, pot_size: int, bet_size: int, threshold: float) -> float:
+        """Chance over the fold estimate's nudge that betting bet_size has EV above threshold"""
+        # EV = f * pot + (1 - f) * ev_if_call, linear in the fold estimate f
+        ev_if_call = equity * (pot_size + bet_size) - (1 - equity) * bet_size
+        slope = pot_size - ev_if_call
+        if slope == 0:
+            return 1.0 if ev_if_call > threshold else 0.0
+        cutoff = (threshold - ev_if_call) / slope
+        
+        # f is base + U(-FOLD_JITTER, FOLD_JITTER), clipped to [0.1, 0.9]
+        base = self._base_fold_probability(bet_size, pot_size)
+        if slope > 0:
+            # Needs f > cutoff
+            if cutoff >= 0.9:
+                return 0.0
+            if cutoff < 0.1:
+                return 1.0
+            return min(1.0, max(0.0, (base + FOLD_JITTER - cutoff) / (2 * FOLD_JITTER)))
+        # Needs f < cutoff
+        if cutoff <= 0.1:
+            return 0.0
+        if cutoff > 0.9:
+            return 1.0
+        return min(1.0, max(0.0, (cutoff - base + FOLD_JITTER) / (2 * FOLD_JITTER)))
+    
     def _calculate_call_ev(self, equity: float, pot_size: int, to_call: int) -> float:
         """Calculate Expected Value of calling"""
         p_win = equity
@@ -99,9 +158,9 @@ class PokerBot:
         
         return fold_prob * ev_if_fold + call_prob * ev_if_call
     
-    def _estimate_opponent_fold_probability(self, bet_size: int, pot_size: int) -> float:
+    def _base_fold_probability(self, bet_size: int, pot_size: int) -> float:
         """
-        Estimate probability that opponent will fold to our bet
+        Estimate probability that opponent will fold to our bet, before the randomness
         
         This is a simplified model for educational purposes.
         In reality, this would depend on opponent modeling and history.
@@ -123,11 +182,14 @@ class PokerBot:
         else:
             base_fold_rate = 0.8
         
+        return base_fold_rate
+    
+    def _estimate_opponent_fold_probability(self, bet_size: int, pot_size: int) -> float:
+        """Estimate probability that opponent will fold to our bet, with some randomness"""
         # Add some randomness to make play less predictable
-        import random
-        randomness = random.uniform(-0.1, 0.1)
+        randomness = self.poker_engine.rng.uniform(-FOLD_JITTER, FOLD_JITTER)
         
-        return max(0.1, min(0.9, base_fold_rate + randomness))
+        return max(0.1, min(0.9, self._base_fold_probability(bet_size, pot_size) + randomness))
     
     def get_decision_explanation(self, action: ActionType, amount: int, 
                                equity: float, pot_size: int, to_call: int) -> str:
@@ -0,0 +1,44 @@
+from itertools import permutations
+from typing import List, Sequence, Tuple
+from ..models.game_models import Card
+from ..utils.cache import LRUCache
+from .hand_evaluator import card_to_int
+
+SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+CanonicalKey = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def canonicalize(hole_cards: Sequence[int], board: Sequence[int]) -> CanonicalKey:
+    """
+    Map (hole cards, board) to a suit-isomorphic key
+
+    Suits are interchangeable when the opponent's hand is unknown, and
+    card order within the hole cards and within the board doesn't affect
+    equity. The key is the lexicographically smallest (sorted hole cards,
+    sorted board) over all 24 suit relabelings, so e.g. AhKh on a given
+    flop shares a key with AsKs on the suit-permuted flop.
+    """
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        hole = tuple(sorted((c & ~3) | perm[c & 3] for c in hole_cards))
+        board_key = tuple(sorted((c & ~3) | perm[c & 3] for c in board))
+        key = (hole, board_key)
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def canonical_key(player_cards: List[Card], community_cards: List[Card]) -> CanonicalKey:
+    """Canonical key for Card models"""
+    return canonicalize(
+        [card_to_int(card) for card in player_cards],
+        [card_to_int(card) for card in community_cards]
+    )
+
+
+# Shared across every PokerEngine/MonteCarloStrategy in the process
+equity_cache = LRUCache(maxsize=50000, name="equity")
+simulation_cache = LRUCache(maxsize=20000, name="monte_carlo")
+# Full strategy overlays, keyed by the canonical decision state
+overlay_cache = LRUCache(maxsize=5000, name="overlay")
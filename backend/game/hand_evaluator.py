@@ -0,0 +1,298 @@
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+from ..models.game_models import Card
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+SUITS = ['h', 'd', 'c', 's']
+
+# Hand categories (higher is better)
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+CATEGORY_NAMES = [
+    "High Card", "Pair", "Two Pair", "Three of a Kind", "Straight",
+    "Flush", "Full House", "Four of a Kind", "Straight Flush"
+]
+
+CATEGORY_SHIFT = 20
+
+
+def card_to_int(card: Card) -> int:
+    """Encode a Card as 0-51 (rank index * 4 + suit index)"""
+    return RANKS.index(card.rank) * 4 + SUITS.index(card.suit.lower())
+
+
+def int_to_card(value: int) -> Card:
+    """Decode a 0-51 card integer back into a Card"""
+    return Card(rank=RANKS[value >> 2], suit=SUITS[value & 3])
+
+
+def cards_to_array(cards: Sequence[Card]) -> np.ndarray:
+    """Encode a list of Cards as a uint8 array"""
+    return np.array([card_to_int(card) for card in cards], dtype=np.uint8)
+
+
+def remaining_deck(used_cards: Sequence[int]) -> np.ndarray:
+    """All card integers not in used_cards, in ascending order"""
+    used = np.zeros(52, dtype=bool)
+    used[np.asarray(used_cards, dtype=np.int64)] = True
+    return np.flatnonzero(~used).astype(np.uint8)
+
+
+def _build_tables():
+    """Build the 13-bit rank-mask lookup tables shared by every evaluator"""
+    masks = np.arange(1 << 13)
+
+    # Highest rank present in the mask (0 for an empty mask)
+    high_rank = np.zeros(1 << 13, dtype=np.int64)
+    # Top five ranks packed as nibbles (rank + 1), highest rank in the top nibble
+    top_five = np.zeros(1 << 13, dtype=np.int64)
+    # High card + 1 of the best straight in the mask, 0 if none
+    straight_high = np.zeros(1 << 13, dtype=np.int64)
+
+    for mask in range(1, 1 << 13):
+        ranks = [r for r in range(12, -1, -1) if mask & (1 << r)]
+        high_rank[mask] = ranks[0]
+        packed = 0
+        for i, rank in enumerate(ranks[:5]):
+            packed |= (rank + 1) << (4 * (4 - i))
+        top_five[mask] = packed
+
+        # Ace can play low: shift ranks up by one and add the ace as bit 0
+        extended = (mask << 1) | ((mask >> 12) & 1)
+        runs = extended & (extended >> 1) & (extended >> 2) & (extended >> 3) & (extended >> 4)
+        if runs:
+            # Lowest bit of a run of five is its low card; high card is four above
+            straight_high[mask] = runs.bit_length() + 3
+
+    popcount = np.array([bin(m).count("1") for m in masks], dtype=np.int64)
+    return high_rank, top_five, straight_high, popcount
+
+
+_HIGH_RANK, _TOP_FIVE, _STRAIGHT_HIGH, _POPCOUNT = _build_tables()
+_RANK_BITS = (1 << np.arange(13)).astype(np.int64)
+
+
+class HandEvaluator:
+    """
+    Vectorized poker hand evaluator
+
+    Scores 5, 6 or 7 card hands held as integer arrays of shape (N, k),
+    where each card is encoded as rank_index * 4 + suit_index. A whole
+    batch is evaluated with a handful of array operations and lookups into
+    precomputed 13-bit rank-mask tables.
+
+    Unlike deuces, higher scores are better: the hand category sits in the
+    high bits and the tie-breaking ranks in the low 20 bits.
+    """
+
+    def evaluate_batch(self, cards: np.ndarray) -> np.ndarray:
+        """Score every row of an (N, k) card array, k between 5 and 7"""
+        cards = np.asarray(cards, dtype=np.int64)
+        if cards.ndim == 1:
+            cards = cards[np.newaxis, :]
+
+        ranks = cards >> 2
+        suits = cards & 3
+        card_bits = _RANK_BITS[ranks]
+
+        # Per-rank counts and bitmasks of ranks appearing at least n times
+        rank_counts = (ranks[:, :, np.newaxis] == np.arange(13)).sum(axis=1)
+        rank_mask = ((rank_counts > 0) * _RANK_BITS).sum(axis=1)
+        pair_mask = ((rank_counts >= 2) * _RANK_BITS).sum(axis=1)
+        trip_mask = ((rank_counts >= 3) * _RANK_BITS).sum(axis=1)
+        quad_mask = ((rank_counts >= 4) * _RANK_BITS).sum(axis=1)
+
+        # Rank mask of each suit; at most one suit can hold five of seven cards
+        suit_masks = ((suits[:, :, np.newaxis] == np.arange(4)) * card_bits[:, :, np.newaxis]).sum(axis=1)
+        suit_counts = _POPCOUNT[suit_masks]
+        flush_suit = suit_counts.argmax(axis=1)
+        flush_mask = suit_masks[np.arange(len(cards)), flush_suit]
+        has_flush = suit_counts.max(axis=1) >= 5
+
+        straight = _STRAIGHT_HIGH[rank_mask]
+        straight_flush = np.where(has_flush, _STRAIGHT_HIGH[flush_mask], 0)
+
+        num_pairs = _POPCOUNT[pair_mask]
+        num_trips = _POPCOUNT[trip_mask]
+
+        top_pair = _HIGH_RANK[pair_mask]
+        top_trip = _HIGH_RANK[trip_mask]
+        top_quad = _HIGH_RANK[quad_mask]
+        second_pair = _HIGH_RANK[pair_mask & ~_RANK_BITS[top_pair]]
+        # Best pair to go with the trips (may be a second set of trips)
+        boat_pair = _HIGH_RANK[pair_mask & ~_RANK_BITS[top_trip]]
+
+        # Tie-breaking values for each category
+        pair_value = ((top_pair + 1) << 12) | (_TOP_FIVE[rank_mask & ~_RANK_BITS[top_pair]] >> 8)
+        two_pair_kicker = _TOP_FIVE[rank_mask & ~_RANK_BITS[top_pair] & ~_RANK_BITS[second_pair]] >> 16
+        two_pair_value = ((top_pair + 1) << 8) | ((second_pair + 1) << 4) | two_pair_kicker
+        trips_value = ((top_trip + 1) << 8) | (_TOP_FIVE[rank_mask & ~_RANK_BITS[top_trip]] >> 12)
+        boat_value = ((top_trip + 1) << 4) | (boat_pair + 1)
+        quads_value = ((top_quad + 1) << 4) | (_TOP_FIVE[rank_mask & ~_RANK_BITS[top_quad]] >> 16)
+
+        conditions = [
+            straight_flush > 0,
+            quad_mask > 0,
+            (num_trips >= 1) & (num_pairs >= 2),
+            has_flush,
+            straight > 0,
+            num_trips >= 1,
+            num_pairs >= 2,
+            num_pairs == 1,
+        ]
+        categories = [
+            (STRAIGHT_FLUSH << CATEGORY_SHIFT) | straight_flush,
+            (FOUR_OF_A_KIND << CATEGORY_SHIFT) | quads_value,
+            (FULL_HOUSE << CATEGORY_SHIFT) | boat_value,
+            (FLUSH << CATEGORY_SHIFT) | _TOP_FIVE[flush_mask],
+            (STRAIGHT << CATEGORY_SHIFT) | straight,
+            (THREE_OF_A_KIND << CATEGORY_SHIFT) | trips_value,
+            (TWO_PAIR << CATEGORY_SHIFT) | two_pair_value,
+            (ONE_PAIR << CATEGORY_SHIFT) | pair_value,
+        ]
+        scores = np.select(conditions, categories, default=(HIGH_CARD << CATEGORY_SHIFT) | _TOP_FIVE[rank_mask])
+        return scores.astype(np.int32)
+
+    def evaluate(self, cards: List[int]) -> int:
+        """Score a single 5-7 card hand"""
+        return int(self.evaluate_batch(np.asarray(cards)[np.newaxis, :])[0])
+
+    def evaluate_cards(self, hole_cards: List[Card], board: List[Card]) -> int:
+        """Score a hand given as Card models"""
+        return self.evaluate([card_to_int(card) for card in hole_cards + board])
+
+    def simulate_outcomes(self, player: np.ndarray, board: np.ndarray, num_trials: int,
+                          rng: np.random.Generator) -> Dict[str, int]:
+        """Deal num_trials random opponent hands and runouts, counting wins/ties/losses"""
+        player_hands, _, opponent_hands = self._simulation_rows(player, board, num_trials, rng)
+        return self.compare_batch(self.evaluate_batch(player_hands), self.evaluate_batch(opponent_hands))
+    
+    def enumerate_outcomes(self, player: np.ndarray, board: np.ndarray) -> Dict[str, int]:
+        """
+        Exactly enumerate every opponent holding (and river card, on the turn)
+        
+        Our hand is scored once per final board; only opponent hands are
+        evaluated per combination.
+        """
+        player_hands, board_index, opponent_hands = self._enumeration_rows(player, board)
+        player_scores = self.evaluate_batch(player_hands)
+        opponent_scores = self.evaluate_batch(opponent_hands)
+        return self.compare_batch(player_scores[board_index], opponent_scores)
+    
+    def equity_batch(self, spots: Sequence[Tuple[np.ndarray, np.ndarray]], num_trials: int,
+                     rng: np.random.Generator, max_rows: int = 250000) -> np.ndarray:
+        """
+        Equity of many (player, board) spots with a few large evaluator calls
+        
+        Turn and river spots are enumerated exactly, giving the same equity
+        as enumerate_outcomes; flop spots sample num_trials runouts like
+        simulate_outcomes. Spots are scored together in chunks of about
+        max_rows opponent hands, so per-call overhead is paid per chunk
+        rather than per spot.
+        """
+        equities = np.empty(len(spots))
+        chunk: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        chunk_start = 0
+        chunk_rows = 0
+        for spot, (player, board) in enumerate(spots):
+            if len(board) >= 4:
+                rows = self._enumeration_rows(player, board)
+            else:
+                rows = self._simulation_rows(player, board, num_trials, rng)
+            chunk.append(rows)
+            chunk_rows += len(rows[2])
+            if chunk_rows >= max_rows or spot == len(spots) - 1:
+                equities[chunk_start:spot + 1] = self._chunk_equities(chunk)
+                chunk = []
+                chunk_start = spot + 1
+                chunk_rows = 0
+        return equities
+    
+    def _chunk_equities(self, chunk: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> np.ndarray:
+        """Score the showdown rows of several spots in two evaluator calls"""
+        player_counts = [len(player_hands) for player_hands, _, _ in chunk]
+        player_offsets = np.concatenate([[0], np.cumsum(player_counts)[:-1]])
+        player_scores = self.evaluate_batch(np.concatenate([player_hands for player_hands, _, _ in chunk]))
+        opponent_scores = self.evaluate_batch(np.concatenate([opponent_hands for _, _, opponent_hands in chunk]))
+        
+        ours = player_scores[np.concatenate([board_index + offset
+                                             for (_, board_index, _), offset in zip(chunk, player_offsets)])]
+        owner = np.repeat(np.arange(len(chunk)), [len(opponent_hands) for _, _, opponent_hands in chunk])
+        points = (ours > opponent_scores) + 0.5 * (ours == opponent_scores)
+        return np.bincount(owner, weights=points, minlength=len(chunk)) / np.bincount(owner, minlength=len(chunk))
+    
+    def _simulation_rows(self, player: np.ndarray, board: np.ndarray, num_trials: int,
+                         rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Our hand, board index and opponent hand of num_trials random deals"""
+        deck = remaining_deck(np.concatenate([player, board]))
+        
+        # Each trial draws the opponent's two cards plus the rest of the board
+        draw_count = 2 + 5 - len(board)
+        
+        # Random permutation per trial; the first draw_count cards are dealt
+        order = np.argsort(rng.random((num_trials, len(deck))), axis=1)[:, :draw_count]
+        dealt = deck[order]
+        
+        sim_board = np.concatenate([np.broadcast_to(board, (num_trials, len(board))), dealt[:, 2:]], axis=1)
+        player_hands = np.concatenate([np.broadcast_to(player, (num_trials, len(player))), sim_board], axis=1)
+        opponent_hands = np.concatenate([dealt[:, :2], sim_board], axis=1)
+        return player_hands, np.arange(num_trials), opponent_hands
+    
+    def _enumeration_rows(self, player: np.ndarray,
+                          board: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Our hand per final board, and every opponent hand with the index of its board"""
+        deck = remaining_deck(np.concatenate([player, board]))
+        
+        if len(board) == 5:
+            boards = board[np.newaxis, :]
+        elif len(board) == 4:
+            boards = np.concatenate([np.broadcast_to(board, (len(deck), 4)), deck[:, np.newaxis]], axis=1)
+        else:
+            raise ValueError(f"Exact enumeration needs a turn or river board, got {len(board)} cards")
+        
+        player_hands = np.concatenate([np.broadcast_to(player, (len(boards), len(player))), boards], axis=1)
+        
+        # Every two-card opponent holding from the remaining deck
+        first, second = np.triu_indices(len(deck), k=1)
+        combos = np.stack([deck[first], deck[second]], axis=1)
+        
+        # Drop combos that use the runout card of their board
+        runout = boards[:, -1:]
+        valid = (combos[np.newaxis, :, 0] != runout) & (combos[np.newaxis, :, 1] != runout)
+        board_index, combo_index = np.nonzero(valid)
+        
+        opponent_hands = np.concatenate([combos[combo_index], boards[board_index]], axis=1)
+        return player_hands, board_index, opponent_hands
+    
+    @staticmethod
+    def equity_from_outcomes(outcomes: Dict[str, int]) -> float:
+        """Equity with ties counted as half a win"""
+        total = outcomes["wins"] + outcomes["ties"] + outcomes["losses"]
+        return (outcomes["wins"] + 0.5 * outcomes["ties"]) / total if total > 0 else 0.5
+    
+    @staticmethod
+    def get_category(score: int) -> int:
+        """Extract the hand category from a score"""
+        return int(score) >> CATEGORY_SHIFT
+
+    @staticmethod
+    def category_name(score: int) -> str:
+        """Human readable hand category for a score"""
+        return CATEGORY_NAMES[int(score) >> CATEGORY_SHIFT]
+
+    @staticmethod
+    def compare_batch(player_scores: np.ndarray, opponent_scores: np.ndarray) -> Dict[str, int]:
+        """Count wins/ties/losses of player against opponent score arrays"""
+        return {
+            "wins": int((player_scores > opponent_scores).sum()),
+            "ties": int((player_scores == opponent_scores).sum()),
+            "losses": int((player_scores < opponent_scores).sum())
+        }
@@ -0,0 +1,663 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from ..models.game_models import ActionType, Street, StrategyOverlay
+from .batch_engine import ACTION_CODES, ACTION_TYPES, STREETS
+from .hand_evaluator import card_to_int
+
+# Per-hand fixed-width fields of a block, readable in place with np.frombuffer.
+# cards packs user, user, bot, bot and five board cards at 6 bits each
+# (NO_CARD for board cards not dealt); flags holds the winner (bits 0-1),
+# board size (bits 2-4) and whether the hand went to showdown (bit 5).
+HAND_DTYPE = np.dtype([
+    ("cards", "u1", (7,)),
+    ("flags", "u1"),
+    ("num_actions", "u1"),
+    ("session", "<u2"),
+    ("hand_number", "<u4"),
+    ("timestamp", "<u4"),
+])
+# One per user decision that had a strategy overlay: the hand it belongs to
+# (index within the block), the index its action got in the hand's actions,
+# each strategy's recommendation (action code and amount), the equity and
+# the EV strategy's value of folding, calling, checking and betting (NaN
+# where the action wasn't available)
+DECISION_DTYPE = np.dtype([
+    ("hand", "<u2"),
+    ("action_index", "u1"),
+    ("actions", "u1", (6,)),
+    ("amounts", "<u2", (6,)),
+    ("equity", "<f4"),
+    ("ev", "<f4", (4,)),
+])
+# One entry per block in a segment's .idx file
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("num_hands", "<u4"),
+    ("first_timestamp", "<u4"),
+    ("last_timestamp", "<u4"),
+])
+# magic, hands, actions, decisions, session table bytes, amount bytes, CRC-32 of the payload
+BLOCK_HEADER = struct.Struct("<4sIIIIII")
+BLOCK_MAGIC = b"HHB2"
+
+NO_CARD = 63
+WINNERS = ["user", "bot", "tie"]
+# Action byte: amount follows (bit 6), player (bit 5), street (bits 3-4), action code (bits 0-2)
+HAS_AMOUNT = 0x40
+MAX_ACTIONS = 255
+
+SEGMENT_PATTERN = re.compile(r"^(?P<prefix>.+)-(?P<segment>\d{6})\.log$")
+
+# StrategyOverlay fields, in the order their recommendations are stored
+STRATEGY_FIELDS = ["ev_strategy", "monte_carlo_strategy", "bayesian_strategy", "kelly_strategy",
+                   "risk_utility_strategy", "gto_strategy"]
+# Actions the EV strategy prices, in the order of DecisionRecord.ev
+EV_ACTIONS = ["fold", "call", "check", "bet"]
+
+
+def _float32(value: Optional[float]) -> Optional[float]:
+    # Values are stored as float32; rounding up front makes records round-trip exactly
+    return None if value is None else float(np.float32(value))
+
+
+class DecisionRecord:
+    """
+    The strategy overlay shown for one user decision
+
+    ev holds the EV strategy's value of folding, calling, checking and
+    betting/raising (None where not available), recommendations each
+    strategy's (action, amount) in STRATEGY_FIELDS order.
+    """
+
+    def __init__(self, action_index: int, equity: float, ev: Sequence[Optional[float]],
+                 recommendations: List[Tuple[ActionType, int]]):
+        self.action_index = action_index
+        self.equity = _float32(equity)
+        self.ev = [_float32(value) for value in ev]
+        self.recommendations = recommendations
+
+    @classmethod
+    def from_overlay(cls, action_index: int, overlay: StrategyOverlay) -> "DecisionRecord":
+        """Summary of an overlay computed before the action_index-th action of the hand"""
+        variables = overlay.ev_strategy.variables
+        ev = [
+            None if variables.get(f"ev_{action}", "N/A") == "N/A" else float(variables[f"ev_{action}"].lstrip("$"))
+            for action in EV_ACTIONS
+        ]
+        recommendations = [
+            (getattr(overlay, field).recommended_action, int(getattr(overlay, field).recommended_amount or 0))
+            for field in STRATEGY_FIELDS
+        ]
+        # A strategy that failed outright reports an error instead of its variables
+        return cls(action_index, float(variables.get("equity", "nan")), ev, recommendations)
+
+    def to_list(self) -> list:
+        """JSON-serializable form, as kept in session snapshots"""
+        return [self.action_index, self.equity, self.ev,
+                [[action.value, amount] for action, amount in self.recommendations]]
+
+    @classmethod
+    def from_list(cls, data: list) -> "DecisionRecord":
+        action_index, equity, ev, recommendations = data
+        return cls(action_index, equity, ev, [(ActionType(action), amount) for action, amount in recommendations])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DecisionRecord) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"DecisionRecord(#{self.action_index}, equity={self.equity:.3f})"
+
+
+class HandRecord:
+    """
+    One completed hand as stored in the log
+
+    Cards are 0-51 ints (rank index * 4 + suit index), actions are
+    (player, street, action type, amount) in the order taken, and
+    user_invested is every chip the user seat put in, blinds included.
+    decisions are the overlays shown for the user's decisions, if any.
+    """
+
+    def __init__(self, session: str, hand_number: int, timestamp: int, user_cards: Sequence[int],
+                 bot_cards: Sequence[int], board: Sequence[int], winner: str, showdown: bool, pot: int,
+                 user_invested: int, actions: List[Tuple[str, Street, ActionType, int]],
+                 decisions: Optional[List[DecisionRecord]] = None):
+        self.session = session
+        self.hand_number = hand_number
+        self.timestamp = timestamp
+        self.user_cards = list(user_cards)
+        self.bot_cards = list(bot_cards)
+        self.board = list(board)
+        self.winner = winner
+        self.showdown = showdown
+        self.pot = pot
+        self.user_invested = user_invested
+        self.actions = actions
+        self.decisions = decisions or []
+
+    @property
+    def user_net(self) -> float:
+        """Chips won or lost by the user seat"""
+        won = {"user": self.pot, "tie": self.pot / 2}.get(self.winner, 0)
+        return won - self.user_invested
+
+    @classmethod
+    def from_engine(cls, engine, session: str, hand_number: int, timestamp: Optional[int] = None,
+                    decisions: Optional[List[DecisionRecord]] = None) -> "HandRecord":
+        """Record of a PokerEngine whose hand is over"""
+        if not engine.hand_over:
+            raise ValueError("Only finished hands can be recorded")
+        actions = [
+            (action.player, street, action.action_type, action.amount)
+            for action, street in zip(engine.action_history, engine.action_streets)
+        ]
+        showdown = bool(actions) and actions[-1][2] != ActionType.FOLD
+        return cls(
+            session, hand_number, int(time.time()) if timestamp is None else timestamp,
+            [card_to_int(card) for card in engine.user_cards], [card_to_int(card) for card in engine.bot_cards],
+            [card_to_int(card) for card in engine.community_cards], engine.winner, showdown, engine.pot,
+            100 - engine.user_stack, actions, decisions
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, HandRecord) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"HandRecord({self.session!r}, #{self.hand_number}, winner={self.winner}, pot={self.pot})"
+
+
+def _encode_varints(values: Sequence[int]) -> bytes:
+    out = bytearray()
+    for value in values:
+        if value < 0:
+            raise ValueError(f"Amounts are stored unsigned, got {value}")
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Every LEB128 varint in a uint8 array, decoded at once"""
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts + 1
+    if lengths.max() == 1:
+        return data.astype(np.int64)
+    position = np.arange(len(data)) - np.repeat(starts, lengths)
+    parts = (data & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(parts, starts)
+
+
+def _pack_cards(cards: Sequence[int]) -> bytes:
+    """Nine 6-bit card codes into 7 bytes, big-endian"""
+    packed = 0
+    for card in cards:
+        packed = (packed << 6) | card
+    return (packed << 2).to_bytes(7, "big")
+
+
+def unpack_cards(packed: np.ndarray) -> np.ndarray:
+    """(N, 7) packed card bytes to (N, 9) card ints, NO_CARD where there's none"""
+    bits = np.unpackbits(packed, axis=1)[:, :54].reshape(len(packed), 9, 6)
+    return (bits @ (1 << np.arange(5, -1, -1))).astype(np.int8)
+
+
+def encode_block(records: Sequence[HandRecord]) -> bytes:
+    """One block of hands: header, session table, hand table, decisions, action codes, amounts"""
+    if len(records) > 0xFFFF:
+        raise ValueError("At most 65535 hands fit in one block")
+    sessions: List[str] = []
+    session_index = {}
+    hands = np.zeros(len(records), dtype=HAND_DTYPE)
+    decisions = np.zeros(sum(len(record.decisions) for record in records), dtype=DECISION_DTYPE)
+    num_decisions = 0
+    codes = bytearray()
+    amounts: List[int] = []
+    for i, record in enumerate(records):
+        if len(record.actions) > MAX_ACTIONS:
+            raise ValueError(f"Hand has {len(record.actions)} actions; at most {MAX_ACTIONS} can be stored")
+        if record.session not in session_index:
+            session_index[record.session] = len(sessions)
+            sessions.append(record.session)
+        board = list(record.board) + [NO_CARD] * (5 - len(record.board))
+        hands["cards"][i] = np.frombuffer(_pack_cards(record.user_cards + record.bot_cards + board), dtype=np.uint8)
+        hands["flags"][i] = WINNERS.index(record.winner) | (len(record.board) << 2) | (int(record.showdown) << 5)
+        hands["num_actions"][i] = len(record.actions)
+        hands["session"][i] = session_index[record.session]
+        hands["hand_number"][i] = record.hand_number
+        hands["timestamp"][i] = record.timestamp
+
+        for decision in record.decisions:
+            row = decisions[num_decisions]
+            row["hand"] = i
+            row["action_index"] = decision.action_index
+            row["actions"] = [ACTION_CODES[action] for action, _ in decision.recommendations]
+            row["amounts"] = [min(amount, 0xFFFF) for _, amount in decision.recommendations]
+            row["equity"] = decision.equity
+            row["ev"] = [np.nan if value is None else value for value in decision.ev]
+            num_decisions += 1
+
+        amounts += [record.pot, record.user_invested]
+        for player, street, action_type, amount in record.actions:
+            code = ACTION_CODES[action_type] | (STREETS.index(street) << 3) | ((player == "bot") << 5)
+            if amount:
+                code |= HAS_AMOUNT
+                amounts.append(amount)
+            codes.append(code)
+
+    if len(sessions) > 0xFFFF:
+        raise ValueError("Too many sessions in one block")
+    session_table = b"".join(_encode_varints([len(name)]) + name for name in map(_encode_session, sessions))
+    amount_bytes = _encode_varints(amounts)
+    payload = session_table + hands.tobytes() + decisions.tobytes() + bytes(codes) + amount_bytes
+    header = BLOCK_HEADER.pack(BLOCK_MAGIC, len(records), len(codes), len(decisions), len(session_table),
+                               len(amount_bytes), zlib.crc32(payload))
+    return header + payload
+
+
+def _encode_session(session: str) -> bytes:
+    """UUID session ids take a 0x00 marker and their 16 raw bytes, anything else 0xFF and UTF-8"""
+    try:
+        if str(uuid.UUID(session)) == session:
+            return b"\x00" + uuid.UUID(session).bytes
+    except ValueError:
+        pass
+    return b"\xff" + session.encode()
+
+
+def _decode_session(data: bytes) -> str:
+    return str(uuid.UUID(bytes=data[1:])) if data[:1] == b"\x00" else data[1:].decode()
+
+
+def _read_header(buffer, offset: int) -> Optional[Tuple[int, int, int, int, int, int, int, int]]:
+    """
+    (header size, hands, actions, decisions, session table bytes, amount
+    bytes, CRC, block length) of the block at offset, or None if no
+    complete header starts there
+    """
+    if bytes(buffer[offset:offset + 4]) != BLOCK_MAGIC or offset + BLOCK_HEADER.size > len(buffer):
+        return None
+    _, hands, actions, decisions, sessions_len, amounts_len, crc = BLOCK_HEADER.unpack_from(buffer, offset)
+    header_size = BLOCK_HEADER.size
+    length = (header_size + sessions_len + hands * HAND_DTYPE.itemsize + decisions * DECISION_DTYPE.itemsize
+              + actions + amounts_len)
+    return header_size, hands, actions, decisions, sessions_len, amounts_len, crc, length
+
+
+class HandBlock:
+    """
+    A decoded view of one block
+
+    hands, decisions, codes and the amounts' raw bytes are NumPy views
+    straight into the mapped file; only the varint amounts are decoded
+    (all at once). cards(), user_net() and the other accessors are
+    vectorized over the block's hands; records() builds HandRecords for
+    callers that want objects. segment and number identify the block
+    within the log.
+    """
+
+    def __init__(self, buffer, offset: int, segment: Optional[str] = None, number: int = 0):
+        header = _read_header(buffer, offset)
+        if header is None:
+            raise ValueError(f"No hand block at offset {offset}")
+        header_size, num_hands, num_actions, num_decisions, sessions_len, amounts_len, _, _ = header
+        self.segment = segment
+        self.number = number
+        position = offset + header_size
+        self.sessions = self._read_sessions(bytes(buffer[position:position + sessions_len]))
+        position += sessions_len
+        self.hands = np.frombuffer(buffer, dtype=HAND_DTYPE, count=num_hands, offset=position)
+        position += num_hands * HAND_DTYPE.itemsize
+        self.decisions = np.frombuffer(buffer, dtype=DECISION_DTYPE, count=num_decisions, offset=position)
+        position += num_decisions * DECISION_DTYPE.itemsize
+        self.codes = np.frombuffer(buffer, dtype=np.uint8, count=num_actions, offset=position)
+        position += num_actions
+        amounts = decode_varints(np.frombuffer(buffer, dtype=np.uint8, count=amounts_len, offset=position))
+
+        # Per hand: pot, user_invested, then one amount per action that has one
+        has_amount = (self.codes & HAS_AMOUNT) > 0
+        stored = np.concatenate([[0], np.cumsum(has_amount, dtype=np.int64)])
+        offsets = self.action_offsets
+        per_hand = 2 + stored[offsets[1:]] - stored[offsets[:-1]]
+        starts = np.concatenate([[0], np.cumsum(per_hand)[:-1]]).astype(np.int64)
+        self.pot = amounts[starts]
+        self.user_invested = amounts[starts + 1]
+        # Amount of every action (0 where none was stored)
+        self.amounts = np.zeros(num_actions, dtype=np.int64)
+        self.amounts[has_amount] = np.delete(amounts, np.concatenate([starts, starts + 1]))
+
+    @staticmethod
+    def _read_sessions(table: bytes) -> List[str]:
+        sessions, position = [], 0
+        while position < len(table):
+            length = shift = 0
+            while True:
+                byte = table[position]
+                position += 1
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            sessions.append(_decode_session(table[position:position + length]))
+            position += length
+        return sessions
+
+    def __len__(self) -> int:
+        return len(self.hands)
+
+    @property
+    def action_offsets(self) -> np.ndarray:
+        """Index of each hand's first action in codes, plus the total at the end"""
+        return np.concatenate([[0], np.cumsum(self.hands["num_actions"], dtype=np.int64)])
+
+    def cards(self) -> np.ndarray:
+        """(N, 9) card ints: user, user, bot, bot, board (NO_CARD past the board size)"""
+        return unpack_cards(self.hands["cards"])
+
+    @property
+    def winner(self) -> np.ndarray:
+        """0 user, 1 bot, 2 tie"""
+        return self.hands["flags"] & 3
+
+    @property
+    def board_size(self) -> np.ndarray:
+        return (self.hands["flags"] >> 2) & 7
+
+    @property
+    def showdown(self) -> np.ndarray:
+        return (self.hands["flags"] & 0x20) > 0
+
+    @property
+    def action_players(self) -> np.ndarray:
+        """0 user, 1 bot for every action"""
+        return (self.codes >> 5) & 1
+
+    @property
+    def action_streets(self) -> np.ndarray:
+        return (self.codes >> 3) & 3
+
+    @property
+    def action_types(self) -> np.ndarray:
+        return self.codes & 7
+
+    def user_net(self) -> np.ndarray:
+        won = np.select([self.winner == 0, self.winner == 2], [self.pot, self.pot / 2], 0.0)
+        return won - self.user_invested
+
+    def records(self) -> Iterator[HandRecord]:
+        cards = self.cards()
+        offsets = self.action_offsets
+        decision_offsets = np.searchsorted(self.decisions["hand"], np.arange(len(self.hands) + 1))
+        for i, hand in enumerate(self.hands):
+            board_size = int(self.board_size[i])
+            actions = [
+                (["user", "bot"][(code >> 5) & 1], STREETS[(code >> 3) & 3], ACTION_TYPES[code & 7], int(amount))
+                for code, amount in zip(self.codes[offsets[i]:offsets[i + 1]], self.amounts[offsets[i]:offsets[i + 1]])
+            ]
+            decisions = [
+                DecisionRecord(
+                    int(row["action_index"]), float(row["equity"]),
+                    [None if np.isnan(value) else float(value) for value in row["ev"]],
+                    [(ACTION_TYPES[action], int(amount)) for action, amount in zip(row["actions"], row["amounts"])]
+                )
+                for row in self.decisions[decision_offsets[i]:decision_offsets[i + 1]]
+            ]
+            yield HandRecord(
+                self.sessions[hand["session"]], int(hand["hand_number"]), int(hand["timestamp"]),
+                cards[i, 0:2].tolist(), cards[i, 2:4].tolist(), cards[i, 4:4 + board_size].tolist(),
+                WINNERS[self.winner[i]], bool(self.showdown[i]), int(self.pot[i]), int(self.user_invested[i]),
+                actions, decisions
+            )
+
+
+def _scan_blocks(buffer, start: int = 0, verify: bool = False) -> List[Tuple[int, int]]:
+    """(offset, length) of every complete block from start; stops at the first partial or corrupt one"""
+    blocks = []
+    offset = start
+    while True:
+        header = _read_header(buffer, offset)
+        if header is None:
+            break
+        header_size, crc, length = header[0], header[6], header[7]
+        if offset + length > len(buffer):
+            break
+        if verify and zlib.crc32(buffer[offset + header_size:offset + length]) != crc:
+            break
+        blocks.append((offset, length))
+        offset += length
+    return blocks
+
+
+def _index_entry(buffer, offset: int, length: int) -> np.ndarray:
+    block = HandBlock(buffer, offset)
+    return np.array([(offset, length, len(block), block.hands["timestamp"].min(), block.hands["timestamp"].max())],
+                    dtype=INDEX_DTYPE)
+
+
+def list_segments(directory: str, prefix: Optional[str] = None) -> List[str]:
+    """Segment files in a log directory, ordered by writer prefix and segment number"""
+    if not os.path.isdir(directory):
+        return []
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match and (prefix is None or match["prefix"] == prefix):
+            segments.append((match["prefix"], int(match["segment"]), os.path.join(directory, name)))
+    return [path for _, _, path in sorted(segments)]
+
+
+class HandLogWriter:
+    """
+    Appends completed hands to a rotating, append-only binary log
+
+    Hands are buffered and written a block at a time - once block_hands
+    are waiting, flush_interval seconds after the oldest one arrived, or
+    on flush()/close(). A block is written to <prefix>-<segment>.log and
+    then indexed in the matching .idx file (offset, length, hand count,
+    time range); a segment is closed and the next one started once it
+    passes max_segment_bytes.
+
+    Blocks carry a CRC, so reopening the same prefix after a crash drops
+    a torn last block and rebuilds the index before appending. The
+    directory and segment files are only created once the first block is
+    written. Each writing process needs its own prefix. Thread-safe.
+    """
+
+    def __init__(self, directory: str, prefix: str = "hands", block_hands: int = 1024,
+                 max_segment_bytes: int = 64 << 20, flush_interval: Optional[float] = None,
+                 fresh: bool = False, fsync: bool = False):
+        self.directory = directory
+        self.prefix = prefix
+        self.block_hands = block_hands
+        self.max_segment_bytes = max_segment_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.hands_written = 0
+        self.blocks_written = 0
+        self._pending: List[HandRecord] = []
+        self._pending_since = 0.0
+        self._lock = threading.Lock()
+
+        segments = list_segments(directory, prefix)
+        if fresh:
+            for path in segments:
+                os.remove(path)
+                if os.path.exists(path[:-4] + ".idx"):
+                    os.remove(path[:-4] + ".idx")
+            segments = []
+        self.segment = int(SEGMENT_PATTERN.match(os.path.basename(segments[-1]))["segment"]) if segments else 0
+        self._recover()
+
+    def _path(self, extension: str) -> str:
+        return os.path.join(self.directory, f"{self.prefix}-{self.segment:06d}.{extension}")
+
+    def _recover(self):
+        """Truncate a torn last block off the current segment and rebuild its index"""
+        path = self._path("log")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        blocks = _scan_blocks(data, verify=True)
+        end = blocks[-1][0] + blocks[-1][1] if blocks else 0
+        if end != len(data):
+            print(f"Hand log {path}: dropping {len(data) - end} bytes of a partial block")
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        index = np.concatenate([_index_entry(data, offset, length) for offset, length in blocks]) \
+            if blocks else np.zeros(0, dtype=INDEX_DTYPE)
+        with open(self._path("idx"), "wb") as f:
+            f.write(index.tobytes())
+
+    def append(self, record: HandRecord):
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(record)
+            due = self.flush_interval is not None and time.monotonic() - self._pending_since >= self.flush_interval
+            if len(self._pending) >= self.block_hands or due:
+                self._write_block()
+
+    def record_engine(self, engine, session: str, hand_number: int,
+                      decisions: Optional[List[DecisionRecord]] = None):
+        """Append the finished hand held by a PokerEngine"""
+        self.append(HandRecord.from_engine(engine, session, hand_number, decisions=decisions))
+
+    def flush(self):
+        with self._lock:
+            self._write_block()
+
+    def close(self):
+        self.flush()
+
+    def _write_block(self):
+        if not self._pending:
+            return
+        block = encode_block(self._pending)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("log"), "ab") as f:
+            offset = f.tell()
+            f.write(block)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        timestamps = [record.timestamp for record in self._pending]
+        entry = np.array([(offset, len(block), len(self._pending), min(timestamps), max(timestamps))],
+                         dtype=INDEX_DTYPE)
+        with open(self._path("idx"), "ab") as f:
+            f.write(entry.tobytes())
+        self.hands_written += len(self._pending)
+        self.blocks_written += 1
+        self._pending = []
+
+        if offset + len(block) >= self.max_segment_bytes:
+            self.segment += 1
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "prefix": self.prefix,
+            "segment": self.segment,
+            "hands_written": self.hands_written,
+            "blocks_written": self.blocks_written,
+            "pending": len(self._pending)
+        }
+
+
+class HandLogReader:
+    """
+    Memory-mapped reader over every segment in a log directory
+
+    Each segment is mapped read-only and its blocks found from the .idx
+    file (plus any complete blocks written after the index was last
+    updated). blocks() yields HandBlocks whose arrays point into the
+    mapping, for vectorized analytics; iterating the reader yields
+    HandRecords. Blocks are listed when the reader is opened; open a new
+    reader to see hands written since.
+    """
+
+    def __init__(self, directory: str, prefix: Optional[str] = None):
+        self.directory = directory
+        # Segment file names, and (segment, block number within it, index entry) per block
+        self.segments: List[str] = []
+        self._maps: List[mmap.mmap] = []
+        self._blocks: List[Tuple[int, int, np.ndarray]] = []
+        for path in list_segments(directory, prefix):
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            index_path = path[:-4] + ".idx"
+            index = np.fromfile(index_path, dtype=INDEX_DTYPE) if os.path.exists(index_path) \
+                else np.zeros(0, dtype=INDEX_DTYPE)
+            # Drop entries past the end of the data (a truncated log), then pick up unindexed blocks
+            index = index[index["offset"] + index["length"] <= len(mapped)]
+            start = int(index["offset"][-1] + index["length"][-1]) if len(index) else 0
+            extra = [_index_entry(mapped, offset, length) for offset, length in _scan_blocks(mapped, start)]
+            if extra:
+                index = np.concatenate([index] + extra)
+            self.segments.append(os.path.basename(path))
+            self._maps.append(mapped)
+            self._blocks += [(len(self._maps) - 1, number, entry) for number, entry in enumerate(index)]
+
+    def __len__(self) -> int:
+        return sum(int(entry["num_hands"]) for _, _, entry in self._blocks)
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self._blocks)
+
+    def blocks(self, since: Optional[int] = None, last_hands: Optional[int] = None,
+               done: Optional[Dict[str, int]] = None) -> Iterator[HandBlock]:
+        """
+        Blocks in log order; since skips blocks whose hands are all older
+        than that Unix time, last_hands starts at the block holding the
+        last that many hands, and done skips the first done[name] blocks
+        of each named segment (for incremental readers)
+        """
+        selected = self._blocks
+        if last_hands is not None:
+            start, total = len(selected), 0
+            while start > 0 and total < last_hands:
+                start -= 1
+                total += int(selected[start][2]["num_hands"])
+            selected = selected[start:]
+        for segment, number, entry in selected:
+            if since is not None and entry["last_timestamp"] < since:
+                continue
+            if done and number < done.get(self.segments[segment], 0):
+                continue
+            yield HandBlock(self._maps[segment], int(entry["offset"]), self.segments[segment], number)
+
+    def __iter__(self) -> Iterator[HandRecord]:
+        for block in self.blocks():
+            yield from block.records()
+
+    def close(self):
+        # Views into the maps must be gone first; a map still exported stays open until they are
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        self._maps = []
+        self._blocks = []
+
+    def __enter__(self) -> "HandLogReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
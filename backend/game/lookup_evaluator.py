@@ -0,0 +1,129 @@
+import argparse
+import os
+from itertools import combinations_with_replacement
+from math import comb
+from typing import Optional
+import numpy as np
+from .hand_evaluator import HandEvaluator, _POPCOUNT, _RANK_BITS
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "hand_ranks.npy")
+
+# Table layout: flush scores by 13-bit suit mask, then one rank table per hand size
+FLUSH_TABLE_SIZE = 1 << 13
+HAND_SIZES = (5, 6, 7)
+
+# Sorted ranks r_0 <= ... <= r_{k-1} map to the k-combination (r_i + i) of 12 + k
+# elements, whose colex index sum(C(r_i + i, i + 1)) is a perfect hash of the multiset
+RANK_TABLE_SIZES = {k: comb(13 + k - 1, k) for k in HAND_SIZES}
+RANK_TABLE_OFFSETS = {}
+_offset = FLUSH_TABLE_SIZE
+for _k in HAND_SIZES:
+    RANK_TABLE_OFFSETS[_k] = _offset
+    _offset += RANK_TABLE_SIZES[_k]
+TABLE_SIZE = _offset
+
+# _BINOM[n, i] = C(n, i)
+_BINOM = np.array([[comb(n, i) for i in range(8)] for n in range(20)], dtype=np.int64)
+
+
+def _rank_index(sorted_ranks: np.ndarray) -> np.ndarray:
+    """Perfect-hash index of each row of ascending ranks, shape (N, k)"""
+    positions = np.arange(sorted_ranks.shape[1])
+    return _BINOM[sorted_ranks + positions, positions + 1].sum(axis=1)
+
+
+def generate_table() -> np.ndarray:
+    """
+    Score every distinct flush suit mask and rank multiset with the
+    vectorized evaluator, so lookups return exactly the same scores
+    """
+    evaluator = HandEvaluator()
+    table = np.zeros(TABLE_SIZE, dtype=np.int32)
+
+    # Flushes: all cards of one suit, only masks of five to seven ranks can occur
+    masks = np.array([m for m in range(FLUSH_TABLE_SIZE) if 5 <= bin(m).count("1") <= 7])
+    for size in range(5, 8):
+        sized = masks[_POPCOUNT[masks] == size]
+        ranks = np.array([[r for r in range(13) if m & (1 << r)] for m in sized])
+        table[sized] = evaluator.evaluate_batch(ranks * 4)
+
+    # Everything else only depends on the ranks; spreading suits round-robin
+    # over the sorted ranks never gives more than two cards of one suit
+    for k in HAND_SIZES:
+        ranks = np.array([r for r in combinations_with_replacement(range(13), k)
+                          if max(r.count(x) for x in set(r)) <= 4])
+        cards = ranks * 4 + np.arange(k) % 4
+        table[RANK_TABLE_OFFSETS[k] + _rank_index(ranks)] = evaluator.evaluate_batch(cards)
+
+    return table
+
+
+def save_table(table: np.ndarray, path: str = DEFAULT_TABLE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+
+
+class LookupEvaluator(HandEvaluator):
+    """
+    Hand evaluator backed by a precomputed rank table
+
+    A hand is scored with two lookups: the flush table indexed by the rank
+    mask of the flush suit, or the rank table indexed by a perfect hash of
+    the sorted ranks (a flush hand can never also hold quads or a full
+    house). Scores are identical to HandEvaluator. The table is
+    memory-mapped, so every process shares the same pages.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        if os.path.exists(path):
+            self.table = np.load(path, mmap_mode="r")
+        else:
+            print(f"Hand rank table not found at {path}, building it in memory")
+            self.table = generate_table()
+        if self.table.shape != (TABLE_SIZE,):
+            raise ValueError(f"Unexpected hand rank table shape {self.table.shape} in {path}")
+
+    def evaluate_batch(self, cards: np.ndarray) -> np.ndarray:
+        """Score every row of an (N, k) card array, k between 5 and 7"""
+        cards = np.asarray(cards, dtype=np.int64)
+        if cards.ndim == 1:
+            cards = cards[np.newaxis, :]
+        num_cards = cards.shape[1]
+        if num_cards not in RANK_TABLE_OFFSETS:
+            raise ValueError(f"Hands must have 5 to 7 cards, got {num_cards}")
+
+        suits = cards & 3
+        ranks = np.sort(cards >> 2, axis=1)
+        scores = self.table[RANK_TABLE_OFFSETS[num_cards] + _rank_index(ranks)]
+
+        suit_counts = (suits[:, :, np.newaxis] == np.arange(4)).sum(axis=1)
+        flush_rows = np.flatnonzero(suit_counts.max(axis=1) >= 5)
+        if len(flush_rows):
+            flush_cards = cards[flush_rows]
+            flush_suit = suit_counts[flush_rows].argmax(axis=1)
+            in_suit = (flush_cards & 3) == flush_suit[:, np.newaxis]
+            flush_mask = (_RANK_BITS[flush_cards >> 2] * in_suit).sum(axis=1)
+            scores = np.array(scores)
+            scores[flush_rows] = self.table[flush_mask]
+
+        return np.asarray(scores, dtype=np.int32)
+
+
+_lookup_evaluator: Optional[LookupEvaluator] = None
+
+
+def get_lookup_evaluator() -> LookupEvaluator:
+    """Shared evaluator instance for this process"""
+    global _lookup_evaluator
+    if _lookup_evaluator is None:
+        _lookup_evaluator = LookupEvaluator()
+    return _lookup_evaluator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the hand rank lookup table")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+
+    save_table(generate_table(), args.output)
+    print(f"Wrote hand rank table to {args.output}")
@@ -1,16 +1,29 @@
-import random
-from typing import List, Tuple, Dict, Optional
-from deuces import Card as DeucesCard, Deck, Evaluator
+import numpy as np
+from typing import Any, List, Tuple, Dict, Optional, Union
+from deuces import Card as DeucesCard, Deck
 from ..models.game_models import Card, GameState, ActionType, Street, PlayerAction
+from .hand_evaluator import cards_to_array
+from .lookup_evaluator import get_lookup_evaluator
+from .preflop_equity import get_preflop_table
+from .canonical import canonical_key, equity_cache
+from .range_equity import HandRange, RangeEquityEngine
 
 class PokerEngine:
-    def __init__(self):
-        self.evaluator = Evaluator()
+    def __init__(self, seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        self.hand_evaluator = get_lookup_evaluator()
+        # Shuffles the deck and samples flop equity; seed it for reproducible hands
+        self.rng = np.random.default_rng(seed)
+        self.flop_equity_samples = 2000
+        self.preflop_table = get_preflop_table()
+        self.equity_cache = equity_cache
+        self.range_engine = RangeEquityEngine()
         self.reset_game()
     
     def reset_game(self):
         """Reset for a new hand"""
         self.deck = Deck()
+        cards = sorted(self.deck.cards)
+        self.deck.cards = [cards[i] for i in self.rng.permutation(len(cards))]
         print(f"DEBUG: reset_game - new deck created with {len(self.deck.cards)} cards")
         self.user_cards = []
         self.bot_cards = []
@@ -23,6 +36,7 @@ class PokerEngine:
         self.bot_bet_this_street = 0
         self.street = Street.PREFLOP
         self.action_history = []
+        self.action_streets = []  # Street each action in action_history was taken on
         self.hand_over = False
         self.winner = None
     
@@ -51,6 +65,7 @@ class PokerEngine:
         print(f"DEBUG: Processing action - player: {player}, action: {action_type}, amount: {amount}")
         action = PlayerAction(action_type=action_type, amount=amount, player=player)
         self.action_history.append(action)
+        self.action_streets.append(self.street)
         
         if player == "user":
             self._process_user_action(action_type, amount)
@@ -112,6 +127,12 @@ class PokerEngine:
             self.pot += bet_amount
             self.bot_bet_this_street += bet_amount
             self.current_bet = self.bot_bet_this_street
+        elif action_type == ActionType.ALL_IN:
+            all_in_amount = self.bot_stack
+            self.bot_stack = 0
+            self.pot += all_in_amount
+            self.bot_bet_this_street += all_in_amount
+            self.current_bet = self.bot_bet_this_street
     
     def _is_betting_round_complete(self) -> bool:
         """Check if current betting round is complete"""
@@ -119,8 +140,13 @@ class PokerEngine:
             return True
         
         # Both players have acted and bets are equal
-        return (self.user_bet_this_street == self.bot_bet_this_street == self.current_bet or
-                self.user_stack == 0 or self.bot_stack == 0)
+        if self.user_bet_this_street == self.bot_bet_this_street == self.current_bet:
+            return True
+        
+        # An all-in is complete once the other player has matched it (or is all-in too)
+        if self.user_stack == 0 and (self.bot_bet_this_street >= self.user_bet_this_street or self.bot_stack == 0):
+            return True
+        return self.bot_stack == 0 and (self.user_bet_this_street >= self.bot_bet_this_street or self.user_stack == 0)
     
     def _advance_street(self):
         """Advance to next street and deal community cards"""
@@ -171,16 +197,12 @@ class PokerEngine:
         if len(self.community_cards) < 5:
             return
         
-        user_deuces_cards = [self._card_to_deuces(card) for card in self.user_cards]
-        bot_deuces_cards = [self._card_to_deuces(card) for card in self.bot_cards]
-        board_deuces = [self._card_to_deuces(card) for card in self.community_cards]
+        user_score = self.hand_evaluator.evaluate_cards(self.user_cards, self.community_cards)
+        bot_score = self.hand_evaluator.evaluate_cards(self.bot_cards, self.community_cards)
         
-        user_score = self.evaluator.evaluate(board_deuces, user_deuces_cards)
-        bot_score = self.evaluator.evaluate(board_deuces, bot_deuces_cards)
-        
-        if user_score < bot_score:  # Lower score is better in deuces
+        if user_score > bot_score:  # Higher score is better
             self.winner = "user"
-        elif bot_score < user_score:
+        elif bot_score > user_score:
             self.winner = "bot"
         else:
             self.winner = "tie"
@@ -208,39 +230,73 @@ class PokerEngine:
             return "bot"
     
     def get_hand_equity(self, player_cards: List[Card], community_cards: List[Card], 
-                       opponent_range: Optional[List[List[Card]]] = None) -> float:
-        """Calculate hand equity using deuces evaluator"""
-        if len(community_cards) == 5:
-            # River - exact calculation
-            user_deuces = [self._card_to_deuces(card) for card in player_cards]
-            board_deuces = [self._card_to_deuces(card) for card in community_cards]
-            
-            # If we don't know opponent cards, assume random
-            if opponent_range is None:
-                wins = 0
-                total = 0
-                remaining_deck = self._get_remaining_cards(player_cards + community_cards)
-                
-                # Sample opponent hands
-                for _ in range(100):  # Sample for speed
-                    random.shuffle(remaining_deck)
-                    opp_cards = remaining_deck[:2]
-                    opp_deuces = [self._card_to_deuces(card) for card in opp_cards]
-                    
-                    user_score = self.evaluator.evaluate(board_deuces, user_deuces)
-                    opp_score = self.evaluator.evaluate(board_deuces, opp_deuces)
-                    
-                    if user_score < opp_score:
-                        wins += 1
-                    total += 1
-                
-                return wins / total if total > 0 else 0.5
-        
-        # For earlier streets, use simplified equity calculation
+                       opponent_range: Optional[Union[List[List[Card]], HandRange]] = None) -> float:
+        """
+        Calculate hand equity against a random opponent hand, or against
+        opponent_range (explicit combos or a weighted HandRange) if given
+        
+        Turn and river equity is exact: every opponent holding (and every
+        river card on the turn) is enumerated, with ties counted as half a win.
+        The flop samples runouts with the vectorized evaluator.
+        """
+        if opponent_range is not None:
+            if not isinstance(opponent_range, HandRange):
+                opponent_range = HandRange.from_combos(opponent_range)
+            return self.range_engine.equity(player_cards, community_cards, opponent_range)
+        
+        if len(community_cards) >= 3:
+            # Suit-isomorphic spots share one cache entry
+            key = canonical_key(player_cards, community_cards)
+            return self.equity_cache.get_or_compute(
+                key, lambda: self._postflop_equity(player_cards, community_cards)
+            )
+        
+        # Preflop, look up the precomputed equity table
         return self._estimate_preflop_equity(player_cards)
     
+    def prime_equities(self, spots: List[Tuple[List[Card], List[Card]]]) -> int:
+        """
+        Fill the equity cache for many (player cards, board) spots in one vectorized pass
+        
+        Preflop spots (table lookups), spots already cached and repeats of a
+        canonical key are skipped. Returns how many equities were computed.
+        """
+        pending = {}
+        for player_cards, community_cards in spots:
+            if len(community_cards) < 3:
+                continue
+            key = canonical_key(player_cards, community_cards)
+            if key not in pending and self.equity_cache.get(key) is None:
+                pending[key] = (cards_to_array(player_cards), cards_to_array(community_cards))
+        
+        if pending:
+            equities = self.hand_evaluator.equity_batch(list(pending.values()), self.flop_equity_samples, self.rng)
+            for key, equity in zip(pending, equities):
+                self.equity_cache.put(key, float(equity))
+        return len(pending)
+    
+    def _postflop_equity(self, player_cards: List[Card], community_cards: List[Card]) -> float:
+        """Exact turn/river equity, sampled flop equity"""
+        player = cards_to_array(player_cards)
+        board = cards_to_array(community_cards)
+        
+        if len(community_cards) >= 4:
+            # Turn/river - exact enumeration
+            outcomes = self.hand_evaluator.enumerate_outcomes(player, board)
+        else:
+            # Flop - sampled runouts
+            outcomes = self.hand_evaluator.simulate_outcomes(player, board, self.flop_equity_samples, self.rng)
+        
+        return self.hand_evaluator.equity_from_outcomes(outcomes)
+    
     def _estimate_preflop_equity(self, cards: List[Card]) -> float:
-        """Simplified preflop equity estimation"""
+        """Preflop all-in equity against a random hand from the precomputed table"""
+        if self.preflop_table is not None:
+            return self.preflop_table.equity_vs_random(cards)
+        return self._heuristic_preflop_equity(cards)
+    
+    def _heuristic_preflop_equity(self, cards: List[Card]) -> float:
+        """Simplified preflop equity estimation (used if the table hasn't been generated)"""
         # Basic hand strength heuristic
         ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
         rank_values = {rank: i for i, rank in enumerate(ranks)}
@@ -262,20 +318,65 @@ class PokerEngine:
         gap = abs(card1_val - card2_val)
         return 0.35 + (high_card / 35) - (gap / 50)
     
-    def _get_remaining_cards(self, used_cards: List[Card]) -> List[Card]:
-        """Get remaining cards in deck"""
-        all_cards = []
-        for suit in ['h', 'd', 'c', 's']:
-            for rank in ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']:
-                card = Card(rank=rank, suit=suit)
-                if card not in used_cards:
-                    all_cards.append(card)
-        return all_cards
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Compact, JSON-serializable hand state: deck order, cards, pot,
+        stacks, bets, street and action history
+        
+        Cards are packed into strings of two-character codes ("AhKd...").
+        """
+        return {
+            "deck": "".join(DeucesCard.int_to_str(card) for card in self.deck.cards),
+            "user_cards": self._cards_to_str(self.user_cards),
+            "bot_cards": self._cards_to_str(self.bot_cards),
+            "board": self._cards_to_str(self.community_cards),
+            "pot": self.pot,
+            "stacks": [self.user_stack, self.bot_stack],
+            "bets": [self.user_bet_this_street, self.bot_bet_this_street],
+            "current_bet": self.current_bet,
+            "street": self.street.value,
+            "history": [
+                [a.player, a.action_type.value, a.amount, street.value]
+                for a, street in zip(self.action_history, self.action_streets)
+            ],
+            "hand_over": self.hand_over,
+            "winner": self.winner
+        }
+    
+    def restore_snapshot(self, snapshot: Dict[str, Any]):
+        """Replace the hand state with one captured by to_snapshot"""
+        self.deck = Deck()
+        self.deck.cards = [self._card_to_deuces(card) for card in self._cards_from_str(snapshot["deck"])]
+        self.user_cards = self._cards_from_str(snapshot["user_cards"])
+        self.bot_cards = self._cards_from_str(snapshot["bot_cards"])
+        self.community_cards = self._cards_from_str(snapshot["board"])
+        self.pot = snapshot["pot"]
+        self.user_stack, self.bot_stack = snapshot["stacks"]
+        self.user_bet_this_street, self.bot_bet_this_street = snapshot["bets"]
+        self.current_bet = snapshot["current_bet"]
+        self.street = Street(snapshot["street"])
+        self.action_history = [
+            PlayerAction(player=entry[0], action_type=ActionType(entry[1]), amount=entry[2])
+            for entry in snapshot["history"]
+        ]
+        # Snapshots from before streets were recorded only hold the current street
+        self.action_streets = [Street(entry[3]) if len(entry) > 3 else self.street for entry in snapshot["history"]]
+        self.hand_over = snapshot["hand_over"]
+        self.winner = snapshot["winner"]
+    
+    @staticmethod
+    def _cards_to_str(cards: List[Card]) -> str:
+        return "".join(card.rank + card.suit for card in cards)
+    
+    @staticmethod
+    def _cards_from_str(packed: str) -> List[Card]:
+        return [Card(rank=packed[i], suit=packed[i + 1]) for i in range(0, len(packed), 2)]
     
     def _deuces_to_card(self, deuces_card: int) -> Card:
         """Convert deuces card to our Card model"""
-        rank_map = {2: '2', 3: '3', 4: '4', 5: '5', 6: '6', 7: '7', 8: '8', 
-                   9: '9', 10: 'T', 11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
+        # deuces rank ints run 0 (deuce) to 12 (ace)
+        rank_map = {0: '2', 1: '3', 2: '4', 3: '5', 4: '6', 5: '7', 6: '8', 
+                   7: '9', 8: 'T', 9: 'J', 10: 'Q', 11: 'K', 12: 'A'}
         suit_map = {1: 's', 2: 'h', 4: 'd', 8: 'c'}
         
         print(f"DEBUG: Converting deuces card: {deuces_card}")
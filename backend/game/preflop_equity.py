@@ -0,0 +1,164 @@
+import argparse
+import os
+import time
+import numpy as np
+from typing import List, Optional, Tuple
+from ..models.game_models import Card
+from .hand_evaluator import HandEvaluator, RANKS, card_to_int
+
+NUM_CLASSES = 169
+VS_RANDOM = NUM_CLASSES  # Column holding equity against a uniformly random hand
+
+# Equities are stored as uint16 fractions of this scale
+EQUITY_SCALE = 65535
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "preflop_equity.npy")
+
+
+def hand_class_index(card1: int, card2: int) -> int:
+    """
+    Map two hole card integers to their starting-hand class (0-168)
+
+    Classes form a 13x13 grid indexed by rank: pairs on the diagonal,
+    suited hands at [high, low] and offsuit hands at [low, high].
+    """
+    high, low = max(card1 >> 2, card2 >> 2), min(card1 >> 2, card2 >> 2)
+    if high == low or (card1 & 3) == (card2 & 3):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def hand_class_name(index: int) -> str:
+    """Readable class name, e.g. 'AKs', 'T9o', '77'"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANKS[row] * 2
+    if row > col:
+        return f"{RANKS[row]}{RANKS[col]}s"
+    return f"{RANKS[col]}{RANKS[row]}o"
+
+
+def class_combos() -> List[np.ndarray]:
+    """All concrete two-card combos of each class (6 pairs, 4 suited, 12 offsuit)"""
+    combos: List[List[Tuple[int, int]]] = [[] for _ in range(NUM_CLASSES)]
+    for card1 in range(52):
+        for card2 in range(card1 + 1, 52):
+            combos[hand_class_index(card1, card2)].append((card1, card2))
+    return [np.array(c, dtype=np.int64) for c in combos]
+
+
+def _valid_pairings(combos_a: np.ndarray, combos_b: np.ndarray) -> np.ndarray:
+    """Every (combo_a, combo_b) pairing that shares no card, shape (P, 4)"""
+    a = np.repeat(combos_a, len(combos_b), axis=0)
+    b = np.tile(combos_b, (len(combos_a), 1))
+    disjoint = (a[:, :1] != b).all(axis=1) & (a[:, 1:] != b).all(axis=1)
+    return np.concatenate([a[disjoint], b[disjoint]], axis=1)
+
+
+def generate_table(trials: int = 20000, seed: int = 0, chunk_size: int = 16,
+                   verbose: bool = True) -> np.ndarray:
+    """
+    Compute the 169x170 preflop all-in equity matrix
+
+    Each class-vs-class cell averages over every card-disjoint pairing of
+    the two classes' combos, with boards sampled from the remaining 48
+    cards (ties count as half). The vs-random column is then derived
+    exactly from the matrix by weighting each opponent class by its number
+    of valid pairings.
+    """
+    evaluator = HandEvaluator()
+    rng = np.random.default_rng(seed)
+    combos = class_combos()
+
+    equity = np.full((NUM_CLASSES, NUM_CLASSES), 0.5)
+    weights = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    start = time.time()
+
+    for a in range(NUM_CLASSES):
+        for b in range(NUM_CLASSES):
+            weights[a, b] = len(_valid_pairings(combos[a], combos[b]))
+
+        # Mirror matchups are symmetric, so only simulate b > a
+        if a == NUM_CLASSES - 1:
+            break
+        for chunk_start in range(a + 1, NUM_CLASSES, chunk_size):
+            opponents = list(range(chunk_start, min(chunk_start + chunk_size, NUM_CLASSES)))
+            pairings = [_valid_pairings(combos[a], combos[b]) for b in opponents]
+
+            # Sample a pairing uniformly for each trial of each matchup
+            holes = np.concatenate([p[rng.integers(0, len(p), trials)] for p in pairings])
+
+            # Board: five distinct cards from the 48 not held by either player
+            keys = rng.random((len(holes), 52))
+            np.put_along_axis(keys, holes, 2.0, axis=1)
+            boards = np.argpartition(keys, 5, axis=1)[:, :5]
+
+            hero_scores = evaluator.evaluate_batch(np.concatenate([holes[:, :2], boards], axis=1))
+            villain_scores = evaluator.evaluate_batch(np.concatenate([holes[:, 2:], boards], axis=1))
+            results = (hero_scores > villain_scores) + 0.5 * (hero_scores == villain_scores)
+
+            matchup_equity = results.reshape(len(opponents), trials).mean(axis=1)
+            equity[a, opponents] = matchup_equity
+            equity[opponents, a] = 1.0 - matchup_equity
+
+        if verbose:
+            print(f"{hand_class_name(a):>4}: {NUM_CLASSES - a - 1} matchups ({time.time() - start:.0f}s elapsed)")
+
+    vs_random = (equity * weights).sum(axis=1) / weights.sum(axis=1)
+
+    table = np.empty((NUM_CLASSES, NUM_CLASSES + 1))
+    table[:, :NUM_CLASSES] = equity
+    table[:, VS_RANDOM] = vs_random
+    return table
+
+
+def save_table(table: np.ndarray, path: str = DEFAULT_TABLE_PATH):
+    """Quantize equities to uint16 and write them as a .npy file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, np.round(table * EQUITY_SCALE).astype(np.uint16))
+
+
+class PreflopEquityTable:
+    """Memory-mapped 169x170 preflop equity lookup"""
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        self.path = path
+        self.table = np.load(path, mmap_mode="r")
+        if self.table.shape != (NUM_CLASSES, NUM_CLASSES + 1):
+            raise ValueError(f"Unexpected preflop equity table shape {self.table.shape} in {path}")
+
+    def equity_vs_random(self, cards: List[Card]) -> float:
+        """All-in equity of a starting hand against a random hand"""
+        return self._lookup(self._class_of(cards), VS_RANDOM)
+
+    def equity_vs_class(self, cards: List[Card], opponent_class: int) -> float:
+        """All-in equity of a starting hand against an opponent hand class"""
+        return self._lookup(self._class_of(cards), opponent_class)
+
+    def _class_of(self, cards: List[Card]) -> int:
+        return hand_class_index(card_to_int(cards[0]), card_to_int(cards[1]))
+
+    def _lookup(self, row: int, col: int) -> float:
+        return int(self.table[row, col]) / EQUITY_SCALE
+
+
+_preflop_table: Optional[PreflopEquityTable] = None
+
+
+def get_preflop_table() -> Optional[PreflopEquityTable]:
+    """Shared table instance, or None if the table file hasn't been generated"""
+    global _preflop_table
+    if _preflop_table is None and os.path.exists(DEFAULT_TABLE_PATH):
+        _preflop_table = PreflopEquityTable(DEFAULT_TABLE_PATH)
+    return _preflop_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the preflop equity table")
+    parser.add_argument("--trials", type=int, default=20000, help="Sampled boards per matchup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+
+    save_table(generate_table(trials=args.trials, seed=args.seed), args.output)
+    print(f"Wrote preflop equity table to {args.output}")
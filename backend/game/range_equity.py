@@ -0,0 +1,178 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from ..models.game_models import Card
+from .hand_evaluator import card_to_int, cards_to_array
+from .lookup_evaluator import get_lookup_evaluator
+from .preflop_equity import NUM_CLASSES, VS_RANDOM, get_preflop_table, hand_class_index
+
+# Every two-card holding as (low card, high card) integers, 1326 in total
+COMBOS = np.array([(a, b) for a in range(52) for b in range(a + 1, 52)], dtype=np.int64)
+NUM_COMBOS = len(COMBOS)
+
+# Starting-hand class (0-168) of each combo
+COMBO_CLASSES = np.array([hand_class_index(a, b) for a, b in COMBOS], dtype=np.int64)
+
+_COMBO_INDEX = np.full((52, 52), -1, dtype=np.int64)
+_COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(NUM_COMBOS)
+_COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(NUM_COMBOS)
+
+
+def combo_index(card1: int, card2: int) -> int:
+    """Index (0-1325) of a two-card holding"""
+    return int(_COMBO_INDEX[card1, card2])
+
+
+def class_strength_tiers(fractions: Sequence[float]) -> Optional[np.ndarray]:
+    """
+    Split the 169 starting-hand classes into tiers by preflop equity vs a
+    random hand, weakest tier first, each holding roughly the given
+    fraction of all combos. None if the preflop table isn't available.
+    """
+    table = get_preflop_table()
+    if table is None:
+        return None
+
+    strength = np.asarray(table.table[:, VS_RANDOM], dtype=np.float64)
+    combos_per_class = np.bincount(COMBO_CLASSES, minlength=NUM_CLASSES)
+
+    order = np.argsort(strength, kind="stable")
+    # Fraction of combos at or below each class, weakest first
+    cumulative = np.cumsum(combos_per_class[order]) / NUM_COMBOS
+    boundaries = np.cumsum(fractions)[:-1]
+
+    tiers = np.empty(NUM_CLASSES, dtype=np.int64)
+    tiers[order] = np.searchsorted(boundaries, cumulative - 1e-9)
+    return tiers
+
+
+class HandRange:
+    """Weighted distribution over all 1326 hole-card combos"""
+
+    def __init__(self, weights: np.ndarray):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (NUM_COMBOS,):
+            raise ValueError(f"Range weights must have shape ({NUM_COMBOS},), got {weights.shape}")
+        self.weights = weights
+
+    @classmethod
+    def uniform(cls) -> "HandRange":
+        """Every combo equally likely"""
+        return cls(np.ones(NUM_COMBOS))
+
+    @classmethod
+    def from_combos(cls, combos: List[List[Card]], weights: Optional[Sequence[float]] = None) -> "HandRange":
+        """Range from explicit hole-card combos, optionally weighted"""
+        range_weights = np.zeros(NUM_COMBOS)
+        for i, combo in enumerate(combos):
+            index = combo_index(card_to_int(combo[0]), card_to_int(combo[1]))
+            range_weights[index] += 1.0 if weights is None else weights[i]
+        return cls(range_weights)
+
+    @classmethod
+    def from_class_weights(cls, class_weights: np.ndarray) -> "HandRange":
+        """Range from one weight per starting-hand class (169), applied to each of its combos"""
+        class_weights = np.asarray(class_weights, dtype=np.float64)
+        if class_weights.shape != (NUM_CLASSES,):
+            raise ValueError(f"Class weights must have shape ({NUM_CLASSES},), got {class_weights.shape}")
+        return cls(class_weights[COMBO_CLASSES])
+
+    def without_cards(self, dead_cards: Sequence[int]) -> np.ndarray:
+        """Weights with every combo that uses a dead card removed"""
+        dead = np.zeros(52, dtype=bool)
+        dead[np.asarray(dead_cards, dtype=np.int64)] = True
+        return np.where(dead[COMBOS].any(axis=1), 0.0, self.weights)
+
+    def num_combos(self) -> int:
+        """Number of combos with non-zero weight"""
+        return int((self.weights > 0).sum())
+
+
+class RangeEquityEngine:
+    """
+    Equity of a known hand against a weighted opponent range
+
+    Combos that share a card with our hand or the board are removed before
+    weighting. River equity is always exact; earlier streets sample
+    (combo, runout) pairs with the combo drawn by weight, unless exact
+    enumeration is requested on the turn.
+    """
+
+    def __init__(self, num_samples: int = 2000, seed: Optional[int] = None):
+        self.evaluator = get_lookup_evaluator()
+        self.num_samples = num_samples
+        self.rng = np.random.default_rng(seed)
+
+    def equity(self, player_cards: List[Card], community_cards: List[Card],
+               opponent_range: HandRange, exact: bool = False) -> float:
+        """Equity (ties count half) of our hand against the range"""
+        return self.evaluator.equity_from_outcomes(
+            self.outcomes(cards_to_array(player_cards), cards_to_array(community_cards), opponent_range, exact)
+        )
+
+    def outcomes(self, player: np.ndarray, board: np.ndarray, opponent_range: HandRange,
+                 exact: bool = False) -> Dict[str, float]:
+        """Weighted win/tie/loss totals against the range"""
+        weights = opponent_range.without_cards(np.concatenate([player, board]))
+        if weights.sum() <= 0:
+            raise ValueError("Opponent range is empty after card removal")
+
+        if len(board) == 5:
+            return self._river_outcomes(player, board, weights)
+        if len(board) == 4 and exact:
+            return self._turn_outcomes(player, board, weights)
+        return self._sampled_outcomes(player, board, weights)
+
+    def _river_outcomes(self, player: np.ndarray, board: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+        """Score every live combo once against our single river hand"""
+        live = np.flatnonzero(weights)
+        player_score = self.evaluator.evaluate(np.concatenate([player, board]))
+        opponent_scores = self.evaluator.evaluate_batch(
+            np.concatenate([COMBOS[live], np.broadcast_to(board, (len(live), 5))], axis=1)
+        )
+        return self._weighted_totals(player_score, opponent_scores, weights[live])
+
+    def _turn_outcomes(self, player: np.ndarray, board: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+        """Enumerate every river card against every live combo it doesn't block"""
+        used = np.concatenate([player, board])
+        rivers = np.setdiff1d(np.arange(52), used)
+        live = np.flatnonzero(weights)
+
+        boards = np.concatenate([np.broadcast_to(board, (len(rivers), 4)), rivers[:, np.newaxis]], axis=1)
+        player_scores = self.evaluator.evaluate_batch(
+            np.concatenate([np.broadcast_to(player, (len(rivers), 2)), boards], axis=1)
+        )
+
+        combos = COMBOS[live]
+        valid = (combos[np.newaxis, :, 0] != rivers[:, np.newaxis]) & (combos[np.newaxis, :, 1] != rivers[:, np.newaxis])
+        river_index, live_index = np.nonzero(valid)
+        opponent_scores = self.evaluator.evaluate_batch(
+            np.concatenate([combos[live_index], boards[river_index]], axis=1)
+        )
+        return self._weighted_totals(player_scores[river_index], opponent_scores, weights[live][live_index])
+
+    def _sampled_outcomes(self, player: np.ndarray, board: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+        """Sample combos by weight, then a runout from the cards left over"""
+        n = self.num_samples
+        combos = COMBOS[self.rng.choice(NUM_COMBOS, size=n, p=weights / weights.sum())]
+
+        # Runout cards must avoid our hand, the board and the sampled combo
+        keys = self.rng.random((n, 52))
+        keys[:, np.concatenate([player, board]).astype(np.int64)] = 2.0
+        np.put_along_axis(keys, combos, 2.0, axis=1)
+        cards_needed = 5 - len(board)
+        runouts = np.argpartition(keys, cards_needed, axis=1)[:, :cards_needed]
+
+        boards = np.concatenate([np.broadcast_to(board, (n, len(board))), runouts], axis=1)
+        player_scores = self.evaluator.evaluate_batch(
+            np.concatenate([np.broadcast_to(player, (n, 2)), boards], axis=1)
+        )
+        opponent_scores = self.evaluator.evaluate_batch(np.concatenate([combos, boards], axis=1))
+        return self._weighted_totals(player_scores, opponent_scores, np.ones(n))
+
+    @staticmethod
+    def _weighted_totals(player_scores, opponent_scores, weights: np.ndarray) -> Dict[str, float]:
+        return {
+            "wins": float(weights[player_scores > opponent_scores].sum()),
+            "ties": float(weights[player_scores == opponent_scores].sum()),
+            "losses": float(weights[player_scores < opponent_scores].sum())
+        }
@@ -0,0 +1,182 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from ..utils.resp import RespClient
+
+
+class MemorySessionBackend:
+    """
+    Session snapshots kept in this process's memory
+
+    Not shared between workers, so a restart loses every session and
+    multiple workers need sticky routing.
+
+    Like every backend, save() is a compare-and-set on the session
+    version: version N is only written over version N - 1 (version 1 over
+    nothing), and save() returns False when another writer got there first.
+    """
+
+    def __init__(self):
+        self.name = "memory"
+        self.shared = False
+        self._data: Dict[str, Tuple[bytes, int, float]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._live_entry(session_id)
+            return entry[0] if entry is not None else None
+
+    def save(self, session_id: str, data: bytes, version: int, ttl: float) -> bool:
+        with self._lock:
+            entry = self._live_entry(session_id)
+            if (entry[1] if entry is not None else 0) != version - 1:
+                return False
+            self._data[session_id] = (data, version, time.time() + ttl)
+            return True
+
+    def _live_entry(self, session_id: str) -> Optional[Tuple[bytes, int, float]]:
+        entry = self._data.get(session_id)
+        if entry is not None and time.time() >= entry[2]:
+            del self._data[session_id]
+            return None
+        return entry
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [session_id for session_id, (_, _, expires_at) in self._data.items() if now >= expires_at]
+            for session_id in expired:
+                del self._data[session_id]
+        return len(expired)
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionBackend:
+    """
+    Session snapshots in a SQLite database in WAL mode
+
+    Every worker process on the host opens the same file; WAL lets readers
+    proceed while one worker writes.
+    """
+
+    def __init__(self, path: str = "sessions.db"):
+        self.name = "sqlite"
+        self.shared = True
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, version INTEGER NOT NULL DEFAULT 0, "
+            "expires_at REAL NOT NULL)"
+        )
+        # Databases from before the version column
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def save(self, session_id: str, data: bytes, version: int, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if version > 1:
+                cursor = self._conn.execute(
+                    "UPDATE sessions SET data = ?, version = ?, expires_at = ? "
+                    "WHERE session_id = ? AND version = ? AND expires_at > ?",
+                    (data, version, now + ttl, session_id, version - 1, now)
+                )
+            else:
+                # A new session may only replace an expired row
+                cursor = self._conn.execute(
+                    "INSERT INTO sessions (session_id, data, version, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, version = excluded.version, "
+                    "expires_at = excluded.expires_at WHERE sessions.expires_at <= ?",
+                    (session_id, data, version, now + ttl, now)
+                )
+            return cursor.rowcount == 1
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionBackend:
+    """
+    Session snapshots in a Redis-protocol server, expired by the server itself
+
+    save() WATCHes the key, checks the stored snapshot's version and writes
+    in a MULTI/EXEC transaction, which the server aborts if another client
+    wrote the key in between.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, prefix: str = "poker:session:"):
+        self.name = "redis"
+        self.shared = True
+        self.prefix = prefix
+        self.client = RespClient(host, port, db)
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        return self.client.execute("GET", self.prefix + session_id)
+
+    def save(self, session_id: str, data: bytes, version: int, ttl: float) -> bool:
+        key = self.prefix + session_id
+        stored_version = lambda stored: json.loads(stored)["version"] if stored is not None else 0
+        replies = self.client.check_and_execute(
+            key, lambda stored: stored_version(stored) == version - 1,
+            ("SET", key, data, "PX", max(1, math.ceil(ttl * 1000)))
+        )
+        return replies is not None
+
+    def delete(self, session_id: str):
+        self.client.execute("DEL", self.prefix + session_id)
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def close(self):
+        self.client.close()
+
+
+def create_session_backend(url: str = "memory://"):
+    """
+    Backend from a URL: memory://, sqlite:///path/to/sessions.db or
+    redis://host:port/db
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemorySessionBackend()
+    if parsed.scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteSessionBackend(parsed.path[1:] or "sessions.db")
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisSessionBackend(parsed.hostname or "localhost", parsed.port or 6379, db)
+    raise ValueError(f"Unknown session backend {url!r}")
@@ -0,0 +1,380 @@
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from ..models.game_models import Card
+from .hand_history import DecisionRecord
+from .poker_engine import PokerEngine
+from .session_backends import MemorySessionBackend
+from ..utils.state_delta import StateTracker
+
+# Engine attributes that point at process-wide objects, not per-session state
+SHARED_ENGINE_ATTRIBUTES = ("hand_evaluator", "preflop_table", "equity_cache", "range_engine")
+
+# Versions of its state a session keeps for delta responses
+MAX_SENT_STATES = 8
+
+
+class SessionConflictError(Exception):
+    """Raised when another worker saved a session first; the local copy has been reloaded"""
+
+
+def _deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by obj and everything it references"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif isinstance(obj, BaseModel):
+        size += _deep_sizeof(obj.__dict__, seen)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
+
+
+class GameSession:
+    """
+    One player's game: its own engine state plus a lock serializing actions
+
+    The engine only holds per-hand state (deck, cards, pot, stacks); the
+    evaluator, preflop table and equity cache behind it are shared,
+    read-only process-wide objects.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.poker_engine = PokerEngine()
+        self.bot_cards: List[Card] = []
+        self.hand_count = 0
+        # Overlays shown in the current hand, by the index the user's action will get
+        self.decisions: Dict[int, DecisionRecord] = {}
+        self.lock = asyncio.Lock()
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.size_bytes = 0
+        # Bumped on every save; the backend only accepts a save over the previous
+        # version, so a stale copy in another worker can't overwrite newer state
+        self.version = 0
+        # What delta-mode clients were sent at recent versions, in this worker only
+        self.sent_states: "OrderedDict[int, StateTracker]" = OrderedDict()
+
+    def to_bytes(self) -> bytes:
+        """Compact JSON snapshot of the session for a session backend"""
+        return json.dumps({
+            "id": self.session_id,
+            "hand_count": self.hand_count,
+            "created_at": self.created_at,
+            "version": self.version,
+            "decisions": [decision.to_list() for decision in self.decisions.values()],
+            "engine": self.poker_engine.to_snapshot()
+        }, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "GameSession":
+        session = cls(snapshot["id"])
+        session.restore(snapshot)
+        return session
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Load a snapshot into this session, keeping its lock"""
+        self.poker_engine.restore_snapshot(snapshot["engine"])
+        self.bot_cards = self.poker_engine.bot_cards
+        self.hand_count = snapshot["hand_count"]
+        self.created_at = snapshot["created_at"]
+        self.version = snapshot["version"]
+        self.decisions = {
+            decision.action_index: decision
+            for decision in map(DecisionRecord.from_list, snapshot.get("decisions", []))
+        }
+
+    def remember_state(self, version: int, tracker: StateTracker):
+        """Keep the state a client was sent at version, as the base for its next delta"""
+        self.sent_states[version] = tracker
+        self.sent_states.move_to_end(version)
+        while len(self.sent_states) > MAX_SENT_STATES:
+            self.sent_states.popitem(last=False)
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def estimate_bytes(self) -> int:
+        """Bytes of per-session state, excluding the shared engine components"""
+        engine_state = {
+            name: value for name, value in vars(self.poker_engine).items()
+            if name not in SHARED_ENGINE_ATTRIBUTES
+        }
+        return sys.getsizeof(self) + _deep_sizeof(engine_state) + _deep_sizeof(self.bot_cards)
+
+
+class SessionStore:
+    """
+    Registry of game sessions keyed by session id
+
+    Every save writes a snapshot to the session backend, conditional on the
+    backend still holding the version the session had. With a shared
+    backend (SQLite, Redis) any worker can pick up a session it hasn't
+    seen, or one changed by another worker, so no sticky routing is
+    needed; the local sessions are then just a cache of live engines.
+
+    Local sessions are kept in least-recently-used order and bounded three ways:
+    sessions idle for longer than idle_ttl seconds are dropped by sweep(),
+    creating a session beyond max_sessions evicts the least recently used
+    one, and so does going over max_bytes of estimated session state.
+    Sessions in the middle of an action (lock held) are never evicted, and
+    evicting from a shared backend's cache keeps the stored snapshot.
+
+    On the event loop, use the async create/get/save/delete variants: with
+    a shared backend they wait for it in a thread instead of blocking the
+    loop. Only the backend call leaves the loop; the local cache and the
+    session itself are still only touched from it.
+    """
+
+    def __init__(self, idle_ttl: float = 1800.0, max_sessions: int = 10000,
+                 max_bytes: Optional[int] = None, backend=None):
+        self.backend = backend or MemorySessionBackend()
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.created = 0
+        self.deleted = 0
+        self.loaded = 0
+        self.conflicts = 0
+        self.evictions = {"ttl": 0, "lru": 0, "memory": 0}
+        self.resident_bytes = 0
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def create(self) -> GameSession:
+        """Register a new session with a fresh engine, evicting to stay within bounds"""
+        session = GameSession(str(uuid.uuid4()))
+        self.created += 1
+        self._add(session)
+        self.save(session)
+        return session
+
+    async def create_async(self) -> GameSession:
+        """create(), waiting for a shared backend off the event loop"""
+        session = GameSession(str(uuid.uuid4()))
+        self.created += 1
+        self._add(session)
+        await self.save_async(session)
+        return session
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """Look up a session, marking it most recently used"""
+        session = self._sessions.get(session_id)
+        if session is not None and not self.backend.shared:
+            return self._cached(session)
+        # Another worker may have created, changed, expired or deleted it
+        return self._loaded(session_id, self.backend.load(session_id))
+
+    async def get_async(self, session_id: str) -> Optional[GameSession]:
+        """get(), waiting for a shared backend off the event loop"""
+        session = self._sessions.get(session_id)
+        if session is not None and not self.backend.shared:
+            return self._cached(session)
+        return self._loaded(session_id, await self._call(self.backend.load, session_id))
+
+    def save(self, session: GameSession):
+        """
+        Write a session's snapshot to the backend after it changed
+
+        If another worker saved the session since this copy was loaded, its
+        version wins: this copy's change is discarded, the session is reloaded
+        from the backend (or dropped, if it was deleted) and
+        SessionConflictError is raised.
+        """
+        session.version += 1
+        saved = self.backend.save(session.session_id, session.to_bytes(), session.version, self.idle_ttl)
+        if not saved:
+            self._conflict(session, self.backend.load(session.session_id))
+        self.update_size(session)
+
+    async def save_async(self, session: GameSession):
+        """save(), waiting for a shared backend off the event loop; call with session.lock held"""
+        session.version += 1
+        saved = await self._call(self.backend.save, session.session_id, session.to_bytes(),
+                                 session.version, self.idle_ttl)
+        if not saved:
+            self._conflict(session, await self._call(self.backend.load, session.session_id))
+        self.update_size(session)
+
+    async def _call(self, fn, *args) -> Any:
+        """Run a backend call, in a thread if the backend is shared (and so may block)"""
+        if self.backend.shared:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _cached(self, session: GameSession) -> Optional[GameSession]:
+        """A process-local backend's session, unless it has expired"""
+        if self._is_expired(session, time.monotonic()):
+            self._remove(session.session_id, "ttl")
+            return None
+        return self._touched(session)
+
+    def _loaded(self, session_id: str, data: Optional[bytes]) -> Optional[GameSession]:
+        """The session as the backend returned it, loaded or brought up to date locally"""
+        session = self._sessions.get(session_id)
+        if data is None:
+            if session is not None:
+                self._remove(session_id)
+            return None
+        snapshot = json.loads(data)
+        if session is None:
+            session = GameSession.from_snapshot(snapshot)
+            self.loaded += 1
+            self._add(session)
+            self.update_size(session)
+        # Versions only go up, so an older snapshot was read before a save made here since
+        elif snapshot["version"] > session.version and not session.lock.locked():
+            session.restore(snapshot)
+        return self._touched(session)
+
+    def _touched(self, session: GameSession) -> GameSession:
+        session.touch()
+        self._sessions.move_to_end(session.session_id)
+        return session
+
+    def _conflict(self, session: GameSession, data: Optional[bytes]):
+        """Undo a save that lost to another worker's, take its snapshot (data) and raise SessionConflictError"""
+        session.version -= 1
+        self.conflicts += 1
+        if data is None:
+            if session.session_id in self._sessions:
+                self._remove(session.session_id)
+            raise SessionConflictError("Game session was ended by another request")
+        session.restore(json.loads(data))
+        self.update_size(session)
+        raise SessionConflictError("Game session was changed by another request")
+
+    def update_size(self, session: GameSession):
+        """Re-measure a session after it changed, evicting others if over the byte budget"""
+        if session.session_id not in self._sessions:
+            return
+        size = session.estimate_bytes()
+        self.resident_bytes += size - session.size_bytes
+        session.size_bytes = size
+
+        if self.max_bytes is not None:
+            while self.resident_bytes > self.max_bytes and self._evict_lru("memory", keep=session):
+                pass
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session, returning False if it didn't exist"""
+        exists = session_id in self._sessions or self.backend.load(session_id) is not None
+        if not exists:
+            return False
+        self._deleted(session_id)
+        self.backend.delete(session_id)
+        return True
+
+    async def delete_async(self, session_id: str) -> bool:
+        """delete(), waiting for a shared backend off the event loop"""
+        exists = session_id in self._sessions or await self._call(self.backend.load, session_id) is not None
+        if not exists:
+            return False
+        self._deleted(session_id)
+        await self._call(self.backend.delete, session_id)
+        return True
+
+    def _deleted(self, session_id: str):
+        if session_id in self._sessions:
+            self._remove(session_id)
+        self.deleted += 1
+
+    def sweep(self, purge: bool = True) -> int:
+        """
+        Drop every idle session past its TTL, returning how many were
+        removed; purge also has the backend drop its expired snapshots
+        """
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if self._is_expired(session, now) and not session.lock.locked()
+        ]
+        for session_id in expired:
+            self._remove(session_id, "ttl")
+        if purge:
+            self.backend.purge_expired()
+        return len(expired)
+
+    def start_sweeper(self, interval: float = 60.0):
+        """Run sweep() every interval seconds on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(interval))
+
+    async def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            removed = self.sweep(purge=False)
+            await self._call(self.backend.purge_expired)
+            if removed:
+                print(f"Session sweeper removed {removed} idle sessions, {len(self._sessions)} remaining")
+
+    def _is_expired(self, session: GameSession, now: float) -> bool:
+        return now - session.last_active > self.idle_ttl
+
+    def _add(self, session: GameSession):
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions and self._evict_lru("lru", keep=session):
+            pass
+
+    def _evict_lru(self, reason: str, keep: GameSession) -> bool:
+        """Evict the least recently used idle session other than keep"""
+        for session_id, session in self._sessions.items():
+            if session is not keep and not session.lock.locked():
+                self._remove(session_id, reason)
+                return True
+        return False
+
+    def _remove(self, session_id: str, reason: Optional[str] = None):
+        session = self._sessions.pop(session_id)
+        self.resident_bytes -= session.size_bytes
+        if reason is not None:
+            self.evictions[reason] += 1
+            # A shared backend outlives the local copy; only a process-local one is freed
+            if not self.backend.shared:
+                self.backend.delete(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for capacity planning"""
+        return {
+            "backend": self.backend.name,
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "avg_session_bytes": self.resident_bytes / len(self._sessions) if self._sessions else 0.0,
+            "created": self.created,
+            "deleted": self.deleted,
+            "loaded": self.loaded,
+            "conflicts": self.conflicts,
+            "evictions": dict(self.evictions)
+        }
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -61,6 +61,7 @@ class StrategyRecommendation(BaseModel):
     variables: Dict[str, Any]
     calculation_steps: List[str]
     confidence: float  # 0.0 to 1.0
+    degraded: bool = False  # True if cut short or replaced by a cheaper variant to meet a deadline
 
 class StrategyOverlay(BaseModel):
     ev_strategy: StrategyRecommendation
@@ -74,4 +75,17 @@ class GameResponse(BaseModel):
     game_state: GameState
     available_actions: List[AvailableAction]
     strategy_overlay: Optional[StrategyOverlay] = None
-    message: str 
\ No newline at end of file
+    message: str 
+
+class AnalyzeSpot(BaseModel):
+    player_cards: List[Card]
+    community_cards: List[Card] = []
+    pot_size: int
+    to_call: int
+    player_stack: int
+    action_history: List[PlayerAction] = []
+    street: Optional[Street] = None  # Derived from the board if omitted
+
+class AnalyzeBatchRequest(BaseModel):
+    spots: List[AnalyzeSpot]
+    budget_ms: Optional[float] = None  # Per-spot latency budget; the server default if omitted
@@ -0,0 +1 @@
+# Self-play simulation package
@@ -0,0 +1,237 @@
+from typing import Dict, List, Optional, Tuple, Type
+import numpy as np
+from ..models.game_models import Card, ActionType, GameState, PlayerAction, Street
+from ..game.bot_logic import PokerBot
+from ..game.poker_engine import PokerEngine
+from ..strategies.decision_context import DecisionContext
+from ..strategies.ev_strategy import EVStrategy
+from ..strategies.monte_carlo_strategy import MonteCarloStrategy
+from ..strategies.bayesian_strategy import BayesianStrategy
+from ..strategies.kelly_strategy import KellyStrategy
+from ..strategies.risk_utility_strategy import RiskUtilityStrategy
+from ..strategies.gto_strategy import GTOStrategy
+
+BIG_BLIND = 2
+
+
+class SeatView:
+    """
+    One player's view of the hand when it's their turn to act
+
+    The action history is relabelled from the acting player's point of
+    view - their own actions as "user", the opponent's as "bot" - which
+    is how the strategies read it in the live game.
+    """
+
+    def __init__(self, engine: PokerEngine, seat: str):
+        self.seat = seat
+        self.hole_cards: List[Card] = engine.user_cards if seat == "user" else engine.bot_cards
+        self.community_cards: List[Card] = engine.community_cards
+        self.pot_size: int = engine.pot
+        self.stack: int = engine.user_stack if seat == "user" else engine.bot_stack
+        self.opponent_stack: int = engine.bot_stack if seat == "user" else engine.user_stack
+        bet = engine.user_bet_this_street if seat == "user" else engine.bot_bet_this_street
+        self.current_bet: int = engine.current_bet
+        self.to_call: int = max(0, engine.current_bet - bet)
+        self.street: Street = engine.street
+        self.action_history: List[PlayerAction] = [
+            PlayerAction(player="user" if action.player == seat else "bot",
+                         action_type=action.action_type, amount=action.amount)
+            for action in engine.action_history
+        ]
+
+    def legalize(self, action_type: ActionType, amount: Optional[int]) -> Tuple[ActionType, int]:
+        """
+        Turn a recommendation into an action the engine accepts here
+
+        Checking facing a bet folds, folding or calling with nothing to call
+        checks, bets and raises are sized to at least a min-raise and at
+        most the stack, and an all-in becomes a bet or raise of the stack.
+        """
+        if action_type == ActionType.ALL_IN:
+            action_type, amount = ActionType.RAISE, self.stack
+
+        if action_type == ActionType.FOLD:
+            return (ActionType.FOLD, 0) if self.to_call > 0 else (ActionType.CHECK, 0)
+        if action_type == ActionType.CHECK:
+            return (ActionType.FOLD, 0) if self.to_call > 0 else (ActionType.CHECK, 0)
+        if action_type == ActionType.CALL:
+            return (ActionType.CALL, 0) if self.to_call > 0 else (ActionType.CHECK, 0)
+
+        # Bet or raise: only possible with chips left behind on both sides
+        if self.stack <= self.to_call or self.opponent_stack == 0:
+            return (ActionType.CALL, 0) if self.to_call > 0 else (ActionType.CHECK, 0)
+        if not amount:
+            amount = max(self.pot_size // 2, BIG_BLIND)
+        min_amount = self.to_call + max(self.to_call, BIG_BLIND)
+        amount = min(max(int(amount), min_amount), self.stack)
+        return (ActionType.RAISE if self.to_call > 0 else ActionType.BET), amount
+
+
+class Agent:
+    """A player in self-play: picks an action for the seat it's given"""
+
+    name = "agent"
+    # Decisions where the agent's logic failed and a fallback action was taken
+    errors = 0
+    # The first of those failures, for the report
+    first_error: Optional[str] = None
+
+    def act(self, view: SeatView) -> Tuple[ActionType, int]:
+        raise NotImplementedError
+
+    def policy(self, view: SeatView) -> Optional[Dict[Tuple[ActionType, int], float]]:
+        """
+        The chance of each action act would take at view, or None if the
+        agent's play can't be stated in closed form
+
+        Asking must not draw from the agent's RNG beyond what act would
+        draw first at the same view, so it doesn't change the agent's play.
+        """
+        return None
+
+
+class BotAgent(Agent):
+    """The game's EV bot"""
+
+    name = "bot"
+
+    def __init__(self, seed: Optional[np.random.SeedSequence] = None):
+        self.bot = PokerBot(seed)
+
+    def act(self, view: SeatView) -> Tuple[ActionType, int]:
+        action_type, amount = self.bot.decide_action(self._game_state(view), view.hole_cards)
+        return view.legalize(action_type, amount)
+
+    def policy(self, view: SeatView) -> Dict[Tuple[ActionType, int], float]:
+        policy: Dict[Tuple[ActionType, int], float] = {}
+        for (action_type, amount), p in self.bot.action_probabilities(self._game_state(view), view.hole_cards).items():
+            action = view.legalize(action_type, amount)
+            policy[action] = policy.get(action, 0.0) + p
+        return policy
+
+    @staticmethod
+    def _game_state(view: SeatView) -> GameState:
+        # PokerBot reads its own stack as bot_stack
+        return GameState(
+            session_id="self-play",
+            street=view.street,
+            pot_size=view.pot_size,
+            user_stack=view.opponent_stack,
+            bot_stack=view.stack,
+            user_cards=[],
+            community_cards=view.community_cards,
+            current_bet=view.current_bet,
+            to_call=view.to_call,
+            active_player="bot",
+            action_history=view.action_history,
+            hand_number=1,
+            is_hand_over=False
+        )
+
+
+class CallingStationAgent(Agent):
+    """Baseline that checks or calls every decision"""
+
+    name = "call"
+
+    def __init__(self, seed: Optional[np.random.SeedSequence] = None):
+        pass
+
+    def act(self, view: SeatView) -> Tuple[ActionType, int]:
+        return view.legalize(ActionType.CALL, None)
+
+    def policy(self, view: SeatView) -> Dict[Tuple[ActionType, int], float]:
+        return {self.act(view): 1.0}
+
+
+class StrategyAgent(Agent):
+    """
+    Plays one of the six overlay strategies' recommendations
+
+    Equity and card features are computed once per decision into a
+    DecisionContext, as StrategyEngine does. A strategy that raises
+    falls back to checking (folding facing a bet) and is counted in
+    errors, so a run can tell the strategy's play from the fallback's.
+    """
+
+    STRATEGIES: Dict[str, Type] = {
+        "ev": EVStrategy,
+        "monte_carlo": MonteCarloStrategy,
+        "bayesian": BayesianStrategy,
+        "kelly": KellyStrategy,
+        "risk_utility": RiskUtilityStrategy,
+        "gto": GTOStrategy,
+    }
+    # Strategies whose recommendation follows from the decision alone; Monte Carlo and Bayesian sample
+    DETERMINISTIC = {"ev", "kelly", "risk_utility", "gto"}
+
+    def __init__(self, name: str, seed: Optional[np.random.SeedSequence] = None):
+        self.name = name
+        equity_seed, strategy_seed = (seed or np.random.SeedSequence()).spawn(2)
+        self.equity_engine = PokerEngine(equity_seed)
+        if name == "monte_carlo":
+            self.strategy = MonteCarloStrategy(seed=strategy_seed)
+        else:
+            self.strategy = self.STRATEGIES[name]()
+        if name == "bayesian":
+            self.strategy.range_engine.rng = np.random.default_rng(strategy_seed)
+        self.errors = 0
+        self.first_error = None
+
+    def act(self, view: SeatView) -> Tuple[ActionType, int]:
+        action, error = self._decide(view)
+        if error is not None:
+            self.errors += 1
+            if self.first_error is None:
+                self.first_error = error
+        return action
+
+    def policy(self, view: SeatView) -> Optional[Dict[Tuple[ActionType, int], float]]:
+        if self.name not in self.DETERMINISTIC:
+            return None
+        return {self._decide(view)[0]: 1.0}
+
+    def _decide(self, view: SeatView) -> Tuple[Tuple[ActionType, int], Optional[str]]:
+        """The action for view, and the strategy's failure if it fell back to checking"""
+        context = DecisionContext(view.hole_cards, view.community_cards, view.pot_size, view.to_call,
+                                  view.stack, view.action_history, view.street)
+        context.equity = self.equity_engine.get_hand_equity(view.hole_cards, view.community_cards)
+
+        common = dict(
+            player_cards=view.hole_cards,
+            community_cards=view.community_cards,
+            pot_size=view.pot_size,
+            to_call=view.to_call,
+            player_stack=view.stack,
+            context=context
+        )
+        try:
+            if self.name == "bayesian":
+                recommendation = self.strategy.calculate_recommendation(
+                    **common, action_history=view.action_history, street=view.street
+                )
+            elif self.name == "gto":
+                # The engine's user seat posts the big blind
+                position = "BB" if view.seat == "user" else "SB"
+                recommendation = self.strategy.calculate_recommendation(**common, street=view.street,
+                                                                        position=position)
+            else:
+                recommendation = self.strategy.calculate_recommendation(**common)
+        except Exception as e:
+            return view.legalize(ActionType.CHECK, None), f"{type(e).__name__}: {e}"
+        return view.legalize(recommendation.recommended_action, recommendation.recommended_amount), None
+
+
+AGENT_NAMES = ["bot", "call"] + list(StrategyAgent.STRATEGIES)
+
+
+def create_agent(name: str, seed: Optional[np.random.SeedSequence] = None) -> Agent:
+    """Agent by name: "bot", "call" or one of the six strategy names"""
+    if name == "bot":
+        return BotAgent(seed)
+    if name == "call":
+        return CallingStationAgent(seed)
+    if name in StrategyAgent.STRATEGIES:
+        return StrategyAgent(name, seed)
+    raise ValueError(f"Unknown agent {name!r}, expected one of {', '.join(AGENT_NAMES)}")
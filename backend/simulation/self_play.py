@@ -0,0 +1,518 @@
+import argparse
+import contextlib
+import csv
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from ..models.game_models import ActionType
+from ..game.canonical import equity_cache, simulation_cache, overlay_cache
+from ..game.hand_history import HandLogWriter
+from ..game.poker_engine import PokerEngine
+from .agents import AGENT_NAMES, BIG_BLIND, Agent, SeatView, create_agent
+from .variance import LuckEstimator
+
+# Longest hand the engine can produce is well under this; beyond it the hand is abandoned
+MAX_ACTIONS_PER_HAND = 64
+
+# Share of an agent's decisions that may fail (and fall back to check/fold)
+# before run_self_play gives up: beyond it the result measures the fallback
+MAX_ERROR_RATE = 0.001
+
+# Columns of the per-hand results written by play_chunk
+HAND_LOG_COLUMNS = ["hand", "hero_seat", "hero_net_bb", "hero_adjusted_bb", "winner", "showdown", "actions"]
+
+
+class RunningStats:
+    """
+    Streaming mean and variance (Welford), mergeable across chunks
+
+    Chunks computed in different processes are combined with Chan's
+    parallel update, so no per-hand results are ever kept.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def to_state(self) -> List[float]:
+        return [self.count, self.mean, self.m2]
+
+    @classmethod
+    def from_state(cls, state: List[float]) -> "RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = int(state[0]), state[1], state[2]
+        return stats
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_error(self) -> float:
+        return math.sqrt(self.variance / self.count) if self.count else 0.0
+
+
+class AgentErrorsError(RuntimeError):
+    """Raised when an agent's logic failed on more than the allowed share of its decisions"""
+
+
+class SelfPlayResult:
+    """
+    Aggregated outcome of hero vs villain, in big blinds from the hero's side
+
+    stats holds the samples the win rate and its confidence interval come
+    from: one per hand, or one per pair of hands in duplicate mode (the
+    pair's average). adjusted holds the same samples with card luck
+    removed, when a LuckEstimator was used. per_hand always holds plain
+    per-hand results, the baseline for how much variance was saved.
+    """
+
+    def __init__(self, hero: str, villain: str):
+        self.hero = hero
+        self.villain = villain
+        self.hand_count = 0
+        self.stats = RunningStats()
+        self.adjusted = RunningStats()
+        self.per_hand = RunningStats()
+        self.hero_wins = 0
+        self.villain_wins = 0
+        self.ties = 0
+        self.showdowns = 0
+        self.abandoned = 0
+        self.errors = {"hero": 0, "villain": 0}
+        self.first_errors: Dict[str, Optional[str]] = {"hero": None, "villain": None}
+        self.elapsed = 0.0
+        # side ("hero"/"villain") -> street -> action -> count
+        self.action_counts: Dict[str, Dict[str, Dict[str, int]]] = {"hero": {}, "villain": {}}
+
+    @property
+    def hands(self) -> int:
+        return self.hand_count
+
+    @property
+    def bb_per_100(self) -> float:
+        return self.stats.mean * 100
+
+    @property
+    def ci95_bb_per_100(self) -> float:
+        """Half-width of the 95% confidence interval on bb/100"""
+        return 1.96 * self.stats.std_error * 100
+
+    @property
+    def adjusted_bb_per_100(self) -> Optional[float]:
+        return self.adjusted.mean * 100 if self.adjusted.count else None
+
+    @property
+    def adjusted_ci95_bb_per_100(self) -> Optional[float]:
+        return 1.96 * self.adjusted.std_error * 100 if self.adjusted.count else None
+
+    @property
+    def variance_reduction(self) -> float:
+        """
+        How many times fewer hands the reported interval needs than plain
+        per-hand results would for the same width
+        """
+        best = self.adjusted if self.adjusted.count else self.stats
+        if best.count < 2 or self.per_hand.count < 2 or best.variance == 0:
+            return 1.0
+        return (self.per_hand.variance / self.per_hand.count) / (best.variance / best.count)
+
+    def decisions(self, side: str) -> int:
+        """Actions taken by one side ("hero"/"villain"), fallbacks included"""
+        return sum(sum(by_action.values()) for by_action in self.action_counts[side].values())
+
+    def error_rate(self, side: str) -> float:
+        """Share of one side's decisions where its logic failed"""
+        decisions = self.decisions(side)
+        return self.errors[side] / decisions if decisions else 0.0
+
+    def check_errors(self, max_error_rate: float):
+        """Raise AgentErrorsError if either side failed on more than max_error_rate of its decisions"""
+        for side, name in (("hero", self.hero), ("villain", self.villain)):
+            if self.errors[side] and self.error_rate(side) > max_error_rate:
+                raise AgentErrorsError(
+                    f"{name} failed on {self.errors[side]} of {self.decisions(side)} decisions "
+                    f"({self.error_rate(side):.1%}), so its results measure the check/fold fallback; "
+                    f"first error: {self.first_errors[side]}"
+                )
+
+    def add_sample(self, hero_net_bb: float, hero_adjusted_bb: Optional[float] = None):
+        """Add one sample: a hand's result, or a duplicate pair's average"""
+        self.stats.add(hero_net_bb)
+        if hero_adjusted_bb is not None:
+            self.adjusted.add(hero_adjusted_bb)
+
+    def record(self, hero_net_bb: float, winner: str, showdown: bool,
+               actions: Optional[List[Tuple[str, str, str]]] = None):
+        """Count one hand; actions are (side, street, action) in the order taken"""
+        self.hand_count += 1
+        self.per_hand.add(hero_net_bb)
+        for side, street, action in actions or []:
+            by_action = self.action_counts[side].setdefault(street, {})
+            by_action[action] = by_action.get(action, 0) + 1
+        if winner == "hero":
+            self.hero_wins += 1
+        elif winner == "villain":
+            self.villain_wins += 1
+        else:
+            self.ties += 1
+        self.showdowns += showdown
+
+    def merge(self, other: "SelfPlayResult"):
+        self.hand_count += other.hand_count
+        self.stats.merge(other.stats)
+        self.adjusted.merge(other.adjusted)
+        self.per_hand.merge(other.per_hand)
+        self.hero_wins += other.hero_wins
+        self.villain_wins += other.villain_wins
+        self.ties += other.ties
+        self.showdowns += other.showdowns
+        self.abandoned += other.abandoned
+        for side in self.errors:
+            self.errors[side] += other.errors[side]
+            self.first_errors[side] = self.first_errors[side] or other.first_errors[side]
+        self.elapsed += other.elapsed
+        for side, by_street in other.action_counts.items():
+            for street, by_action in by_street.items():
+                counts = self.action_counts[side].setdefault(street, {})
+                for action, count in by_action.items():
+                    counts[action] = counts.get(action, 0) + count
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable state, for checkpoints"""
+        return {
+            "hero": self.hero,
+            "villain": self.villain,
+            "hand_count": self.hand_count,
+            "stats": self.stats.to_state(),
+            "adjusted": self.adjusted.to_state(),
+            "per_hand": self.per_hand.to_state(),
+            "hero_wins": self.hero_wins,
+            "villain_wins": self.villain_wins,
+            "ties": self.ties,
+            "showdowns": self.showdowns,
+            "abandoned": self.abandoned,
+            "errors": self.errors,
+            "first_errors": self.first_errors,
+            "elapsed": self.elapsed,
+            "action_counts": self.action_counts
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SelfPlayResult":
+        result = cls(state["hero"], state["villain"])
+        for name in ("stats", "adjusted", "per_hand"):
+            setattr(result, name, RunningStats.from_state(state[name]))
+        for name in ("hand_count", "hero_wins", "villain_wins", "ties", "showdowns", "abandoned", "errors", "elapsed",
+                     "action_counts"):
+            setattr(result, name, state[name])
+        result.first_errors = state.get("first_errors", result.first_errors)
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "hero": self.hero,
+            "villain": self.villain,
+            "hands": self.hands,
+            "bb_per_100": self.bb_per_100,
+            "ci95_bb_per_100": self.ci95_bb_per_100,
+            "adjusted_bb_per_100": self.adjusted_bb_per_100,
+            "adjusted_ci95_bb_per_100": self.adjusted_ci95_bb_per_100,
+            "variance_reduction": self.variance_reduction,
+            "std_bb_per_hand": math.sqrt(self.per_hand.variance),
+            "hero_win_rate": self.hero_wins / self.hands if self.hands else 0.0,
+            "showdown_rate": self.showdowns / self.hands if self.hands else 0.0,
+            "abandoned": self.abandoned,
+            "errors": dict(self.errors),
+            "error_rates": {side: self.error_rate(side) for side in self.errors},
+            "first_errors": dict(self.first_errors)
+        }
+
+
+class HandOutcome:
+    """Result of one self-play hand, from the user seat's side"""
+
+    def __init__(self, user_net: float, winner: str, showdown: bool, user_luck: Optional[float]):
+        self.user_net = user_net
+        self.winner = winner
+        self.showdown = showdown
+        # Sum of the chance and decision corrections, if a LuckEstimator was given
+        self.user_luck = user_luck
+
+
+def play_hand(engine: PokerEngine, players: Dict[str, Agent],
+              luck: Optional[LuckEstimator] = None) -> Optional[HandOutcome]:
+    """
+    Play one hand between the agents seated at "user" and "bot"
+
+    Returns None if the hand didn't finish within MAX_ACTIONS_PER_HAND.
+    """
+    engine.deal_new_hand()
+    user_luck = luck.start_hand(engine.user_cards, engine.bot_cards, engine.pot) if luck else None
+    for _ in range(MAX_ACTIONS_PER_HAND):
+        if engine.hand_over:
+            break
+        seat = engine._get_next_active_player()
+        corrections = luck.decision(engine, players, seat) if luck else None
+        action_type, amount = players[seat].act(SeatView(engine, seat))
+        board_size = len(engine.community_cards)
+        engine.process_action(action_type, amount, seat)
+        if corrections:
+            user_luck += corrections[(action_type, amount)]
+        if luck and len(engine.community_cards) > board_size:
+            user_luck += luck.street_dealt(engine.community_cards, engine.pot, engine, players)
+    else:
+        return None
+
+    # Stacks start every hand at 100, so what's missing went into the pot
+    invested = 100 - engine.user_stack
+    if engine.winner == "user":
+        won = engine.pot
+    elif engine.winner == "tie":
+        won = engine.pot / 2
+    else:
+        won = 0
+    showdown = engine.action_history[-1].action_type != ActionType.FOLD
+    return HandOutcome(won - invested, engine.winner, showdown, user_luck)
+
+
+def play_chunk(hero: str, villain: str, num_hands: int, seed: np.random.SeedSequence,
+               first_hand: int = 0, hand_log: Optional[str] = None, duplicate: bool = False,
+               luck_adjusted: bool = False, hand_history: Optional[str] = None) -> SelfPlayResult:
+    """
+    Play num_hands of hero vs villain on one RNG stream
+
+    Seats alternate every hand so neither agent keeps the blind and
+    acting-order advantage. The process-wide caches are cleared first:
+    the sampled equities they hold depend on which chunks ran before,
+    and a chunk must replay identically from its seed.
+
+    duplicate deals every odd hand with the same cards as the hand before
+    it, so each deal is played once from each seat and the card luck of
+    the pair mostly cancels. luck_adjusted also records every hand with
+    the LuckEstimator's chance corrections taken out.
+
+    With hand_log, every hand's result and actions are streamed to that
+    CSV file; it's written under a temporary name and only appears once
+    the chunk is complete. With hand_history, every finished hand is also
+    appended to the binary hand log in that directory, under a prefix
+    naming the match and first hand (replaced if the chunk is replayed).
+    Its session is "self-play:<user seat agent>:<bot seat agent>".
+    """
+    if duplicate and (first_hand % 2 or num_hands % 2):
+        raise ValueError("Duplicate dealing plays hands in pairs; use even chunk sizes")
+    for cache in (equity_cache, simulation_cache, overlay_cache):
+        cache.clear()
+
+    start = time.perf_counter()
+    deck_seed, hero_seed, villain_seed, luck_seed = seed.spawn(4)
+    result = SelfPlayResult(hero, villain)
+    luck = LuckEstimator(luck_seed) if luck_adjusted else None
+    pair: List[Optional[Tuple[float, Optional[float]]]] = []
+
+    # The engine logs every action; keep millions of hands off the console
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        writer = None
+        if hand_log:
+            writer = csv.writer(stack.enter_context(open(hand_log + ".tmp", "w", newline="")))
+            writer.writerow(HAND_LOG_COLUMNS)
+
+        history = None
+        if hand_history:
+            history = HandLogWriter(hand_history, f"{hero}-vs-{villain}-{first_hand:09d}", fresh=True)
+            stack.callback(history.close)
+
+        engine = PokerEngine(deck_seed)
+        hero_agent = create_agent(hero, hero_seed)
+        villain_agent = create_agent(villain, villain_seed)
+        for hand in range(first_hand, first_hand + num_hands):
+            hero_seat = "user" if hand % 2 == 0 else "bot"
+            villain_seat = "bot" if hero_seat == "user" else "user"
+            # The deck is the only thing drawn from the table engine's RNG
+            if duplicate and hand % 2 == 0:
+                deck_state = engine.rng.bit_generator.state
+            elif duplicate:
+                engine.rng.bit_generator.state = deck_state
+
+            outcome = play_hand(engine, {hero_seat: hero_agent, villain_seat: villain_agent}, luck)
+            sign = 1 if hero_seat == "user" else -1
+            sample = None
+            if outcome is None:
+                result.abandoned += 1
+            else:
+                hero_net = sign * outcome.user_net / BIG_BLIND
+                hero_adjusted = None if luck is None else hero_net - sign * outcome.user_luck / BIG_BLIND
+                sample = (hero_net, hero_adjusted)
+                side = "tie" if outcome.winner == "tie" else ("hero" if outcome.winner == hero_seat else "villain")
+                actions = [
+                    ("hero" if action.player == hero_seat else "villain", street.value, action.action_type.value)
+                    for action, street in zip(engine.action_history, engine.action_streets)
+                ]
+                result.record(hero_net, side, outcome.showdown, actions)
+                if history:
+                    names = {hero_seat: hero, villain_seat: villain}
+                    history.record_engine(engine, f"self-play:{names['user']}:{names['bot']}", hand)
+                if writer:
+                    writer.writerow([
+                        hand, hero_seat, hero_net, "" if hero_adjusted is None else hero_adjusted, side,
+                        int(outcome.showdown),
+                        " ".join(f"{actor}:{street}:{action.action_type.value}:{action.amount}"
+                                 for (actor, street, _), action in zip(actions, engine.action_history))
+                    ])
+
+            if not duplicate:
+                if sample:
+                    result.add_sample(*sample)
+                continue
+            # A pair counts only if both of its hands finished
+            pair.append(sample)
+            if len(pair) == 2:
+                if all(pair):
+                    (net_a, adjusted_a), (net_b, adjusted_b) = pair
+                    result.add_sample((net_a + net_b) / 2,
+                                      None if luck is None else (adjusted_a + adjusted_b) / 2)
+                pair = []
+
+    if hand_log:
+        os.replace(hand_log + ".tmp", hand_log)
+
+    result.errors = {"hero": hero_agent.errors, "villain": villain_agent.errors}
+    result.first_errors = {"hero": hero_agent.first_error, "villain": villain_agent.first_error}
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_self_play(hero: str, villain: str, num_hands: int, workers: int = 1, seed: Optional[int] = None,
+                  chunk_size: int = 1000, progress: Optional[Callable[[SelfPlayResult], None]] = None,
+                  duplicate: bool = False, luck_adjusted: bool = False,
+                  hand_history: Optional[str] = None,
+                  max_error_rate: Optional[float] = MAX_ERROR_RATE) -> SelfPlayResult:
+    """
+    Play num_hands of hero vs villain, split into chunks across worker processes
+
+    Every chunk gets an independent RNG stream spawned from one
+    SeedSequence, so a run is reproducible from its seed whatever the
+    number of workers. Chunk results are merged as they arrive and
+    progress (if given) is called with the running total after each.
+    duplicate, luck_adjusted and hand_history are passed to play_chunk.
+
+    Once an agent's logic has failed on more than max_error_rate of its
+    decisions the run stops with AgentErrorsError (None never stops it;
+    the counts are still in the result).
+    """
+    for name in (hero, villain):
+        if name not in AGENT_NAMES:
+            raise ValueError(f"Unknown agent {name!r}, expected one of {', '.join(AGENT_NAMES)}")
+    if duplicate and (num_hands % 2 or chunk_size % 2):
+        raise ValueError("Duplicate dealing plays hands in pairs; use even hand counts and chunk sizes")
+
+    num_chunks = max(1, math.ceil(num_hands / chunk_size))
+    sizes = [chunk_size] * (num_chunks - 1) + [num_hands - chunk_size * (num_chunks - 1)]
+    starts = [chunk_size * i for i in range(num_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+
+    total = SelfPlayResult(hero, villain)
+    if workers <= 1 or num_chunks == 1:
+        for size, chunk_seed, first_hand in zip(sizes, seeds, starts):
+            total.merge(play_chunk(hero, villain, size, chunk_seed, first_hand, None, duplicate, luck_adjusted,
+                                   hand_history))
+            if max_error_rate is not None:
+                total.check_errors(max_error_rate)
+            if progress:
+                progress(total)
+        return total
+
+    # Chunks are merged in order (holding back early finishers) so the
+    # floating-point totals don't depend on which worker finished first
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(play_chunk, hero, villain, size, chunk_seed, first_hand, None, duplicate,
+                            luck_adjusted, hand_history): index
+            for index, (size, chunk_seed, first_hand) in enumerate(zip(sizes, seeds, starts))
+        }
+        finished: Dict[int, SelfPlayResult] = {}
+        next_index = 0
+        for future in as_completed(futures):
+            finished[futures[future]] = future.result()
+            while next_index in finished:
+                total.merge(finished.pop(next_index))
+                next_index += 1
+                if max_error_rate is not None:
+                    total.check_errors(max_error_rate)
+                if progress:
+                    progress(total)
+    return total
+
+
+def format_result(result: SelfPlayResult) -> str:
+    line = (f"{result.hands:>10,} hands  {result.hero} vs {result.villain}: "
+            f"{result.bb_per_100:+8.2f} ± {result.ci95_bb_per_100:.2f} bb/100")
+    if result.adjusted.count:
+        line += f", luck-adjusted {result.adjusted_bb_per_100:+.2f} ± {result.adjusted_ci95_bb_per_100:.2f}"
+    return line
+
+
+def main(argv: Optional[List[str]] = None) -> SelfPlayResult:
+    parser = argparse.ArgumentParser(description="Headless self-play between the bot and the strategies")
+    parser.add_argument("--hero", default="gto", choices=AGENT_NAMES)
+    parser.add_argument("--villain", default="bot", choices=AGENT_NAMES)
+    parser.add_argument("--hands", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Hands per worker task")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    parser.add_argument("--duplicate", action="store_true",
+                        help="Play every deal twice with the seats swapped")
+    parser.add_argument("--luck-adjusted", action="store_true",
+                        help="Also report the win rate with card luck taken out")
+    parser.add_argument("--hand-history", default=None, metavar="DIR",
+                        help="Append every hand to the binary hand log in DIR")
+    parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE,
+                        help="Stop once an agent's logic fails on more than this share of its decisions "
+                             f"(default {MAX_ERROR_RATE})")
+    args = parser.parse_args(argv)
+
+    wall_start = time.perf_counter()
+    try:
+        result = run_self_play(args.hero, args.villain, args.hands, workers=args.workers, seed=args.seed,
+                               chunk_size=args.chunk_size,
+                               progress=None if args.quiet else lambda total: print(format_result(total), flush=True),
+                               duplicate=args.duplicate, luck_adjusted=args.luck_adjusted,
+                               hand_history=args.hand_history, max_error_rate=args.max_error_rate)
+    except AgentErrorsError as e:
+        parser.exit(1, f"error: {e}\n")
+
+    wall = time.perf_counter() - wall_start
+    summary = result.summary()
+    print(format_result(result))
+    print(f"  std dev {summary['std_bb_per_hand']:.2f} bb/hand, hero won {summary['hero_win_rate']:.1%}, "
+          f"showdowns {summary['showdown_rate']:.1%}")
+    if args.duplicate or args.luck_adjusted:
+        print(f"  variance {summary['variance_reduction']:.1f}x lower than plain per-hand results")
+    print(f"  {result.hands / wall:,.0f} hands/s on {args.workers} workers, "
+          f"{result.abandoned} abandoned, agent errors {result.errors}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .agents import AGENT_NAMES
+from .self_play import SelfPlayResult, play_chunk
+
+DEFAULT_AGENTS = ["bot", "ev", "monte_carlo", "bayesian", "kelly", "risk_utility", "gto"]
+
+CONFIG_FILE = "tournament.json"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+REPORT_FILE = "report.json"
+HANDS_DIR = "hands"
+HISTORY_DIR = "history"
+
+
+class Tournament:
+    """
+    Round-robin heads-up matches between agents, run from a directory
+
+    Every pair of agents plays hands_per_match hands, split into chunks
+    that run on a process pool. Each chunk streams its per-hand results to
+    hands/<hero>-vs-<villain>-<chunk>.csv and its hands to the binary hand
+    log in history/, and once it finishes its
+    aggregated result is appended to checkpoint.jsonl. Opening the same
+    directory again resumes: completed chunks are loaded from the
+    checkpoint and only the rest are played.
+
+    Chunk seeds are derived from the tournament seed and the chunk's
+    position, and results are merged in chunk order, so an interrupted
+    and resumed tournament reports exactly what an uninterrupted one would.
+
+    duplicate and luck_adjusted select play_chunk's variance reduction;
+    with luck_adjusted the standings rank by the luck-adjusted win rates.
+    """
+
+    def __init__(self, output_dir: str, agents: Optional[List[str]] = None, hands_per_match: Optional[int] = None,
+                 chunk_size: Optional[int] = None, seed: Optional[int] = None, duplicate: Optional[bool] = None,
+                 luck_adjusted: Optional[bool] = None):
+        self.output_dir = output_dir
+        os.makedirs(os.path.join(output_dir, HANDS_DIR), exist_ok=True)
+
+        config_path = os.path.join(output_dir, CONFIG_FILE)
+        given = {"agents": agents, "hands_per_match": hands_per_match, "chunk_size": chunk_size, "seed": seed,
+                 "duplicate": duplicate, "luck_adjusted": luck_adjusted}
+        if os.path.exists(config_path):
+            # Resuming: anything not given comes from the saved run, anything given must match it
+            with open(config_path) as f:
+                config = {"duplicate": False, "luck_adjusted": False, **json.load(f)}
+            for name, value in given.items():
+                if value is not None and value != config[name]:
+                    raise ValueError(f"{output_dir} holds a tournament with {name}={config[name]!r}, not {value!r}")
+        else:
+            config = {
+                "agents": agents or DEFAULT_AGENTS,
+                "hands_per_match": hands_per_match or 10000,
+                "chunk_size": chunk_size or 1000,
+                "seed": seed if seed is not None else np.random.SeedSequence().entropy,
+                "duplicate": bool(duplicate),
+                "luck_adjusted": bool(luck_adjusted)
+            }
+            if config["duplicate"] and (config["hands_per_match"] % 2 or config["chunk_size"] % 2):
+                raise ValueError("Duplicate dealing plays hands in pairs; use even hand counts and chunk sizes")
+            with open(config_path, "w") as f:
+                json.dump(config, f, indent=2)
+
+        for name in config["agents"]:
+            if name not in AGENT_NAMES:
+                raise ValueError(f"Unknown agent {name!r}, expected one of {', '.join(AGENT_NAMES)}")
+
+        self.agents: List[str] = config["agents"]
+        self.hands_per_match: int = config["hands_per_match"]
+        self.chunk_size: int = config["chunk_size"]
+        self.seed: int = config["seed"]
+        self.duplicate: bool = config["duplicate"]
+        self.luck_adjusted: bool = config["luck_adjusted"]
+        self.matches: List[Tuple[str, str]] = list(itertools.combinations(self.agents, 2))
+        self.num_chunks = max(1, math.ceil(self.hands_per_match / self.chunk_size))
+        self.chunk_results: Dict[Tuple[int, int], SelfPlayResult] = {}
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        path = os.path.join(self.output_dir, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            lines = f.read().split("\n")
+        valid = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Line cut short by an interruption; that chunk is replayed
+            self.chunk_results[(entry["match"], entry["chunk"])] = SelfPlayResult.from_state(entry["result"])
+            valid.append(line)
+
+        # Drop a partial last line so new entries don't get appended onto it
+        if len(valid) != len([line for line in lines if line]):
+            with open(path, "w") as f:
+                f.write("".join(line + "\n" for line in valid))
+
+    def pending_chunks(self) -> List[Tuple[int, int]]:
+        """(match index, chunk index) of every chunk not yet played"""
+        return [
+            (match, chunk)
+            for match in range(len(self.matches))
+            for chunk in range(self.num_chunks)
+            if (match, chunk) not in self.chunk_results
+        ]
+
+    def _chunk_args(self, match: int, chunk: int) -> Tuple:
+        hero, villain = self.matches[match]
+        first_hand = chunk * self.chunk_size
+        num_hands = min(self.chunk_size, self.hands_per_match - first_hand)
+        seed = np.random.SeedSequence(self.seed, spawn_key=(match, chunk))
+        hand_log = os.path.join(self.output_dir, HANDS_DIR, f"{hero}-vs-{villain}-{chunk:05d}.csv")
+        hand_history = os.path.join(self.output_dir, HISTORY_DIR)
+        return hero, villain, num_hands, seed, first_hand, hand_log, self.duplicate, self.luck_adjusted, hand_history
+
+    def _record(self, match: int, chunk: int, result: SelfPlayResult):
+        """Checkpoint a finished chunk"""
+        self.chunk_results[(match, chunk)] = result
+        with open(os.path.join(self.output_dir, CHECKPOINT_FILE), "a") as f:
+            f.write(json.dumps({"match": match, "chunk": chunk, "result": result.to_state()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, workers: int = 1,
+            progress: Optional[Callable[[str, str, int, SelfPlayResult], None]] = None) -> Dict[str, Any]:
+        """
+        Play every pending chunk and write report.json
+
+        progress (if given) is called after each chunk with the match's
+        agents, the number of its chunks done and its running result.
+        """
+        pending = self.pending_chunks()
+
+        def finished(match: int, chunk: int, result: SelfPlayResult):
+            self._record(match, chunk, result)
+            if progress:
+                hero, villain = self.matches[match]
+                done = sum(1 for key in self.chunk_results if key[0] == match)
+                progress(hero, villain, done, self.match_result(match))
+
+        if workers <= 1:
+            for match, chunk in pending:
+                finished(match, chunk, play_chunk(*self._chunk_args(match, chunk)))
+        elif pending:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(play_chunk, *self._chunk_args(match, chunk)): (match, chunk)
+                    for match, chunk in pending
+                }
+                for future in as_completed(futures):
+                    finished(*futures[future], future.result())
+
+        report = self.report()
+        with open(os.path.join(self.output_dir, REPORT_FILE), "w") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def match_result(self, match: int) -> SelfPlayResult:
+        """A match's completed chunks, merged in chunk order"""
+        hero, villain = self.matches[match]
+        result = SelfPlayResult(hero, villain)
+        for chunk in range(self.num_chunks):
+            if (match, chunk) in self.chunk_results:
+                result.merge(self.chunk_results[(match, chunk)])
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Standings, bb/100 and hand win-rate matrices (row agent vs column
+        agent, with 95% CIs) and each agent's action frequencies by street
+
+        Luck-adjusted tournaments add adjusted_bb_per_100 and its CIs, and
+        rank the standings by it.
+
+        errors counts each agent's decisions and the ones where its logic
+        failed and it checked or folded instead. Every match with such
+        failures is listed in flagged_matches, and the agent's standings
+        entry is marked flagged: those results partly measure the fallback,
+        not the strategy.
+        """
+        n = len(self.agents)
+        index = {name: i for i, name in enumerate(self.agents)}
+        bb_per_100 = [[None] * n for _ in range(n)]
+        ci95 = [[None] * n for _ in range(n)]
+        adjusted = [[None] * n for _ in range(n)]
+        adjusted_ci95 = [[None] * n for _ in range(n)]
+        win_rate = [[None] * n for _ in range(n)]
+        action_counts: Dict[str, Dict[str, Dict[str, int]]] = {name: {} for name in self.agents}
+        errors = {name: {"errors": 0, "decisions": 0} for name in self.agents}
+        flagged_matches = []
+        hands_played = 0
+
+        for match in range(len(self.matches)):
+            result = self.match_result(match)
+            if result.hands == 0:
+                continue
+            hands_played += result.hands
+            i, j = index[result.hero], index[result.villain]
+            bb_per_100[i][j], bb_per_100[j][i] = result.bb_per_100, -result.bb_per_100
+            ci95[i][j] = ci95[j][i] = result.ci95_bb_per_100
+            if result.adjusted.count:
+                adjusted[i][j], adjusted[j][i] = result.adjusted_bb_per_100, -result.adjusted_bb_per_100
+                adjusted_ci95[i][j] = adjusted_ci95[j][i] = result.adjusted_ci95_bb_per_100
+            win_rate[i][j] = result.hero_wins / result.hands
+            win_rate[j][i] = result.villain_wins / result.hands
+            if any(result.errors.values()):
+                flagged_matches.append({"hero": result.hero, "villain": result.villain,
+                                        "errors": dict(result.errors), "first_errors": dict(result.first_errors)})
+            for side, name in (("hero", result.hero), ("villain", result.villain)):
+                errors[name]["errors"] += result.errors[side]
+                errors[name]["decisions"] += result.decisions(side)
+                for street, by_action in result.action_counts[side].items():
+                    counts = action_counts[name].setdefault(street, {})
+                    for action, count in by_action.items():
+                        counts[action] = counts.get(action, 0) + count
+
+        ranking = adjusted if self.luck_adjusted else bb_per_100
+        standings = []
+        for name in self.agents:
+            row = [value for value in ranking[index[name]] if value is not None]
+            standings.append({"agent": name, "mean_bb_per_100": sum(row) / len(row) if row else 0.0,
+                              "flagged": errors[name]["errors"] > 0})
+        standings.sort(key=lambda entry: entry["mean_bb_per_100"], reverse=True)
+
+        action_frequencies = {
+            name: {
+                street: {action: count / sum(by_action.values()) for action, count in sorted(by_action.items())}
+                for street, by_action in by_street.items()
+            }
+            for name, by_street in action_counts.items()
+        }
+
+        report = {
+            "agents": self.agents,
+            "hands_per_match": self.hands_per_match,
+            "duplicate": self.duplicate,
+            "luck_adjusted": self.luck_adjusted,
+            "hands_played": hands_played,
+            "chunks_done": len(self.chunk_results),
+            "chunks_total": len(self.matches) * self.num_chunks,
+            "standings": standings,
+            "bb_per_100": bb_per_100,
+            "ci95_bb_per_100": ci95,
+            "win_rate": win_rate,
+            "action_frequencies": action_frequencies,
+            "errors": errors,
+            "flagged_matches": flagged_matches
+        }
+        if self.luck_adjusted:
+            report["adjusted_bb_per_100"] = adjusted
+            report["adjusted_ci95_bb_per_100"] = adjusted_ci95
+        return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text standings, bb/100 matrix and action frequencies"""
+    agents = report["agents"]
+    width = max(12, max(len(name) for name in agents) + 1)
+    adjusted = "adjusted_bb_per_100" in report
+    lines = [f"{report['hands_played']:,} hands, {report['chunks_done']}/{report['chunks_total']} chunks", "",
+             f"Standings (mean {'luck-adjusted ' if adjusted else ''}bb/100 across opponents)"]
+    for rank, entry in enumerate(report["standings"], 1):
+        flag = "  (agent errors)" if entry.get("flagged") else ""
+        lines.append(f"  {rank}. {entry['agent']:<{width}} {entry['mean_bb_per_100']:+9.1f}{flag}")
+
+    matrices = [("bb/100", "bb_per_100", "ci95_bb_per_100")]
+    if adjusted:
+        matrices.append(("Luck-adjusted bb/100", "adjusted_bb_per_100", "adjusted_ci95_bb_per_100"))
+    for title, values, cis in matrices:
+        lines += ["", f"{title} ± 95% CI (row vs column)",
+                  " " * width + "".join(f"{name:>{width + 8}}" for name in agents)]
+        for i, name in enumerate(agents):
+            cells = []
+            for j in range(len(agents)):
+                value, ci = report[values][i][j], report[cis][i][j]
+                cells.append(f"{'-':>{width + 8}}" if value is None else f"{value:+.1f} ± {ci:.1f}".rjust(width + 8))
+            lines.append(f"{name:<{width}}" + "".join(cells))
+
+    if report.get("flagged_matches"):
+        lines += ["", "Matches with agent errors (failed decisions were played as check/fold)"]
+        for match in report["flagged_matches"]:
+            for side in ("hero", "villain"):
+                name = match[side]
+                if match["errors"][side]:
+                    counts = report["errors"][name]
+                    lines.append(f"  {match['hero']} vs {match['villain']}: {name} failed on "
+                                 f"{match['errors'][side]} decisions ({counts['errors']} of "
+                                 f"{counts['decisions']} overall), first: {match['first_errors'][side]}")
+
+    lines += ["", "Action frequencies by street"]
+    for name in agents:
+        for street, by_action in report["action_frequencies"][name].items():
+            frequencies = ", ".join(f"{action} {share:.0%}" for action, share in by_action.items())
+            lines.append(f"  {name:<{width}} {street:<8} {frequencies}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-robin tournament between the bot and the strategies")
+    parser.add_argument("--out", required=True, help="Tournament directory; an existing one is resumed")
+    parser.add_argument("--agents", nargs="+", choices=AGENT_NAMES, default=None,
+                        help=f"Default: {' '.join(DEFAULT_AGENTS)}")
+    parser.add_argument("--hands", type=int, default=None, help="Hands per match (default 10000)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Hands per worker task and checkpoint (default 1000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--duplicate", action="store_true", default=None,
+                        help="Play every deal twice with the seats swapped")
+    parser.add_argument("--luck-adjusted", action="store_true", default=None,
+                        help="Rank by win rates with card luck taken out")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.out, agents=args.agents, hands_per_match=args.hands,
+                            chunk_size=args.chunk_size, seed=args.seed, duplicate=args.duplicate,
+                            luck_adjusted=args.luck_adjusted)
+    pending = len(tournament.pending_chunks())
+    print(f"{len(tournament.matches)} matches, {pending} of {len(tournament.matches) * tournament.num_chunks} "
+          f"chunks to play")
+    report = tournament.run(
+        workers=args.workers,
+        progress=lambda hero, villain, done, result: print(
+            f"{hero} vs {villain}: {done}/{tournament.num_chunks} chunks, "
+            f"{result.bb_per_100:+.1f} ± {result.ci95_bb_per_100:.1f} bb/100", flush=True
+        )
+    )
+    print()
+    print(format_report(report))
+    if report["flagged_matches"]:
+        parser.exit(1, f"\n{len(report['flagged_matches'])} matches had agent errors; their results aren't reliable\n")
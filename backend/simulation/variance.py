@@ -0,0 +1,178 @@
+import copy
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from ..models.game_models import ActionType, Card, Street
+from ..game.hand_evaluator import HandEvaluator, cards_to_array, int_to_card, remaining_deck
+from ..game.lookup_evaluator import get_lookup_evaluator
+from ..game.poker_engine import PokerEngine
+from .agents import Agent, SeatView
+
+Action = Tuple[ActionType, int]
+
+
+class LuckEstimator:
+    """
+    AIVAT-style corrections for one hand, from the user seat's side
+
+    The value of a hand state is the user's share of the pot at their
+    showdown equity against the bot's actual cards, minus what they've put
+    in. At every chance node (the deal, flop, turn and river) the correction
+    is that value after the cards came minus its expectation over the cards
+    that could have come - the pot times the change in equity, since
+    equity is a martingale over the runout. Subtracting the corrections
+    from the result removes card luck but keeps the estimate unbiased
+    whatever the players' strategies, because every correction has mean
+    zero given the history before it.
+
+    When both agents can state their policies (Agent.policy), the value of
+    a state inside a betting round is its expectation over the rest of the
+    round's betting, valued as above once the round ends. At each decision
+    of an agent whose play is random, the correction is the value after the
+    action taken minus its expectation over the agent's policy. On the
+    river the same look-ahead values each card that could have come, so
+    the river's betting is corrected along with its card; earlier streets
+    keep the equity-only value, as the agents' equities on every other
+    turn card would cost far more than the hand.
+
+    Flop, turn and river equities are enumerated exactly. The hand-vs-hand
+    preflop equity is sampled from num_samples boards; its noise is
+    independent of play, so the estimate stays unbiased.
+    """
+
+    def __init__(self, seed: Optional[np.random.SeedSequence] = None, num_samples: int = 1000,
+                 evaluator: Optional[HandEvaluator] = None):
+        self.rng = np.random.default_rng(seed)
+        self.num_samples = num_samples
+        self.evaluator = evaluator or get_lookup_evaluator()
+
+    def start_hand(self, user_cards: List[Card], bot_cards: List[Card], pot: int) -> float:
+        """Correction for the deal; before it, either seat's equity is exactly 1/2"""
+        self.user = cards_to_array(user_cards)
+        self.bot = cards_to_array(bot_cards)
+        self.last_equity = self.equity(np.empty(0, dtype=np.uint8))
+        return pot * (self.last_equity - 0.5)
+
+    def street_dealt(self, board: List[Card], pot: int, engine: Optional[PokerEngine] = None,
+                     players: Optional[Dict[str, Agent]] = None) -> float:
+        """
+        Correction for the board cards just dealt, with pot the chips in the middle before they came
+
+        Given the engine they were dealt on and the agents in its seats, a
+        river is valued with the look-ahead over its betting if both agents
+        state their policies.
+        """
+        equity = self.equity(cards_to_array(board))
+        correction = None
+        if engine is not None and players is not None and engine.street == Street.RIVER:
+            correction = self._river_correction(engine, players, equity)
+        if correction is None:
+            correction = pot * (equity - self.last_equity)
+        self.last_equity = equity
+        return correction
+
+    def decision(self, engine: PokerEngine, players: Dict[str, Agent], seat: str) -> Optional[Dict[Action, float]]:
+        """
+        Correction for each action the agent at seat might take now
+
+        None when its play here isn't random (the correction is zero) or
+        either agent's policy is unknown. Ask before the agent acts: the
+        policy may compute what act then reuses, never the other way round.
+        """
+        policy = players[seat].policy(SeatView(engine, seat))
+        if policy is None or len(policy) < 2:
+            return None
+        values = {}
+        for action in policy:
+            values[action] = self._round_value(_after(engine, seat, action), players, self.last_equity, engine.street)
+            if values[action] is None:
+                return None
+        expected = sum(p * values[action] for action, p in policy.items())
+        return {action: value - expected for action, value in values.items()}
+
+    def _river_correction(self, engine: PokerEngine, players: Dict[str, Agent], equity: float) -> Optional[float]:
+        """River look-ahead value of the card that came minus its mean over every card that could have"""
+        actual = self._round_value(engine, players, equity, Street.RIVER)
+        if actual is None:
+            return None
+        turn = cards_to_array(engine.community_cards[:-1])
+        values = []
+        for card in remaining_deck(np.concatenate([self.user, self.bot, turn])):
+            branch = _branch(engine)
+            branch.community_cards[-1] = int_to_card(int(card))
+            value = self._round_value(branch, players, self.equity(np.append(turn, card)), Street.RIVER)
+            if value is None:
+                return None
+            values.append(value)
+        return actual - float(np.mean(values))
+
+    def _round_value(self, engine: PokerEngine, players: Dict[str, Agent], equity: float,
+                     street: Street) -> Optional[float]:
+        """
+        Expected value of the state over the rest of street's betting, with
+        equity the user's equity on that street's board; None if a policy
+        it needs is unknown
+        """
+        if engine.hand_over or engine.street != street:
+            invested = 100 - engine.user_stack
+            if engine.winner == "user":
+                return engine.pot - invested
+            if engine.winner == "tie":
+                return engine.pot / 2 - invested
+            if engine.winner == "bot":
+                return -invested
+            # The round ended with the hand still going: value it by the round's equity
+            return engine.pot * equity - invested
+
+        seat = engine._get_next_active_player()
+        policy = players[seat].policy(SeatView(engine, seat))
+        if policy is None:
+            return None
+        value = 0.0
+        for action, p in policy.items():
+            action_value = self._round_value(_after(engine, seat, action), players, equity, street)
+            if action_value is None:
+                return None
+            value += p * action_value
+        return value
+
+    def equity(self, board: np.ndarray) -> float:
+        """User's share of the pot at showdown against the bot's cards (ties split)"""
+        deck = remaining_deck(np.concatenate([self.user, self.bot, board]))
+        missing = 5 - len(board)
+        if missing == 0:
+            runouts = np.empty((1, 0), dtype=deck.dtype)
+        elif missing == 1:
+            runouts = deck[:, np.newaxis]
+        elif missing == 2:
+            first, second = np.triu_indices(len(deck), k=1)
+            runouts = np.stack([deck[first], deck[second]], axis=1)
+        else:
+            order = np.argsort(self.rng.random((self.num_samples, len(deck))), axis=1)[:, :missing]
+            runouts = deck[order]
+
+        boards = np.concatenate([np.broadcast_to(board, (len(runouts), len(board))), runouts], axis=1)
+        user_scores = self.evaluator.evaluate_batch(
+            np.concatenate([np.broadcast_to(self.user, (len(boards), 2)), boards], axis=1)
+        )
+        bot_scores = self.evaluator.evaluate_batch(
+            np.concatenate([np.broadcast_to(self.bot, (len(boards), 2)), boards], axis=1)
+        )
+        return float(np.mean((user_scores > bot_scores) + 0.5 * (user_scores == bot_scores)))
+
+
+def _branch(engine: PokerEngine) -> PokerEngine:
+    """A copy of the engine's hand that can be played on without touching the original"""
+    branch = copy.copy(engine)
+    branch.deck = copy.copy(engine.deck)
+    branch.deck.cards = list(engine.deck.cards)
+    branch.community_cards = list(engine.community_cards)
+    branch.action_history = list(engine.action_history)
+    branch.action_streets = list(engine.action_streets)
+    return branch
+
+
+def _after(engine: PokerEngine, seat: str, action: Action) -> PokerEngine:
+    """A branch of the engine with seat's action applied"""
+    branch = _branch(engine)
+    branch.process_action(action[0], action[1], seat)
+    return branch
@@ -1,5 +1,8 @@
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Optional
 from ..models.game_models import Card, ActionType, StrategyRecommendation, PlayerAction, Street
+from ..game.range_equity import HandRange, RangeEquityEngine, class_strength_tiers
+from .decision_context import DecisionContext
 
 class BayesianStrategy:
     def __init__(self):
@@ -8,6 +11,11 @@ class BayesianStrategy:
         self.prior_strong = 0.25  # 25% chance opponent has strong hand initially
         self.prior_medium = 0.50  # 50% chance opponent has medium hand
         self.prior_weak = 0.25    # 25% chance opponent has weak hand
+        
+        # Starting-hand classes split into weak/medium/strong tiers matching the
+        # priors, so the posterior can be turned into a weighted opponent range
+        self.class_tiers = class_strength_tiers([self.prior_weak, self.prior_medium, self.prior_strong])
+        self.range_engine = RangeEquityEngine(num_samples=1000)
     
     def calculate_recommendation(self, 
                                player_cards: List[Card], 
@@ -16,11 +24,16 @@ class BayesianStrategy:
                                to_call: int, 
                                player_stack: int,
                                action_history: List[PlayerAction],
-                               street: Street) -> StrategyRecommendation:
+                               street: Street,
+                               context: Optional[DecisionContext] = None) -> StrategyRecommendation:
         """
         Apply Bayesian updating based on opponent's actions to estimate their hand strength
         """
         
+        if context is None:
+            context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack,
+                                      action_history, street)
+        
         # Update beliefs based on opponent's actions
         posterior_probs = self._update_beliefs(action_history, street)
         
@@ -28,12 +41,14 @@ class BayesianStrategy:
         prob_medium = posterior_probs["medium"] 
         prob_weak = posterior_probs["weak"]
         
+        # Our equity against the opponent's posterior range
+        our_strength = self._estimate_our_hand_strength(context, posterior_probs)
+        
         # Make decision based on updated probabilities
         if prob_strong > 0.6:
             # Opponent likely has strong hand
             if to_call > 0:
                 # Check if we have strong hand too
-                our_strength = self._estimate_our_hand_strength(player_cards, community_cards)
                 if our_strength > 0.8:
                     recommended_action = ActionType.CALL
                     decision_reason = "Opponent likely strong, but we have very strong hand"
@@ -59,7 +74,6 @@ class BayesianStrategy:
             # Uncertain about opponent strength
             if to_call > 0:
                 pot_odds = pot_size / (pot_size + to_call) if (pot_size + to_call) > 0 else 0
-                our_strength = self._estimate_our_hand_strength(player_cards, community_cards)
                 if our_strength > pot_odds + 0.1:  # Need some margin
                     recommended_action = ActionType.CALL
                     decision_reason = "Uncertain opponent strength - call with decent hand"
@@ -72,6 +86,7 @@ class BayesianStrategy:
         
         # Build calculation steps showing Bayesian updating
         calculation_steps = self._build_calculation_steps(action_history, posterior_probs)
+        calculation_steps.append(f"Our equity vs posterior range: {our_strength:.3f}")
         
         explanation = f"Bayesian analysis estimates opponent has strong hand {prob_strong:.1%}, medium hand {prob_medium:.1%}, weak hand {prob_weak:.1%}. {decision_reason}."
         
@@ -82,7 +97,8 @@ class BayesianStrategy:
             "posterior_strong": f"{prob_strong:.1%}",
             "posterior_medium": f"{prob_medium:.1%}",
             "posterior_weak": f"{prob_weak:.1%}",
-            "most_likely": self._get_most_likely_hand_type(posterior_probs)
+            "most_likely": self._get_most_likely_hand_type(posterior_probs),
+            "equity_vs_range": f"{our_strength:.3f}"
         }
         
         confidence = max(prob_strong, prob_medium, prob_weak)
@@ -160,8 +176,27 @@ class BayesianStrategy:
             # Default neutral likelihoods
             return {"strong": 0.33, "medium": 0.33, "weak": 0.33}
     
-    def _estimate_our_hand_strength(self, player_cards: List[Card], community_cards: List[Card]) -> float:
-        """Estimate strength of our own hand (0-1 scale)"""
+    def _estimate_our_hand_strength(self, context: DecisionContext, posterior_probs: Dict[str, float]) -> float:
+        """Estimate strength of our own hand (0-1 scale) as equity vs the posterior range"""
+        if self.class_tiers is None:
+            return self._heuristic_hand_strength(context.player_cards, context.community_cards)
+        
+        outcomes = self.range_engine.outcomes(
+            context.player_array, context.board_array, self._posterior_range(posterior_probs)
+        )
+        return self.range_engine.evaluator.equity_from_outcomes(outcomes)
+    
+    def _posterior_range(self, posterior_probs: Dict[str, float]) -> HandRange:
+        """Reweight each strength tier of the opponent's range by posterior / prior"""
+        tier_weights = np.array([
+            posterior_probs["weak"] / self.prior_weak,
+            posterior_probs["medium"] / self.prior_medium,
+            posterior_probs["strong"] / self.prior_strong
+        ])
+        return HandRange.from_class_weights(tier_weights[self.class_tiers])
+    
+    def _heuristic_hand_strength(self, player_cards: List[Card], community_cards: List[Card]) -> float:
+        """Heuristic strength of our own hand (used if the preflop table is missing)"""
         # Simple heuristic based on card ranks and pairs
         ranks = [card.rank for card in player_cards]
         rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
@@ -0,0 +1,144 @@
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from ..models.game_models import Card, PlayerAction, Street
+from ..game.hand_evaluator import HandEvaluator, cards_to_array
+from ..game.lookup_evaluator import get_lookup_evaluator
+from ..game.preflop_equity import hand_class_index, hand_class_name
+from ..game.poker_engine import PokerEngine
+
+RANK_VALUES = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
+               '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
+
+_evaluator = get_lookup_evaluator()
+
+# Equity for contexts built outside StrategyEngine, created on first use
+_equity_engine: Optional[PokerEngine] = None
+
+
+def outcome_equity(outcomes: Dict[str, int]) -> Tuple[float, float]:
+    """
+    Equity of win/tie/loss counts (a tie is half a win) and its standard error
+
+    Each trial scores 1, 1/2 or 0, so the variance comes from the counts
+    rather than the binomial p(1 - p).
+    """
+    trials = outcomes["wins"] + outcomes["ties"] + outcomes["losses"]
+    equity = (outcomes["wins"] + 0.5 * outcomes["ties"]) / trials
+    variance = max(0.0, (outcomes["wins"] + 0.25 * outcomes["ties"]) / trials - equity * equity)
+    return equity, math.sqrt(variance / trials)
+
+
+class DecisionContext:
+    """
+    Everything the strategies need to know about one decision, computed once
+
+    The card features (integer encodings, rank/suit counts, made hand,
+    board texture) are derived in the constructor. StrategyEngine
+    fills in the expensive parts - exact equity and the Monte Carlo run -
+    and records how long each stage of the overlay took in timings.
+    """
+
+    def __init__(self,
+                 player_cards: List[Card],
+                 community_cards: List[Card],
+                 pot_size: int,
+                 to_call: int,
+                 player_stack: int,
+                 action_history: Optional[List[PlayerAction]] = None,
+                 street: Optional[Street] = None):
+        self.player_cards = player_cards
+        self.community_cards = community_cards
+        self.pot_size = pot_size
+        self.to_call = to_call
+        self.player_stack = player_stack
+        self.action_history = action_history or []
+        self.street = street
+
+        # Integer encodings (rank_index * 4 + suit_index)
+        self.player_array = cards_to_array(player_cards)
+        self.board_array = cards_to_array(community_cards)
+
+        # Rank values 2-14
+        self.hole_values = [RANK_VALUES[card.rank] for card in player_cards]
+        self.board_values = [RANK_VALUES[card.rank] for card in community_cards]
+        self.is_pair = self.hole_values[0] == self.hole_values[1]
+        self.is_suited = player_cards[0].suit == player_cards[1].suit
+        self.preflop_class = hand_class_name(hand_class_index(int(self.player_array[0]), int(self.player_array[1])))
+
+        # Rank counts over hole + board cards, suit counts over the board
+        self.rank_counts: Dict[int, int] = {}
+        for value in self.hole_values + self.board_values:
+            self.rank_counts[value] = self.rank_counts.get(value, 0) + 1
+        self.board_suit_counts: Dict[str, int] = {}
+        for card in community_cards:
+            self.board_suit_counts[card.suit] = self.board_suit_counts.get(card.suit, 0) + 1
+
+        # Made hand, once there are at least five cards (GTO's postflop strength)
+        self.hand_score: Optional[int] = None
+        self.hand_category: Optional[str] = None
+        if len(community_cards) >= 3:
+            self.hand_score = _evaluator.evaluate(list(self.player_array) + list(self.board_array))
+            self.hand_category = HandEvaluator.category_name(self.hand_score)
+
+        self.board_max_suit, self.board_straight_potential, self.board_texture = self._board_texture()
+
+        # Filled in by StrategyEngine
+        self.equity: Optional[float] = None
+        self.simulation: Optional[Dict[str, int]] = None
+        # False if the Monte Carlo run was cut short by a deadline
+        self.simulation_complete = True
+        self.timings: Dict[str, float] = {}
+
+    def _board_texture(self) -> Tuple[int, bool, str]:
+        """Flush and straight potential of the board, classified dry/wet"""
+        if len(self.community_cards) < 3:
+            return 0, False, "unknown"
+
+        max_suit_count = max(self.board_suit_counts.values())
+
+        values = sorted(self.board_values)
+        has_straight_potential = any(values[i + 2] - values[i] <= 4 for i in range(len(values) - 2))
+
+        texture = "wet" if max_suit_count >= 3 or has_straight_potential else "dry"
+        return max_suit_count, has_straight_potential, texture
+
+    def hand_equity(self) -> float:
+        """Equity against a random hand; computed here if StrategyEngine hasn't filled it in"""
+        global _equity_engine
+        if self.equity is None:
+            if _equity_engine is None:
+                _equity_engine = PokerEngine()
+            self.equity = _equity_engine.get_hand_equity(self.player_cards, self.community_cards)
+        return self.equity
+
+    @property
+    def simulation_trials(self) -> int:
+        if self.simulation is None:
+            return 0
+        return self.simulation["wins"] + self.simulation["ties"] + self.simulation["losses"]
+
+    @property
+    def simulation_equity(self) -> float:
+        """Monte Carlo equity, with ties counted as half a win"""
+        return outcome_equity(self.simulation)[0] if self.simulation_trials > 0 else 0.5
+
+    @property
+    def simulation_std_error(self) -> float:
+        return outcome_equity(self.simulation)[1] if self.simulation_trials > 0 else 0.5
+
+    @property
+    def simulation_ci(self) -> Tuple[float, float]:
+        """95% confidence interval of the Monte Carlo equity"""
+        p, half_width = self.simulation_equity, 1.96 * self.simulation_std_error
+        return max(0.0, p - half_width), min(1.0, p + half_width)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Record the wall time of one stage of the overlay computation"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.perf_counter() - start
@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..models.game_models import Card, ActionType, StrategyRecommendation
+from .decision_context import DecisionContext
 
 class EVStrategy:
     def __init__(self):
@@ -11,7 +12,8 @@ class EVStrategy:
                                pot_size: int, 
                                to_call: int, 
                                player_stack: int,
-                               equity: float) -> StrategyRecommendation:
+                               equity: Optional[float] = None,
+                               context: Optional[DecisionContext] = None) -> StrategyRecommendation:
         """
         Calculate Expected Value recommendation
         
@@ -20,6 +22,12 @@ class EVStrategy:
         EV(Bet) = P_opponent_folds * pot + P_opponent_calls * [P_win * (pot + bet) - P_lose * bet]
         """
         
+        # Shared per-decision equity when called from StrategyEngine
+        if equity is None:
+            if context is None:
+                context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack)
+            equity = context.hand_equity()
+        
         # Calculate EV for different actions
         p_win = equity
         p_lose = 1 - p_win
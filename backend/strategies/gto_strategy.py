@@ -1,5 +1,7 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from ..models.game_models import Card, ActionType, StrategyRecommendation, Street
+from ..game.hand_evaluator import HandEvaluator, ONE_PAIR, TWO_PAIR
+from .decision_context import DecisionContext
 
 class GTOStrategy:
     def __init__(self):
@@ -15,15 +17,19 @@ class GTOStrategy:
                                to_call: int, 
                                player_stack: int,
                                street: Street,
-                               position: str = "BB") -> StrategyRecommendation:
+                               position: str = "BB",
+                               context: Optional[DecisionContext] = None) -> StrategyRecommendation:
         """
         Get GTO recommendation based on precomputed optimal strategies
         """
         
+        if context is None:
+            context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack, street=street)
+        
         if street == Street.PREFLOP:
-            gto_strategy = self._get_preflop_strategy(player_cards, to_call, position)
+            gto_strategy = self._get_preflop_strategy(context, to_call, position)
         else:
-            gto_strategy = self._get_postflop_strategy(player_cards, community_cards, to_call, street)
+            gto_strategy = self._get_postflop_strategy(context, to_call, street)
         
         # GTO often provides mixed strategies (frequencies)
         frequencies = gto_strategy["frequencies"]
@@ -120,9 +126,9 @@ class GTOStrategy:
             confidence=confidence
         )
     
-    def _get_preflop_strategy(self, player_cards: List[Card], to_call: int, position: str) -> Dict[str, Any]:
+    def _get_preflop_strategy(self, context: DecisionContext, to_call: int, position: str) -> Dict[str, Any]:
         """Get preflop GTO strategy based on hand strength"""
-        hand_category = self._categorize_preflop_hand(player_cards)
+        hand_category = self._categorize_preflop_hand(context)
         
         # Simplified GTO preflop ranges
         if to_call > 0:  # Facing a raise
@@ -155,11 +161,10 @@ class GTOStrategy:
             "hand_category": hand_category
         }
     
-    def _get_postflop_strategy(self, player_cards: List[Card], community_cards: List[Card], 
-                             to_call: int, street: Street) -> Dict[str, Any]:
+    def _get_postflop_strategy(self, context: DecisionContext, to_call: int, street: Street) -> Dict[str, Any]:
         """Get postflop GTO strategy (simplified)"""
-        hand_strength = self._evaluate_postflop_hand(player_cards, community_cards)
-        board_texture = self._analyze_board_texture(community_cards)
+        hand_strength = self._evaluate_postflop_hand(context)
+        board_texture = context.board_texture
         
         # Simplified postflop GTO decisions
         if to_call > 0:  # Facing a bet
@@ -198,7 +203,7 @@ class GTOStrategy:
                 frequencies["bet"] *= 1.2
                 frequencies["check"] = max(0, 1 - frequencies["bet"])
         
-        hand_category = f"{hand_strength:.1f} strength on {board_texture} board"
+        hand_category = f"{context.hand_category.lower()}, {hand_strength:.1f} strength on {board_texture} board"
         
         return {
             "frequencies": frequencies,
@@ -206,17 +211,11 @@ class GTOStrategy:
             "hand_category": hand_category
         }
     
-    def _categorize_preflop_hand(self, cards: List[Card]) -> str:
+    def _categorize_preflop_hand(self, context: DecisionContext) -> str:
         """Categorize preflop hand strength"""
-        ranks = [card.rank for card in cards]
-        suits = [card.suit for card in cards]
-        
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                      '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        
-        values = [rank_values[rank] for rank in ranks]
-        is_suited = suits[0] == suits[1]
-        is_pair = values[0] == values[1]
+        values = context.hole_values
+        is_suited = context.is_suited
+        is_pair = context.is_pair
         
         if is_pair:
             if values[0] >= 11:  # JJ+
@@ -244,66 +243,19 @@ class GTOStrategy:
         
         return "weak"
     
-    def _evaluate_postflop_hand(self, player_cards: List[Card], community_cards: List[Card]) -> float:
-        """Simplified postflop hand evaluation (0-1 scale)"""
-        # Very basic implementation - in reality would use proper hand evaluation
-        all_cards = player_cards + community_cards
-        ranks = [card.rank for card in all_cards]
-        suits = [card.suit for card in all_cards]
-        
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                      '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
+    def _evaluate_postflop_hand(self, context: DecisionContext) -> float:
+        """Simplified postflop hand strength (0-1 scale) from the made hand's category"""
+        category = HandEvaluator.get_category(context.hand_score)
         
-        values = [rank_values[rank] for rank in ranks]
-        
-        # Check for pairs, two pairs, etc. (simplified)
-        value_counts = {}
-        for value in values:
-            value_counts[value] = value_counts.get(value, 0) + 1
-        
-        pairs = [v for v, count in value_counts.items() if count >= 2]
-        
-        if len(pairs) >= 2:  # Two pair or better
+        if category >= TWO_PAIR:  # Two pair or better, straights and flushes included
             return 0.8
-        elif len(pairs) == 1:  # One pair
-            return 0.6 if max(pairs) >= 10 else 0.4
+        elif category == ONE_PAIR:
+            pair = max(v for v, count in context.rank_counts.items() if count >= 2)
+            return 0.6 if pair >= 10 else 0.4
         else:  # High card
+            values = context.hole_values + context.board_values
             return (max(values) - 2) / 12 * 0.3  # Max 0.3 for high card
     
-    def _analyze_board_texture(self, community_cards: List[Card]) -> str:
-        """Analyze board texture (dry/wet)"""
-        if len(community_cards) < 3:
-            return "unknown"
-        
-        ranks = [card.rank for card in community_cards]
-        suits = [card.suit for card in community_cards]
-        
-        # Check for flush possibilities
-        suit_counts = {}
-        for suit in suits:
-            suit_counts[suit] = suit_counts.get(suit, 0) + 1
-        
-        max_suit_count = max(suit_counts.values()) if suit_counts else 0
-        
-        # Check for straight possibilities
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                      '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        
-        values = sorted([rank_values[rank] for rank in ranks])
-        has_straight_potential = False
-        
-        if len(values) >= 3:
-            for i in range(len(values) - 2):
-                if values[i+2] - values[i] <= 4:  # Within 4 ranks
-                    has_straight_potential = True
-                    break
-        
-        # Classify board
-        if max_suit_count >= 3 or has_straight_potential:
-            return "wet"
-        else:
-            return "dry"
-    
     def _get_gto_bet_size(self, pot_size: int, player_stack: int, street: Street) -> int:
         """Get GTO bet sizing"""
         # Simplified GTO bet sizes
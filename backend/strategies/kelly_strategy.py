@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..models.game_models import Card, ActionType, StrategyRecommendation
+from .decision_context import DecisionContext
 
 class KellyStrategy:
     def __init__(self):
@@ -11,7 +12,8 @@ class KellyStrategy:
                                pot_size: int, 
                                to_call: int, 
                                player_stack: int,
-                               equity: float) -> StrategyRecommendation:
+                               equity: Optional[float] = None,
+                               context: Optional[DecisionContext] = None) -> StrategyRecommendation:
         """
         Apply Kelly Criterion for optimal bet sizing
         
@@ -23,6 +25,12 @@ class KellyStrategy:
         - q = probability of losing (1 - p)
         """
         
+        # Shared per-decision equity when called from StrategyEngine
+        if equity is None:
+            if context is None:
+                context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack)
+            equity = context.hand_equity()
+        
         p_win = equity
         p_lose = 1 - p_win
         
@@ -89,7 +97,7 @@ class KellyStrategy:
                 if bet_fraction > call_fraction * 1.5:  # Significantly higher Kelly for betting
                     recommended_action = ActionType.RAISE
                     optimal_bet = min(bet_kelly.get("amount", bet_size), player_stack)
-                    recommended_amount = max(to_call + pot_size // 2, optimal_bet)
+                    recommended_amount = max(to_call + pot_size // 2, int(optimal_bet))
                     decision_reason = f"Kelly strongly favors raising (optimal fraction: {bet_fraction:.1%})"
             else:
                 # Kelly doesn't support calling
@@ -103,7 +111,7 @@ class KellyStrategy:
             
             if bet_fraction > 0.05:  # At least 5% of stack justified
                 recommended_action = ActionType.BET
-                recommended_amount = min(bet_kelly.get("amount", bet_size), player_stack)
+                recommended_amount = min(int(bet_kelly.get("amount", bet_size)), player_stack)
                 decision_reason = f"Kelly supports betting {bet_fraction:.1%} of stack"
             else:
                 recommended_action = ActionType.CHECK
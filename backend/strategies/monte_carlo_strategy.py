@@ -1,50 +1,87 @@
-import random
-from typing import List, Dict, Any
+import math
+import time
+import numpy as np
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from ..models.game_models import Card, ActionType, StrategyRecommendation
-from ..game.poker_engine import PokerEngine
+from ..game.hand_evaluator import cards_to_array
+from ..game.canonical import canonical_key, simulation_cache
+from .simulation_backend import SerialBackend
+from .decision_context import DecisionContext, outcome_equity
 
 class MonteCarloStrategy:
-    def __init__(self, num_simulations: int = 1000):
+    def __init__(self, num_simulations: int = 1000, seed: Optional[int] = None,
+                 adaptive: bool = False, target_std_error: float = 0.01,
+                 batch_size: int = 250, max_simulations: int = 20000,
+                 backend=None):
         self.name = "Monte Carlo Simulation"
         self.num_simulations = num_simulations
-        self.poker_engine = PokerEngine()
+        
+        # Where trials run: SerialBackend or ProcessPoolBackend
+        self.backend = backend or SerialBackend(seed)
+        
+        # Adaptive mode: simulate in batches until the equity standard error
+        # drops below target_std_error or max_simulations is reached
+        self.adaptive = adaptive
+        self.target_std_error = target_std_error
+        self.batch_size = batch_size
+        self.max_simulations = max_simulations
+        self.simulation_cache = simulation_cache
     
     def calculate_recommendation(self, 
                                player_cards: List[Card], 
                                community_cards: List[Card],
                                pot_size: int, 
                                to_call: int, 
-                               player_stack: int) -> StrategyRecommendation:
+                               player_stack: int,
+                               context: Optional[DecisionContext] = None,
+                               deadline: Optional[float] = None,
+                               on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> StrategyRecommendation:
         """
         Run Monte Carlo simulation to estimate win probability and make recommendations
+        
+        In adaptive mode, simulation stops at deadline (a time.perf_counter()
+        value) if the target standard error hasn't been reached by then, and
+        the recommendation is flagged as degraded. on_progress, if given, is
+        called with the running estimate after every batch of an adaptive run.
         """
         
-        # Run simulations
-        simulation_results = self._run_simulations(player_cards, community_cards)
+        if context is None:
+            context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack)
+        
+        # Run simulations (once per decision; the context keeps the results)
+        if context.simulation is None:
+            context.simulation, context.simulation_complete = self._run_simulations(
+                player_cards, community_cards, deadline, on_progress
+            )
         
-        wins = simulation_results["wins"]
-        ties = simulation_results["ties"]
-        losses = simulation_results["losses"]
-        total = wins + ties + losses
+        wins = context.simulation["wins"]
+        ties = context.simulation["ties"]
+        losses = context.simulation["losses"]
+        total = context.simulation_trials
         
         win_percentage = (wins / total) * 100 if total > 0 else 50.0
         tie_percentage = (ties / total) * 100 if total > 0 else 0.0
         loss_percentage = (losses / total) * 100 if total > 0 else 50.0
         
-        # Use win probability for decision making
-        equity = wins / total if total > 0 else 0.5
+        # Equity (ties count half) drives the decision, and is what the
+        # standard error and the confidence below are measured on
+        equity = context.simulation_equity
+        
+        # Standard error and 95% confidence interval of the estimate
+        std_error = context.simulation_std_error
+        ci_low, ci_high = context.simulation_ci
         
         # Apply simple decision rules based on simulation results
-        if win_percentage >= 70:
+        if equity >= 0.70:
             if to_call > 0:
-                recommended_action = ActionType.RAISE if win_percentage >= 80 else ActionType.CALL
+                recommended_action = ActionType.RAISE if equity >= 0.80 else ActionType.CALL
                 recommended_amount = min(pot_size, player_stack) if recommended_action == ActionType.RAISE else None
                 decision_reason = "Strong favorite - aggressive play recommended"
             else:
                 recommended_action = ActionType.BET
                 recommended_amount = min(pot_size, player_stack)
                 decision_reason = "Strong favorite - bet for value"
-        elif win_percentage >= 45:
+        elif equity >= 0.45:
             if to_call > 0:
                 # Check pot odds
                 pot_odds = pot_size / (pot_size + to_call) if (pot_size + to_call) > 0 else 0
@@ -63,16 +100,18 @@ class MonteCarloStrategy:
         else:
             recommended_action = ActionType.FOLD if to_call > 0 else ActionType.CHECK
             recommended_amount = None
-            decision_reason = "Poor win rate - avoid investing more"
+            decision_reason = "Poor equity - avoid investing more"
         
         # Build calculation steps
         calculation_steps = [
-            f"Ran {self.num_simulations} Monte Carlo simulations",
+            f"Ran {total} Monte Carlo simulations",
             f"Results: {wins} wins, {ties} ties, {losses} losses",
             f"Win rate: {win_percentage:.1f}%",
             f"Tie rate: {tie_percentage:.1f}%", 
             f"Loss rate: {loss_percentage:.1f}%",
             f"Equity: {equity:.3f}",
+            f"Standard error over {total} trials: {std_error:.4f}",
+            f"95% CI: [{ci_low:.3f}, {ci_high:.3f}]",
             decision_reason
         ]
         
@@ -81,132 +120,120 @@ class MonteCarloStrategy:
             calculation_steps.append(f"Pot odds: {pot_odds:.3f} ({pot_odds*100:.1f}%)")
             calculation_steps.append(f"Equity vs Pot Odds: {equity:.3f} vs {pot_odds:.3f}")
         
-        explanation = f"Monte Carlo simulation of {self.num_simulations} random outcomes shows you win {win_percentage:.1f}% of the time. {decision_reason}."
+        explanation = f"Monte Carlo simulation of {total} random outcomes shows you win {win_percentage:.1f}% of the time, for {equity * 100:.1f}% equity (±{1.96 * std_error * 100:.1f}%). {decision_reason}."
         
         variables = {
-            "simulations": str(self.num_simulations),
+            "simulations": str(total),
             "wins": str(wins),
             "ties": str(ties), 
             "losses": str(losses),
             "win_percentage": f"{win_percentage:.1f}%",
             "equity": f"{equity:.3f}",
-            "pot_odds": f"{pot_size / (pot_size + to_call):.3f}" if to_call > 0 else "N/A"
+            "pot_odds": f"{pot_size / (pot_size + to_call):.3f}" if to_call > 0 else "N/A",
+            "std_error": f"{std_error:.4f}",
+            "confidence_interval": f"[{ci_low:.3f}, {ci_high:.3f}]",
+            "mode": ("adaptive" if context.simulation_complete else "adaptive (stopped at deadline)")
+                    if self.adaptive else "fixed"
         }
         
-        confidence = self._calculate_confidence(win_percentage, total)
+        # Decision boundaries the equity estimate is compared against
+        thresholds = [0.45, 0.70]
+        if to_call > 0:
+            thresholds.extend([0.80, pot_size / (pot_size + to_call)])
+        confidence = self._calculate_confidence(equity, std_error, thresholds)
         
         return StrategyRecommendation(
             strategy_name=self.name,
             recommended_action=recommended_action,
             recommended_amount=recommended_amount,
             explanation=explanation,
-            formula=f"Run {self.num_simulations} random simulations of remaining cards and count wins/losses",
+            formula=f"Run {total} random simulations of remaining cards and count wins/losses",
             variables=variables,
             calculation_steps=calculation_steps,
-            confidence=confidence
+            confidence=confidence,
+            degraded=not context.simulation_complete
         )
     
-    def _run_simulations(self, player_cards: List[Card], community_cards: List[Card]) -> Dict[str, int]:
-        """Run Monte Carlo simulations"""
-        wins = 0
-        ties = 0
-        losses = 0
-        
-        # Get remaining cards
-        used_cards = set()
-        for card in player_cards + community_cards:
-            used_cards.add((card.rank, card.suit))
-        
-        # Create deck of remaining cards
-        remaining_cards = []
-        for suit in ['h', 'd', 'c', 's']:
-            for rank in ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']:
-                if (rank, suit) not in used_cards:
-                    remaining_cards.append(Card(rank=rank, suit=suit))
-        
-        # Run simulations
-        for _ in range(self.num_simulations):
-            # Shuffle remaining cards
-            random.shuffle(remaining_cards)
-            
-            # Deal opponent cards
-            opponent_cards = remaining_cards[:2]
-            deck_pos = 2
-            
-            # Complete the board if needed
-            sim_community = community_cards.copy()
-            cards_needed = 5 - len(community_cards)
-            
-            if cards_needed > 0:
-                sim_community.extend(remaining_cards[deck_pos:deck_pos + cards_needed])
-            
-            # Evaluate hands
-            result = self._compare_hands(player_cards, opponent_cards, sim_community)
-            
-            if result == 1:
-                wins += 1
-            elif result == 0:
-                ties += 1
-            else:
-                losses += 1
+    def _run_simulations(self, player_cards: List[Card], community_cards: List[Card],
+                         deadline: Optional[float] = None,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[Dict[str, int], bool]:
+        """
+        Run Monte Carlo simulations as vectorized batches, reusing results for
+        isomorphic spots. Returns the outcome counts and whether the run
+        completed; runs cut short by the deadline aren't cached.
+        """
+        if self.adaptive:
+            key = (canonical_key(player_cards, community_cards), "adaptive",
+                   self.target_std_error, self.batch_size, self.max_simulations)
+        else:
+            key = (canonical_key(player_cards, community_cards), self.num_simulations)
+        
+        results = self.simulation_cache.get(key)
+        if results is not None:
+            return dict(results), True
         
-        return {"wins": wins, "ties": ties, "losses": losses}
+        results, complete = self._simulate(cards_to_array(player_cards), cards_to_array(community_cards),
+                                           deadline, on_progress)
+        if complete:
+            self.simulation_cache.put(key, results)
+        return dict(results), complete
     
-    def _compare_hands(self, player_cards: List[Card], opponent_cards: List[Card], 
-                      community_cards: List[Card]) -> int:
-        """Compare two hands. Returns 1 if player wins, 0 for tie, -1 if opponent wins"""
-        try:
-            # Convert to deuces format
-            player_deuces = [self.poker_engine._card_to_deuces(card) for card in player_cards]
-            opponent_deuces = [self.poker_engine._card_to_deuces(card) for card in opponent_cards]
-            board_deuces = [self.poker_engine._card_to_deuces(card) for card in community_cards]
-            
-            # Evaluate hands (lower score is better in deuces)
-            player_score = self.poker_engine.evaluator.evaluate(board_deuces, player_deuces)
-            opponent_score = self.poker_engine.evaluator.evaluate(board_deuces, opponent_deuces)
+    def _simulate(self, player: np.ndarray, board: np.ndarray, deadline: Optional[float] = None,
+                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[Dict[str, int], bool]:
+        """
+        Fixed mode runs one batch; adaptive mode stops once the standard error
+        is small enough, or with what it has when another round would run
+        past the deadline (so the result is ready by the deadline, not just after it)
+        """
+        if not self.adaptive:
+            return self.backend.run(player, board, self.num_simulations), True
+        
+        # Each round gives every backend worker one batch, and at least as
+        # many trials as the backend needs to use all of its workers
+        round_size = max(self.batch_size, self.backend.min_trials_per_worker) * self.backend.num_workers
+        
+        totals = {"wins": 0, "ties": 0, "losses": 0}
+        trials = 0
+        while trials < self.max_simulations:
+            batch = min(round_size, self.max_simulations - trials)
+            round_start = time.perf_counter()
+            outcomes = self.backend.run(player, board, batch)
+            round_end = time.perf_counter()
+            for outcome, count in outcomes.items():
+                totals[outcome] += count
+            trials += batch
             
-            if player_score < opponent_score:
-                return 1  # Player wins
-            elif player_score > opponent_score:
-                return -1  # Opponent wins
-            else:
-                return 0  # Tie
-        except:
-            # Fallback to simple comparison if deuces fails
-            return self._simple_hand_compare(player_cards, opponent_cards, community_cards)
+            equity, std_error = outcome_equity(totals)
+            if on_progress is not None:
+                on_progress(self._progress(totals, trials, equity, std_error))
+            if std_error <= self.target_std_error:
+                break
+            if deadline is not None and time.perf_counter() + (round_end - round_start) >= deadline:
+                return totals, False
+        
+        return totals, True
     
-    def _simple_hand_compare(self, player_cards: List[Card], opponent_cards: List[Card], 
-                           community_cards: List[Card]) -> int:
-        """Simplified hand comparison fallback"""
-        # Very basic comparison - just compare high cards
-        player_ranks = [self._rank_value(card.rank) for card in player_cards]
-        opponent_ranks = [self._rank_value(card.rank) for card in opponent_cards]
-        
-        player_high = max(player_ranks)
-        opponent_high = max(opponent_ranks)
-        
-        if player_high > opponent_high:
-            return 1
-        elif opponent_high > player_high:
-            return -1
-        else:
-            return 0
-    
-    def _rank_value(self, rank: str) -> int:
-        """Convert rank to numeric value"""
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                      '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        return rank_values.get(rank, 0)
+    def _progress(self, totals: Dict[str, int], trials: int, equity: float, std_error: float) -> Dict[str, Any]:
+        """Running estimate of an adaptive run, with its 95% confidence interval"""
+        return {
+            **totals,
+            "trials": trials,
+            "equity": equity,
+            "std_error": std_error,
+            "ci_low": max(0.0, equity - 1.96 * std_error),
+            "ci_high": min(1.0, equity + 1.96 * std_error),
+            "target_std_error": self.target_std_error
+        }
     
-    def _calculate_confidence(self, win_percentage: float, total_simulations: int) -> float:
-        """Calculate confidence based on sample size and result clarity"""
-        # Higher confidence for more simulations and more extreme results
-        base_confidence = min(0.95, 0.6 + (total_simulations / 2000))
-        
-        # Adjust based on how clear the result is
-        if win_percentage > 80 or win_percentage < 20:
-            return min(0.95, base_confidence + 0.2)
-        elif win_percentage > 70 or win_percentage < 30:
-            return min(0.9, base_confidence + 0.1)
-        else:
-            return base_confidence 
\ No newline at end of file
+    def _calculate_confidence(self, equity: float, std_error: float, thresholds: List[float]) -> float:
+        """
+        Probability that the true equity lies on the same side of the nearest
+        decision threshold as the estimate, from the normal approximation
+        """
+        distance = min(abs(equity - threshold) for threshold in thresholds)
+        if std_error <= 0:
+            return 0.99
+        
+        z = distance / std_error
+        probability = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+        return max(0.5, min(0.99, probability))
@@ -1,6 +1,7 @@
 import math
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..models.game_models import Card, ActionType, StrategyRecommendation
+from .decision_context import DecisionContext
 
 class RiskUtilityStrategy:
     def __init__(self, risk_aversion_lambda: float = 0.5):
@@ -13,7 +14,8 @@ class RiskUtilityStrategy:
                                pot_size: int, 
                                to_call: int, 
                                player_stack: int,
-                               equity: float) -> StrategyRecommendation:
+                               equity: Optional[float] = None,
+                               context: Optional[DecisionContext] = None) -> StrategyRecommendation:
         """
         Calculate risk-adjusted utility for different actions
         
@@ -21,6 +23,12 @@ class RiskUtilityStrategy:
         where λ is the risk aversion parameter
         """
         
+        # Shared per-decision equity when called from StrategyEngine
+        if equity is None:
+            if context is None:
+                context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack)
+            equity = context.hand_equity()
+        
         p_win = equity
         p_lose = 1 - p_win
         
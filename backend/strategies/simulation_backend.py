@@ -0,0 +1,112 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from ..game.hand_evaluator import HandEvaluator
+from ..game.lookup_evaluator import get_lookup_evaluator
+
+# Evaluator owned by each pool worker, built once by _init_worker
+_worker_evaluator: Optional[HandEvaluator] = None
+
+
+def _init_worker():
+    """Map the hand rank table when a worker process starts"""
+    global _worker_evaluator
+    _worker_evaluator = get_lookup_evaluator()
+
+
+def _simulate_chunk(player: np.ndarray, board: np.ndarray, num_trials: int,
+                    seed: np.random.SeedSequence) -> Dict[str, int]:
+    """Run one share of the trials in a worker with its own RNG stream"""
+    evaluator = _worker_evaluator or get_lookup_evaluator()
+    return evaluator.simulate_outcomes(player, board, num_trials, np.random.default_rng(seed))
+
+
+def _merge(results: List[Dict[str, int]]) -> Dict[str, int]:
+    totals = {"wins": 0, "ties": 0, "losses": 0}
+    for result in results:
+        for outcome, count in result.items():
+            totals[outcome] += count
+    return totals
+
+
+class SerialBackend:
+    """Runs every Monte Carlo trial in the calling process"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.name = "serial"
+        self.num_workers = 1
+        self.min_trials_per_worker = 0
+        self.evaluator = get_lookup_evaluator()
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, player: np.ndarray, board: np.ndarray, num_trials: int) -> Dict[str, int]:
+        """Count wins/ties/losses over num_trials random opponent hands and runouts"""
+        return self.evaluator.simulate_outcomes(player, board, num_trials, self.rng)
+
+    def shutdown(self):
+        pass
+
+
+class ProcessPoolBackend:
+    """
+    Splits Monte Carlo trials across a pool of worker processes
+
+    Each worker maps the shared hand rank table once. Every chunk gets an
+    independent RNG stream spawned from one SeedSequence, and the chunk
+    counts are merged. Runs too small to be worth the IPC overhead, or
+    runs after the pool has failed, go to the serial fallback instead.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, seed: Optional[int] = None,
+                 min_trials_per_worker: int = 1000):
+        self.name = "process_pool"
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.min_trials_per_worker = min_trials_per_worker
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.fallback = SerialBackend(seed)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._broken = False
+        self._lock = threading.Lock()
+
+    def run(self, player: np.ndarray, board: np.ndarray, num_trials: int) -> Dict[str, int]:
+        """Count wins/ties/losses, spreading the trials over the worker pool"""
+        num_chunks = min(self.num_workers, num_trials // self.min_trials_per_worker)
+        if num_chunks < 2 or self._broken:
+            return self.fallback.run(player, board, num_trials)
+
+        chunk_sizes = [num_trials // num_chunks] * num_chunks
+        chunk_sizes[0] += num_trials - sum(chunk_sizes)
+        try:
+            with self._lock:
+                seeds = self.seed_sequence.spawn(num_chunks)
+                executor = self._get_executor()
+            futures = [
+                executor.submit(_simulate_chunk, player, board, size, seed)
+                for size, seed in zip(chunk_sizes, seeds)
+            ]
+            return _merge([future.result() for future in futures])
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Monte Carlo process pool unavailable, falling back to serial: {e}")
+            self._broken = True
+            return self.fallback.run(player, board, num_trials)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker)
+        return self._executor
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def create_backend(num_workers: int = 0, seed: Optional[int] = None):
+    """Process pool for num_workers > 1, otherwise the serial backend"""
+    if num_workers > 1:
+        return ProcessPoolBackend(num_workers=num_workers, seed=seed)
+    return SerialBackend(seed)
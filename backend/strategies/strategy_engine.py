@@ -1,138 +1,294 @@
-from typing import List, Dict, Any
-from ..models.game_models import Card, StrategyOverlay, Street, PlayerAction
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from ..models.game_models import Card, StrategyOverlay, StrategyRecommendation, Street, PlayerAction, ActionType
 from .ev_strategy import EVStrategy
 from .monte_carlo_strategy import MonteCarloStrategy
 from .bayesian_strategy import BayesianStrategy
 from .kelly_strategy import KellyStrategy
 from .risk_utility_strategy import RiskUtilityStrategy
 from .gto_strategy import GTOStrategy
+from .simulation_backend import create_backend
+from .decision_context import DecisionContext
 from ..game.poker_engine import PokerEngine
+from ..game.canonical import canonical_key, overlay_cache
+
+# Results this soon after the deadline are still used: Monte Carlo aims to
+# finish just before it, and a thread hand-off can take a few milliseconds
+DEADLINE_GRACE_MS = 10
+
+# Overlay field, timing stage, log label, display name and error message of each strategy
+STRATEGY_SLOTS: List[Tuple[str, str, str, str, str]] = [
+    ("ev_strategy", "ev", "EV", "Expected Value", "Error in calculation"),
+    ("monte_carlo_strategy", "monte_carlo", "Monte Carlo", "Monte Carlo", "Error in simulation"),
+    ("bayesian_strategy", "bayesian", "Bayesian", "Bayesian", "Error in belief updating"),
+    ("kelly_strategy", "kelly", "Kelly", "Kelly Criterion", "Error in bankroll calculation"),
+    ("risk_utility_strategy", "risk_utility", "Risk Utility", "Risk-Adjusted Utility", "Error in utility calculation"),
+    ("gto_strategy", "gto", "GTO", "GTO", "Error in solver lookup"),
+]
 
 class StrategyEngine:
-    def __init__(self):
+    def __init__(self, monte_carlo_workers: int = 0, budget_ms: Optional[float] = None):
         self.poker_engine = PokerEngine()
         
         # Initialize all strategy calculators
         self.ev_strategy = EVStrategy()
-        self.monte_carlo_strategy = MonteCarloStrategy(num_simulations=1000)
+        self.monte_carlo_strategy = MonteCarloStrategy(
+            adaptive=True,
+            target_std_error=0.01,
+            backend=create_backend(monte_carlo_workers)
+        )
         self.bayesian_strategy = BayesianStrategy()
         self.kelly_strategy = KellyStrategy()
         self.risk_utility_strategy = RiskUtilityStrategy(risk_aversion_lambda=0.5)
         self.gto_strategy = GTOStrategy()
+        
+        # Finished overlays, reused while the decision state is unchanged
+        self.overlay_cache = overlay_cache
+        
+        # Default latency budget; None runs the strategies one after another with no deadline
+        self.budget_ms = budget_ms
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Strategies that missed a deadline and are still running, by field.
+        # At most one per strategy: while it runs, that strategy is degraded
+        # straight away instead of being queued behind it. This is per engine,
+        # and so process-wide, not per session: one session's slow decision
+        # degrades that strategy for every session's overlays until it ends,
+        # which keeps the stragglers within the pool's spare threads.
+        self._stragglers: Dict[str, Future] = {}
+        self._stragglers_lock = threading.Lock()
+        
+        # Context of the most recent decision, kept for inspecting stage timings
+        self.last_context: Optional[DecisionContext] = None
     
-    def calculate_all_strategies(self, 
+    def calculate_all_strategies(self,
                                player_cards: List[Card],
                                community_cards: List[Card],
                                pot_size: int,
                                to_call: int,
                                player_stack: int,
                                action_history: List[PlayerAction],
-                               street: Street) -> StrategyOverlay:
+                               street: Street,
+                               budget_ms: Optional[float] = None,
+                               on_recommendation: Optional[Callable[[str, StrategyRecommendation], None]] = None,
+                               on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> StrategyOverlay:
         """
         Calculate recommendations from all 6 quantitative strategies
+        
+        With a latency budget (budget_ms, or the engine's default) the
+        strategies run concurrently. Monte Carlo stops simulating in time to
+        return what it has by the deadline, and any strategy still running
+        when the budget is spent is replaced by a pot-odds estimate from the
+        shared equity. Both are flagged as degraded.
+        
+        For streaming, on_recommendation(field, recommendation) is called as
+        each strategy finishes and on_progress(estimate) after every Monte
+        Carlo batch, both from worker threads. The strategies then run
+        concurrently even without a budget, so the fast ones aren't held up
+        behind Monte Carlo.
         """
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
         
-        # Calculate hand equity (needed by multiple strategies)
-        equity = self.poker_engine.get_hand_equity(player_cards, community_cards)
+        # Repeat polls of an unchanged decision are served from the cache
+        key = self.decision_key(player_cards, community_cards, pot_size, to_call, player_stack,
+                                action_history, street)
+        cached = self.overlay_cache.get(key)
+        if cached is not None:
+            if on_recommendation is not None:
+                for field, _, _, _, _ in STRATEGY_SLOTS:
+                    on_recommendation(field, getattr(cached, field))
+            return cached
         
-        try:
-            # 1. Expected Value Strategy
-            ev_recommendation = self.ev_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack,
-                equity=equity
-            )
-        except Exception as e:
-            print(f"Error in EV strategy: {e}")
-            ev_recommendation = self._create_fallback_recommendation("Expected Value", "Error in calculation")
+        # Card features shared by every strategy, computed once per decision
+        context = DecisionContext(player_cards, community_cards, pot_size, to_call, player_stack,
+                                  action_history, street)
+        self.last_context = context
         
-        try:
-            # 2. Monte Carlo Simulation Strategy
-            monte_carlo_recommendation = self.monte_carlo_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack
-            )
-        except Exception as e:
-            print(f"Error in Monte Carlo strategy: {e}")
-            monte_carlo_recommendation = self._create_fallback_recommendation("Monte Carlo", "Error in simulation")
+        with context.timed("total"):
+            deadline = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+            
+            # Calculate hand equity (needed by multiple strategies)
+            with context.timed("equity"):
+                context.equity = self.poker_engine.get_hand_equity(player_cards, community_cards)
+            
+            calls = self._strategy_calls(context, deadline, on_progress)
+            if deadline is None and on_recommendation is None and on_progress is None:
+                recommendations = {field: self._run_strategy(context, field, calls[field]) for field in calls}
+            else:
+                recommendations = self._run_concurrently(context, calls, deadline, budget_ms, on_recommendation)
         
-        try:
+        overlay = StrategyOverlay(**recommendations)
+        # Degraded overlays aren't kept, so the next poll can compute the full one
+        if not any(recommendation.degraded for recommendation in recommendations.values()):
+            self.overlay_cache.put(key, overlay)
+        return overlay
+    
+    @staticmethod
+    def decision_key(player_cards: List[Card], community_cards: List[Card], pot_size: int, to_call: int,
+                     player_stack: int, action_history: List[PlayerAction], street: Street) -> Tuple:
+        """
+        Everything the overlay depends on: the suit-canonical cards, the bet
+        sizes and the action history (which drives the Bayesian beliefs).
+        Any change to the decision state gives a new key, so cached overlays
+        never go stale; old entries just age out of the LRU.
+        """
+        history = tuple((action.player, action.action_type.value, action.amount) for action in action_history)
+        return (canonical_key(player_cards, community_cards), pot_size, to_call, player_stack,
+                street.value, history)
+    
+    def _strategy_calls(self, context: DecisionContext, deadline: Optional[float],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                        ) -> Dict[str, Callable[[], StrategyRecommendation]]:
+        """Zero-argument call computing each strategy's recommendation from the context"""
+        common = dict(
+            player_cards=context.player_cards,
+            community_cards=context.community_cards,
+            pot_size=context.pot_size,
+            to_call=context.to_call,
+            player_stack=context.player_stack,
+            context=context
+        )
+        return {
+            # 1. Expected Value Strategy
+            "ev_strategy": lambda: self.ev_strategy.calculate_recommendation(**common),
+            # 2. Monte Carlo Simulation Strategy
+            "monte_carlo_strategy": lambda: self.monte_carlo_strategy.calculate_recommendation(
+                **common, deadline=deadline, on_progress=on_progress
+            ),
             # 3. Bayesian Updating Strategy
-            bayesian_recommendation = self.bayesian_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack,
-                action_history=action_history,
-                street=street
-            )
-        except Exception as e:
-            print(f"Error in Bayesian strategy: {e}")
-            bayesian_recommendation = self._create_fallback_recommendation("Bayesian", "Error in belief updating")
-        
-        try:
+            "bayesian_strategy": lambda: self.bayesian_strategy.calculate_recommendation(
+                **common, action_history=context.action_history, street=context.street
+            ),
             # 4. Kelly Criterion Strategy
-            kelly_recommendation = self.kelly_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack,
-                equity=equity
-            )
-        except Exception as e:
-            print(f"Error in Kelly strategy: {e}")
-            kelly_recommendation = self._create_fallback_recommendation("Kelly Criterion", "Error in bankroll calculation")
-        
-        try:
+            "kelly_strategy": lambda: self.kelly_strategy.calculate_recommendation(**common),
             # 5. Risk-Adjusted Utility Strategy
-            risk_utility_recommendation = self.risk_utility_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack,
-                equity=equity
-            )
-        except Exception as e:
-            print(f"Error in Risk Utility strategy: {e}")
-            risk_utility_recommendation = self._create_fallback_recommendation("Risk-Adjusted Utility", "Error in utility calculation")
-        
-        try:
+            "risk_utility_strategy": lambda: self.risk_utility_strategy.calculate_recommendation(**common),
             # 6. Game Theory Optimal Strategy
-            gto_recommendation = self.gto_strategy.calculate_recommendation(
-                player_cards=player_cards,
-                community_cards=community_cards,
-                pot_size=pot_size,
-                to_call=to_call,
-                player_stack=player_stack,
-                street=street,
+            "gto_strategy": lambda: self.gto_strategy.calculate_recommendation(
+                **common, street=context.street,
                 position="BB"  # Simplified position for heads-up
-            )
+            ),
+        }
+    
+    def _run_strategy(self, context: DecisionContext, field: str,
+                      call: Callable[[], StrategyRecommendation]) -> StrategyRecommendation:
+        """Run one strategy, timing it and substituting the fallback on errors"""
+        _, stage, label, name, error_msg = self._slot(field)
+        try:
+            with context.timed(stage):
+                return call()
         except Exception as e:
-            print(f"Error in GTO strategy: {e}")
-            gto_recommendation = self._create_fallback_recommendation("GTO", "Error in solver lookup")
-        
-        return StrategyOverlay(
-            ev_strategy=ev_recommendation,
-            monte_carlo_strategy=monte_carlo_recommendation,
-            bayesian_strategy=bayesian_recommendation,
-            kelly_strategy=kelly_recommendation,
-            risk_utility_strategy=risk_utility_recommendation,
-            gto_strategy=gto_recommendation
+            print(f"Error in {label} strategy: {e}")
+            return self._create_fallback_recommendation(name, error_msg)
+    
+    def _run_concurrently(self, context: DecisionContext, calls: Dict[str, Callable[[], StrategyRecommendation]],
+                          deadline: Optional[float], budget_ms: Optional[float],
+                          on_recommendation: Optional[Callable[[str, StrategyRecommendation], None]] = None
+                          ) -> Dict[str, StrategyRecommendation]:
+        """
+        Run every strategy on the engine's thread pool, degrading those that miss the deadline
+        
+        A strategy that hasn't started by the deadline is cancelled. One that
+        is still running can't be stopped, so it is left to finish in the
+        background as a straggler; the pool has a spare thread per strategy
+        for them, so they don't hold up later overlays. Until it finishes, that
+        strategy is degraded in every overlay the engine computes, for any
+        session.
+        """
+        executor = self._get_executor()
+        busy = set()
+        if deadline is not None:
+            with self._stragglers_lock:
+                busy = {field for field in calls if field in self._stragglers}
+        futures = {
+            executor.submit(self._run_strategy, context, field, call): field
+            for field, call in calls.items() if field not in busy
+        }
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter() + DEADLINE_GRACE_MS / 1000)
+        
+        recommendations = {}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                field = futures[future]
+                recommendations[field] = future.result()
+                if on_recommendation is not None:
+                    on_recommendation(field, recommendations[field])
+        except FuturesTimeoutError:
+            pass
+        
+        for future, field in futures.items():
+            if field not in recommendations and not future.cancel():
+                self._add_straggler(field, future)
+        
+        for field in calls:
+            if field not in recommendations:
+                name = self._slot(field)[3]
+                reason = "is still running for an earlier decision" if field in busy else \
+                    f"missed the {budget_ms:.0f}ms budget"
+                print(f"{name} strategy {reason}, using pot-odds estimate")
+                recommendations[field] = self._create_degraded_recommendation(name, context, budget_ms, reason)
+                if on_recommendation is not None:
+                    on_recommendation(field, recommendations[field])
+        return {field: recommendations[field] for field in calls}
+    
+    def _add_straggler(self, field: str, future: Future):
+        """Track a strategy left running past its deadline until it finishes"""
+        def finished(_):
+            with self._stragglers_lock:
+                if self._stragglers.get(field) is future:
+                    del self._stragglers[field]
+        
+        with self._stragglers_lock:
+            self._stragglers[field] = future
+        future.add_done_callback(finished)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # One thread per strategy, plus one per possible straggler
+            self._executor = ThreadPoolExecutor(max_workers=2 * len(STRATEGY_SLOTS), thread_name_prefix="strategy")
+        return self._executor
+    
+    @staticmethod
+    def _slot(field: str) -> Tuple[str, str, str, str, str]:
+        return next(slot for slot in STRATEGY_SLOTS if slot[0] == field)
+    
+    def _create_degraded_recommendation(self, strategy_name: str, context: DecisionContext,
+                                        budget_ms: float, reason: str) -> StrategyRecommendation:
+        """
+        Cheap stand-in for a strategy that missed its deadline: shared equity vs pot odds
+
+        reason says why it wasn't ready ("missed the 150ms budget", "is still
+        running for an earlier decision").
+        """
+        equity = context.equity
+        to_call = context.to_call
+        pot_size = context.pot_size
+        
+        if to_call > 0:
+            pot_odds = to_call / (pot_size + to_call)
+            recommended_action = ActionType.CALL if equity > pot_odds else ActionType.FOLD
+            comparison = f"Equity vs pot odds: {equity:.3f} vs {pot_odds:.3f}"
+        else:
+            pot_odds = 0.0
+            recommended_action = ActionType.CHECK
+            comparison = f"Equity: {equity:.3f}, nothing to call"
+        
+        return StrategyRecommendation(
+            strategy_name=strategy_name,
+            recommended_action=recommended_action,
+            recommended_amount=None,
+            explanation=f"{strategy_name} {reason}; showing a pot-odds estimate from the shared equity instead.",
+            formula="Call if Equity > Call / (Pot + Call)",
+            variables={"equity": f"{equity:.3f}", "pot_odds": f"{pot_odds:.3f}", "budget_ms": f"{budget_ms:.0f}"},
+            calculation_steps=[f"{strategy_name} {reason}", comparison],
+            confidence=0.3,
+            degraded=True
         )
     
     def _create_fallback_recommendation(self, strategy_name: str, error_msg: str):
         """Create a fallback recommendation when a strategy fails"""
-        from ..models.game_models import StrategyRecommendation, ActionType
-        
         return StrategyRecommendation(
             strategy_name=strategy_name,
             recommended_action=ActionType.CHECK,
@@ -142,4 +298,4 @@ class StrategyEngine:
             variables={"error": error_msg},
             calculation_steps=[f"Error: {error_msg}"],
             confidence=0.0
-        ) 
\ No newline at end of file
+        )
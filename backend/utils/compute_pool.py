@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Marks run() calls that should use the pool's default timeout
+_DEFAULT_TIMEOUT = object()
+
+
+class ComputeBusyError(Exception):
+    """Raised when the compute queue is full"""
+
+
+class ComputeTimeoutError(Exception):
+    """Raised when a computation doesn't finish within its timeout"""
+
+
+class ComputePool:
+    """
+    Bounded thread pool for CPU-bound work called from async handlers
+
+    Keeps strategy and bot computations off the event loop so other
+    requests (health checks included) are served while they run. At most
+    max_workers jobs run at once and max_queue more may wait; beyond that
+    run() fails fast with ComputeBusyError instead of piling up work. A job
+    that times out is abandoned by the caller but still finishes in its
+    thread, since Python threads can't be cancelled.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, timeout: Optional[float] = 10.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Any = _DEFAULT_TIMEOUT, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and await its result
+
+        timeout defaults to the pool's timeout; pass None to wait for as
+        long as it takes (for work that must not be abandoned half-way).
+        """
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ComputeBusyError(f"Compute queue full ({self.in_flight} jobs in flight)")
+            self.in_flight += 1
+            self.submitted += 1
+
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(self._call, fn, *args, **kwargs)
+        )
+        # An abandoned job's exception is nobody's to handle; mark it retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            # shield() keeps the job's accounting intact when the wait times out
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise ComputeTimeoutError(f"{getattr(fn, '__name__', 'computation')} timed out after {timeout}s")
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
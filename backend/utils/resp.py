@@ -0,0 +1,259 @@
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+def encode_command(*args) -> bytes:
+    """Encode a command as a RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(stream) -> Any:
+    """Read one RESP reply from a buffered binary stream"""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RespError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise RespError(f"Unknown reply type {kind!r}")
+
+
+class RespClient:
+    """
+    Minimal blocking Redis-protocol client
+
+    Covers only the commands the session backend needs. One connection is
+    shared behind a lock and re-opened once if the server dropped it.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def execute(self, *args) -> Any:
+        """Send one command and return its reply"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(encode_command(*args))
+                    return read_reply(self._stream)
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt == 1:
+                        raise
+
+    def check_and_execute(self, key: str, check: Callable[[Optional[bytes]], bool],
+                          *commands: Tuple) -> Optional[List[Any]]:
+        """
+        Run commands as a transaction if check() accepts the current value of key
+
+        The key is WATCHed before it is read, so the MULTI/EXEC is aborted if
+        any other client writes it in between. Returns the commands' replies,
+        or None if the check failed or the transaction was aborted.
+        """
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._command("WATCH", key)
+                if not check(self._command("GET", key)):
+                    self._command("UNWATCH")
+                    return None
+                self._command("MULTI")
+                for command in commands:
+                    self._command(*command)
+                return self._command("EXEC")
+            except (ConnectionError, OSError):
+                # No retry: the watch died with the connection
+                self.close()
+                raise
+
+    def _command(self, *args) -> Any:
+        self._sock.sendall(encode_command(*args))
+        return read_reply(self._stream)
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._stream = self._sock.makefile("rb")
+        if self.db:
+            self._sock.sendall(encode_command("SELECT", self.db))
+            read_reply(self._stream)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._stream.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._stream = None
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        transaction = _Transaction()
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            self.wfile.write(self.server.store.execute(command, transaction))
+
+
+class LocalRespServer(socketserver.ThreadingTCPServer):
+    """
+    In-process stand-in for a Redis server, for tests and local development
+
+    Supports PING, SELECT, GET, SET (with EX/PX), DEL, EXISTS, DBSIZE and
+    WATCH/UNWATCH/MULTI/EXEC/DISCARD transactions on a single keyspace,
+    with lazy expiry.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _RespHandler)
+        self.store = _KeySpace()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server_address[0], self.server_address[1]
+
+    def start(self) -> "LocalRespServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Transaction:
+    """WATCH/MULTI state of one client connection"""
+
+    def __init__(self):
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+
+class _KeySpace:
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        # Bumped whenever a key is written, deleted or expires, for WATCH
+        self._revisions: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, command: List[bytes], transaction: _Transaction) -> bytes:
+        name = command[0].upper()
+        with self._lock:
+            if transaction.queued is not None and name not in (b"EXEC", b"DISCARD", b"MULTI", b"WATCH"):
+                transaction.queued.append(command)
+                return b"+QUEUED\r\n"
+            if name == b"WATCH":
+                for key in command[1:]:
+                    transaction.watched[key] = self._revision(key)
+                return b"+OK\r\n"
+            if name == b"UNWATCH":
+                transaction.watched.clear()
+                return b"+OK\r\n"
+            if name == b"MULTI":
+                transaction.queued = []
+                return b"+OK\r\n"
+            if name == b"DISCARD":
+                transaction.queued = None
+                transaction.watched.clear()
+                return b"+OK\r\n"
+            if name == b"EXEC":
+                queued, transaction.queued = transaction.queued, None
+                watched, transaction.watched = transaction.watched, {}
+                if queued is None:
+                    return b"-ERR EXEC without MULTI\r\n"
+                if any(self._revision(key) != revision for key, revision in watched.items()):
+                    return b"*-1\r\n"
+                return b"*%d\r\n" % len(queued) + b"".join(self._run(queued_command) for queued_command in queued)
+            return self._run(command)
+
+    def _run(self, command: List[bytes]) -> bytes:
+        name = command[0].upper()
+        args = command[1:]
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"SELECT":
+            return b"+OK\r\n"
+        if name == b"SET":
+            expires_at = None
+            if len(args) >= 4 and args[2].upper() in (b"EX", b"PX"):
+                seconds = int(args[3]) / (1 if args[2].upper() == b"EX" else 1000)
+                expires_at = time.monotonic() + seconds
+            self._data[args[0]] = (args[1], expires_at)
+            self._bump(args[0])
+            return b"+OK\r\n"
+        if name == b"GET":
+            value = self._get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"DEL":
+            deleted = [key for key in args if self._data.pop(key, None) is not None]
+            for key in deleted:
+                self._bump(key)
+            return b":%d\r\n" % len(deleted)
+        if name == b"EXISTS":
+            return b":%d\r\n" % sum(self._get(key) is not None for key in args)
+        if name == b"DBSIZE":
+            return b":%d\r\n" % sum(self._get(key) is not None for key in list(self._data))
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            self._bump(key)
+            return None
+        return value
+
+    def _revision(self, key: bytes) -> int:
+        self._get(key)
+        return self._revisions.get(key, 0)
+
+    def _bump(self, key: bytes):
+        self._revisions[key] = self._revisions.get(key, 0) + 1
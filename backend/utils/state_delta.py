@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel
+from ..models.game_models import GameResponse
+
+
+def parse_fields(fields: str, model: Type[BaseModel] = GameResponse) -> Dict[str, Any]:
+    """
+    Pydantic include tree for a fields= selector
+
+    The selector is a comma-separated list of dotted paths into the model,
+    e.g. "game_state.pot_size,available_actions,strategy_overlay.*.recommended_action",
+    where * stands for every field at its level. Raises ValueError for a
+    field the model doesn't have.
+    """
+    include: Dict[str, Any] = {}
+    for path in filter(None, (part.strip() for part in fields.split(","))):
+        _add_path(include, model, path.split("."), path)
+    if not include:
+        raise ValueError("No fields selected")
+    return include
+
+
+def _add_path(include: Dict[str, Any], model: Optional[Type[BaseModel]], names: List[str], path: str):
+    if model is None:
+        raise ValueError(f"Can't select inside a plain field in {path!r}")
+    name, rest = names[0], names[1:]
+    for field in (list(model.model_fields) if name == "*" else [name]):
+        if field not in model.model_fields:
+            raise ValueError(f"Unknown field {field!r} in {path!r}")
+        if not rest:
+            include[field] = True
+            continue
+        if include.get(field) is True:
+            continue  # The whole field is already selected
+        nested, is_list = _nested_model(model.model_fields[field].annotation)
+        selection = include.setdefault(field, {})
+        if is_list:
+            selection = selection.setdefault("__all__", {})
+        _add_path(selection, nested, rest, path)
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The model a field holds (unwrapping Optional), and whether it holds a list of them"""
+    origin = get_origin(annotation)
+    if origin is Union:
+        for argument in get_args(annotation):
+            if argument is not type(None):
+                return _nested_model(argument)
+    if origin is list:
+        return _nested_model(get_args(annotation)[0])[0], True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def select_delta(delta: Dict[str, Any], include: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The parts of a StateTracker delta that a parse_fields include tree selects"""
+    if include is None:
+        return delta
+    state = include.get("game_state")
+    selected = {}
+    for name, value in delta.items():
+        if name == "changes":
+            if state is True:
+                selected[name] = value
+            elif state:
+                selected[name] = {field: change for field, change in value.items() if field in state}
+        elif name in ("actions", "new_hand"):
+            if state is True or (state and "action_history" in state):
+                selected[name] = value
+        elif name in include:
+            selected[name] = value
+    return selected
+
+
+class StateTracker:
+    """
+    What one client has been sent of a game, so it can be sent only what changed
+
+    The first message carries the whole GameState. After that a delta holds
+    the GameState fields whose values changed, the actions appended to the
+    history since the last message (the history only grows within a hand;
+    a new hand replaces it) and the available actions if they changed.
+    The action history is never re-serialized in full.
+    """
+
+    def __init__(self):
+        self.fields: Optional[Dict[str, Any]] = None
+        self.hand_number: Optional[int] = None
+        self.num_actions = 0
+        self.available_actions: Optional[List[Dict[str, Any]]] = None
+
+    def reset(self):
+        """Forget what was sent, so the next message is a full state"""
+        self.fields = None
+
+    def full(self, response: GameResponse, hand_number: int) -> Dict[str, Any]:
+        """The complete state of a response, from the session's hand_number'th hand"""
+        self.reset()
+        self.hand_number = None
+        fields = self._fields(response)
+        actions = self._new_actions(response, hand_number)
+        return {
+            "game_state": {**fields, "action_history": actions},
+            "available_actions": self._available_actions(response),
+            "message": response.message
+        }
+
+    def delta(self, response: GameResponse, hand_number: int) -> Dict[str, Any]:
+        """What changed since the last message; a full state if nothing was sent yet"""
+        if self.fields is None:
+            return self.full(response, hand_number)
+
+        previous = self.fields
+        fields = self._fields(response)
+        new_hand = hand_number != self.hand_number
+        delta: Dict[str, Any] = {
+            "changes": {name: value for name, value in fields.items() if previous.get(name) != value},
+            "actions": self._new_actions(response, hand_number),
+            "message": response.message
+        }
+        if new_hand:
+            # The actions replace the client's history rather than extend it
+            delta["new_hand"] = True
+        available_actions = self.available_actions
+        if self._available_actions(response) != available_actions:
+            delta["available_actions"] = self.available_actions
+        return delta
+
+    def _fields(self, response: GameResponse) -> Dict[str, Any]:
+        self.fields = response.game_state.model_dump(mode="json", exclude={"action_history"})
+        return self.fields
+
+    def _new_actions(self, response: GameResponse, hand_number: int) -> List[Dict[str, Any]]:
+        """Actions not yet sent; the whole history once the hand changes"""
+        history = response.game_state.action_history
+        if hand_number != self.hand_number:
+            self.hand_number = hand_number
+            self.num_actions = 0
+        actions = [action.model_dump(mode="json") for action in history[self.num_actions:]]
+        self.num_actions = len(history)
+        return actions
+
+    def _available_actions(self, response: GameResponse) -> List[Dict[str, Any]]:
+        self.available_actions = [action.model_dump(mode="json") for action in response.available_actions]
+        return self.available_actions
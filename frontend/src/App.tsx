@@ -1,67 +1,53 @@
-import React, { useState, useCallback } from 'react';
+import React, { useState, useCallback, useEffect, useRef } from 'react';
 import PokerTable from './components/PokerTable';
 import StrategyPanel from './components/StrategyPanel';
 import { GameState, StrategyOverlay, AvailableAction } from './types/GameTypes';
-import { GameAPI } from './services/GameAPI';
+import { GameSocket } from './services/GameAPI';
 import './App.css';
 
 function App() {
   const [gameState, setGameState] = useState<GameState | null>(null);
-  const [strategyOverlay, setStrategyOverlay] = useState<StrategyOverlay | null>(null);
+  const [strategyOverlay, setStrategyOverlay] = useState<Partial<StrategyOverlay> | null>(null);
   const [availableActions, setAvailableActions] = useState<AvailableAction[]>([]);
   const [gameMessage, setGameMessage] = useState<string>('');
-  const [sessionId, setSessionId] = useState<string>('');
   const [isLoading, setIsLoading] = useState(false);
+  const socketRef = useRef<GameSocket | null>(null);
 
-  const handleStartNewGame = useCallback(async () => {
+  useEffect(() => () => socketRef.current?.close(), []);
+
+  const handleStartNewGame = useCallback(() => {
     setIsLoading(true);
-    try {
-      const response = await GameAPI.startNewGame();
-      setGameState(response.game_state);
-      setStrategyOverlay(response.strategy_overlay || null);
-      setAvailableActions(response.available_actions);
-      setGameMessage(response.message);
-      setSessionId(response.game_state.session_id);
-    } catch (error) {
-      console.error('Error starting new game:', error);
-      setGameMessage('Error starting new game');
-    }
-    setIsLoading(false);
+    socketRef.current?.close();
+    socketRef.current = new GameSocket({
+      onState: (state, actions, message) => {
+        setGameState(state);
+        setAvailableActions(actions);
+        setGameMessage(message);
+        setIsLoading(false);
+      },
+      // Recommendations show up one by one as the strategies finish
+      onOverlay: (overlay) => setStrategyOverlay(Object.keys(overlay).length ? overlay : null),
+      onError: (message) => {
+        console.error('Game connection error:', message);
+        setGameMessage(`Error: ${message}`);
+        setIsLoading(false);
+      },
+    });
   }, []);
 
-  const handleMakeAction = useCallback(async (actionType: string, amount?: number) => {
-    if (!sessionId) return;
+  const handleMakeAction = useCallback((actionType: string, amount?: number) => {
+    if (!socketRef.current) return;
     
     setIsLoading(true);
-    try {
-      const response = await GameAPI.makeAction(sessionId, actionType, amount || 0);
-      setGameState(response.game_state);
-      setStrategyOverlay(response.strategy_overlay || null);
-      setAvailableActions(response.available_actions);
-      setGameMessage(response.message);
-    } catch (error) {
-      console.error('Error making action:', error);
-      setGameMessage('Error making action');
-    }
-    setIsLoading(false);
-  }, [sessionId]);
+    socketRef.current.makeAction(actionType, amount || 0);
+  }, []);
 
-  const handleNextHand = useCallback(async () => {
-    if (!sessionId) return;
+  const handleNextHand = useCallback(() => {
+    if (!socketRef.current) return;
     
     setIsLoading(true);
-    try {
-      const response = await GameAPI.dealNextHand(sessionId);
-      setGameState(response.game_state);
-      setStrategyOverlay(response.strategy_overlay || null);
-      setAvailableActions(response.available_actions);
-      setGameMessage(response.message);
-    } catch (error) {
-      console.error('Error dealing next hand:', error);
-      setGameMessage('Error dealing next hand');
-    }
-    setIsLoading(false);
-  }, [sessionId]);
+    socketRef.current.dealNextHand();
+  }, []);
 
   return (
     <div className="app">
@@ -1,8 +1,9 @@
 import React, { useState } from 'react';
-import { StrategyOverlay } from '../types/GameTypes';
+import { StrategyOverlay, StrategyRecommendation } from '../types/GameTypes';
 
 interface StrategyPanelProps {
-  strategyOverlay: StrategyOverlay | null;
+  // Strategies still being calculated are missing until their recommendation arrives
+  strategyOverlay: Partial<StrategyOverlay> | null;
 }
 
 const StrategyPanel: React.FC<StrategyPanelProps> = ({ strategyOverlay }) => {
@@ -28,7 +29,9 @@ const StrategyPanel: React.FC<StrategyPanelProps> = ({ strategyOverlay }) => {
     { key: 'kelly_strategy', data: strategyOverlay.kelly_strategy, icon: '📈', color: '#8b5cf6' },
     { key: 'risk_utility_strategy', data: strategyOverlay.risk_utility_strategy, icon: '⚖️', color: '#ef4444' },
     { key: 'gto_strategy', data: strategyOverlay.gto_strategy, icon: '🎯', color: '#06b6d4' },
-  ];
+  ].filter((strategy) => strategy.data !== undefined) as {
+    key: string; data: StrategyRecommendation; icon: string; color: string;
+  }[];
 
   const toggleStrategy = (strategyKey: string) => {
     setExpandedStrategy(expandedStrategy === strategyKey ? null : strategyKey);
@@ -1,8 +1,15 @@
 // API service for communicating with the poker backend
 
-import { GameResponse } from '../types/GameTypes';
+import {
+  AvailableAction,
+  GameResponse,
+  GameState,
+  StrategyOverlay,
+  StrategyRecommendation,
+} from '../types/GameTypes';
 
 const API_BASE_URL = 'http://localhost:8000';
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
 
 export class GameAPI {
   static async startNewGame(): Promise<GameResponse> {
@@ -82,4 +89,115 @@ export class GameAPI {
 
     return response.json();
   }
-} 
\ No newline at end of file
+} 
+
+export interface GameSocketHandlers {
+  // Called with the whole game after every server message that changes it
+  onState: (gameState: GameState, availableActions: AvailableAction[], message: string) => void;
+  // Called as each strategy's recommendation arrives; starts from an empty overlay on each decision
+  onOverlay: (overlay: Partial<StrategyOverlay>) => void;
+  onError: (message: string) => void;
+}
+
+// One game session over a WebSocket: small messages up, state deltas and overlay updates down
+export class GameSocket {
+  private socket: WebSocket;
+  private gameState: GameState | null = null;
+  private availableActions: AvailableAction[] = [];
+  private overlay: Partial<StrategyOverlay> = {};
+  // The decision the overlay is for; null while a move is on its way, so stragglers from the last one are dropped
+  private decision: string | null = null;
+  // Messages sent before the connection opened
+  private pending: string[] = [];
+  private closed = false;
+
+  constructor(private handlers: GameSocketHandlers, sessionId?: string) {
+    const query = sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : '';
+    this.socket = new WebSocket(`${WS_BASE_URL}/api/game/ws${query}`);
+    this.socket.onopen = () => {
+      this.pending.forEach((data) => this.socket.send(data));
+      this.pending = [];
+    };
+    this.socket.onmessage = (event) => this.handleMessage(JSON.parse(event.data));
+    this.socket.onerror = () => this.handlers.onError('Connection error');
+    this.socket.onclose = (event) => {
+      if (!this.closed) {
+        this.handlers.onError(`Connection closed${event.reason ? `: ${event.reason}` : ` (code ${event.code})`}`);
+      }
+    };
+  }
+
+  makeAction(actionType: string, amount: number = 0) {
+    this.send({ type: 'action', action_type: actionType, amount: amount || 0 });
+  }
+
+  dealNextHand() {
+    this.send({ type: 'next_hand' });
+  }
+
+  close() {
+    this.closed = true;
+    this.socket.close();
+  }
+
+  private send(message: Record<string, unknown>) {
+    if (this.socket.readyState === WebSocket.CLOSING || this.socket.readyState === WebSocket.CLOSED) {
+      this.handlers.onError('Not connected to the game server');
+      return;
+    }
+    this.setDecision(null);
+    const data = JSON.stringify(message);
+    if (this.socket.readyState === WebSocket.CONNECTING) {
+      this.pending.push(data);
+    } else {
+      this.socket.send(data);
+    }
+  }
+
+  private setDecision(decision: string | null) {
+    if (decision === this.decision && decision !== null) return;
+    this.decision = decision;
+    this.overlay = {};
+    this.handlers.onOverlay(this.overlay);
+  }
+
+  private handleMessage(message: any) {
+    const decision = `${message.hand_number}:${message.action_index}`;
+    switch (message.type) {
+      case 'state':
+        this.gameState = message.game_state;
+        this.availableActions = message.available_actions;
+        this.setDecision(decision);
+        this.handlers.onState(this.gameState!, this.availableActions, message.message);
+        break;
+      case 'delta': {
+        if (!this.gameState) return;
+        const history = message.new_hand
+          ? message.actions
+          : this.gameState.action_history.concat(message.actions);
+        this.gameState = { ...this.gameState, ...message.changes, action_history: history };
+        if (message.available_actions) {
+          this.availableActions = message.available_actions;
+        }
+        this.setDecision(decision);
+        this.handlers.onState(this.gameState!, this.availableActions, message.message);
+        break;
+      }
+      case 'overlay_recommendation':
+        if (decision !== this.decision) return;
+        this.overlay = {
+          ...this.overlay,
+          [message.strategy]: message.recommendation as StrategyRecommendation,
+        };
+        this.handlers.onOverlay(this.overlay);
+        break;
+      case 'overlay_error':
+        if (decision !== this.decision) return;
+        this.handlers.onError(message.message);
+        break;
+      case 'error':
+        this.handlers.onError(message.message);
+        break;
+    }
+  }
+}
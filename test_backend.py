@@ -5,6 +5,14 @@ Simple test script to verify the poker backend functionality
 
 import sys
 import os
+import atexit
+import shutil
+import tempfile
+
+# Hands played by the API tests go to a throwaway hand log, not the project's
+_hand_log_dir = tempfile.mkdtemp(prefix="poker-hand-log-")
+atexit.register(shutil.rmtree, _hand_log_dir, ignore_errors=True)
+os.environ["POKER_HAND_LOG"] = _hand_log_dir
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
@@ -40,13 +48,332 @@ def test_poker_engine():
         print(f"✗ Poker Engine test failed: {e}\n")
         return False
 
+def test_hand_evaluator():
+    """Test the vectorized hand evaluator against deuces"""
+    print("Testing Hand Evaluator...")
+    
+    try:
+        import numpy as np
+        from deuces import Card as DeucesCard, Evaluator
+        from backend.game.hand_evaluator import HandEvaluator, RANKS, SUITS
+        
+        evaluator = HandEvaluator()
+        deuces_evaluator = Evaluator()
+        rng = np.random.default_rng(7)
+        
+        # Score a batch of random 7-card hands with both evaluators
+        hands = np.argsort(rng.random((2000, 52)), axis=1)[:, :7]
+        scores = evaluator.evaluate_batch(hands)
+        deuces_scores = np.array([
+            deuces_evaluator.evaluate([DeucesCard.new(RANKS[c >> 2] + SUITS[c & 3]) for c in hand[:2]],
+                                      [DeucesCard.new(RANKS[c >> 2] + SUITS[c & 3]) for c in hand[2:]])
+            for hand in hands
+        ])
+        print(f"✓ Evaluated {len(hands)} random 7-card hands")
+        
+        # Orderings must agree (deuces: lower is better, ours: higher is better)
+        order = np.argsort(scores, kind="stable")
+        assert np.all(np.diff(deuces_scores[order]) <= 0), "hand ordering differs from deuces"
+        assert np.all((np.diff(scores[order]) == 0) == (np.diff(deuces_scores[order]) == 0)), "ties differ from deuces"
+        print("✓ Rankings match deuces")
+        
+        print("✓ Hand Evaluator test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Hand Evaluator test failed: {e}\n")
+        return False
+
+def test_exact_equity():
+    """Test enumerated turn and river equity against hand-counted outcomes"""
+    print("Testing Exact Equity...")
+
+    try:
+        from backend.game.poker_engine import PokerEngine
+        from backend.game.hand_evaluator import cards_to_array
+        from backend.models.game_models import Card
+
+        def cards(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+
+        engine = PokerEngine()
+        evaluator = engine.hand_evaluator
+
+        # KK on a board of four aces: only the two other kings tie, nothing wins.
+        # River: 990 opponent holdings, C(45,2) - C(43,2) = 87 of them hold a king
+        river = evaluator.enumerate_outcomes(cards_to_array(cards("Kh Kd")), cards_to_array(cards("Ah Ad Ac As 2c")))
+        assert river == {"wins": 903, "ties": 87, "losses": 0}, f"unexpected river outcomes {river}"
+        equity = engine.get_hand_equity(cards("Kh Kd"), cards("Ah Ad Ac As 2c"))
+        assert abs(equity - (903 + 87 / 2) / 990) < 1e-12, f"river equity {equity}"
+        print(f"✓ KK on AAAA2: {river}, equity {equity:.4f}")
+
+        # Turn: a king on the river (2 of 46) ties all 990 holdings; any other
+        # river card (44) plays out like the river case above
+        turn = evaluator.enumerate_outcomes(cards_to_array(cards("Kh Kd")), cards_to_array(cards("Ah Ad Ac As")))
+        expected = {"wins": 44 * 903, "ties": 2 * 990 + 44 * 87, "losses": 0}
+        assert turn == expected, f"unexpected turn outcomes {turn}"
+        equity = engine.get_hand_equity(cards("Kh Kd"), cards("Ah Ad Ac As"))
+        assert abs(equity - (expected["wins"] + expected["ties"] / 2) / (46 * 990)) < 1e-12, f"turn equity {equity}"
+        print(f"✓ KK on AAAA: {turn}, equity {equity:.4f}")
+
+        # A 9-high spade flush on AsKsQsJs2d loses only to the royal: the Ts
+        # with any of the other 44 unseen cards
+        flush = evaluator.enumerate_outcomes(cards_to_array(cards("9s 8c")), cards_to_array(cards("As Ks Qs Js 2d")))
+        assert flush == {"wins": 946, "ties": 0, "losses": 44}, f"unexpected flush outcomes {flush}"
+        print(f"✓ 9s8c on AsKsQsJs2d: {flush}")
+
+        print("✓ Exact Equity test passed!\n")
+        return True
+
+    except Exception as e:
+        print(f"✗ Exact Equity test failed: {e}\n")
+        return False
+
+def test_lookup_evaluator():
+    """Test the memory-mapped lookup evaluator against the vectorized evaluator"""
+    print("Testing Lookup Evaluator...")
+    
+    try:
+        import numpy as np
+        from backend.game.hand_evaluator import HandEvaluator
+        from backend.game.lookup_evaluator import get_lookup_evaluator
+        
+        evaluator = HandEvaluator()
+        lookup = get_lookup_evaluator()
+        assert isinstance(lookup.table, np.memmap), "hand rank table is not memory-mapped"
+        rng = np.random.default_rng(11)
+        
+        for num_cards in (5, 6, 7):
+            hands = np.argsort(rng.random((20000, 52)), axis=1)[:, :num_cards]
+            assert np.array_equal(lookup.evaluate_batch(hands), evaluator.evaluate_batch(hands)), \
+                f"{num_cards}-card scores differ"
+            print(f"✓ {num_cards}-card scores match on {len(hands)} random hands")
+        
+        # Suited hands exercise the flush table
+        flushes = np.array([[48, 44, 40, 36, 32, 0, 5], [48, 44, 40, 36, 0, 4, 8]])
+        assert np.array_equal(lookup.evaluate_batch(flushes), evaluator.evaluate_batch(flushes))
+        print(f"✓ {lookup.category_name(lookup.evaluate(flushes[0]))} scored from the flush table")
+        
+        print("✓ Lookup Evaluator test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Lookup Evaluator test failed: {e}\n")
+        return False
+
+def test_preflop_equity_table():
+    """Test the precomputed preflop equity table"""
+    print("Testing Preflop Equity Table...")
+    
+    try:
+        from backend.game.preflop_equity import get_preflop_table, hand_class_name, NUM_CLASSES
+        from backend.models.game_models import Card
+        
+        table = get_preflop_table()
+        assert table is not None, "preflop equity table has not been generated"
+        
+        aces = table.equity_vs_random([Card(rank="A", suit="h"), Card(rank="A", suit="s")])
+        seven_deuce = table.equity_vs_random([Card(rank="7", suit="h"), Card(rank="2", suit="s")])
+        print(f"✓ AA vs random: {aces:.3f}")
+        print(f"✓ 72o vs random: {seven_deuce:.3f}")
+        assert abs(aces - 0.852) < 0.01, "AA equity out of range"
+        assert abs(seven_deuce - 0.346) < 0.01, "72o equity out of range"
+        
+        # Class-vs-class matchups must be complementary
+        names = [hand_class_name(i) for i in range(NUM_CLASSES)]
+        ak, queens = names.index("AKo"), names.index("QQ")
+        total = int(table.table[ak, queens]) + int(table.table[queens, ak])
+        assert abs(total - 65535) <= 1, "matchup equities are not complementary"
+        print(f"✓ AKo vs QQ: {int(table.table[ak, queens]) / 65535:.3f}")
+        
+        print("✓ Preflop Equity Table test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Preflop Equity Table test failed: {e}\n")
+        return False
+
+def test_equity_cache():
+    """Test suit-isomorphic canonicalization and the equity cache"""
+    print("Testing Equity Cache...")
+    
+    try:
+        from backend.game.poker_engine import PokerEngine
+        from backend.game.canonical import canonical_key, equity_cache
+        from backend.models.game_models import Card
+        
+        def cards(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+        
+        # AhKh on Qh Jd 2c is the same spot as AsKs on Qs Jc 2d
+        key = canonical_key(cards("Ah Kh"), cards("Qh Jd 2c 7s"))
+        assert key == canonical_key(cards("Ks As"), cards("Jc Qs 2d 7h")), "isomorphic spots have different keys"
+        assert key != canonical_key(cards("Ah Kd"), cards("Qh Jd 2c 7s")), "distinct spots share a key"
+        print("✓ Isomorphic spots share a canonical key")
+        
+        engine = PokerEngine()
+        equity_cache.clear()
+        first = engine.get_hand_equity(cards("Ah Kh"), cards("Qh Jd 2c 7s"))
+        second = engine.get_hand_equity(cards("As Ks"), cards("Qs Jc 2d 7h"))
+        stats = equity_cache.stats()
+        assert first == second, "cached equity differs"
+        assert stats["hits"] == 1 and stats["misses"] == 1, f"unexpected cache stats {stats}"
+        print(f"✓ Cache stats: {stats['hits']} hit, {stats['misses']} miss")
+        
+        print("✓ Equity Cache test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Equity Cache test failed: {e}\n")
+        return False
+
+def test_adaptive_monte_carlo():
+    """Test standard-error stopping and the reported confidence interval"""
+    print("Testing Adaptive Monte Carlo...")
+
+    try:
+        from backend.game.poker_engine import PokerEngine
+        from backend.game.canonical import simulation_cache
+        from backend.strategies.monte_carlo_strategy import MonteCarloStrategy
+        from backend.models.game_models import ActionType, Card
+
+        def cards(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+
+        engine = PokerEngine()
+        simulation_cache.clear()
+        runs = {}
+        # KK on AAAA ties 13% of the time, so its CI only covers the exact
+        # equity if ties count as half a win
+        for name, hand, board in (("lopsided", "Kh Kd", "Ah Ad Ac As"), ("close", "Ah Kh", "Qh Jh 2c 3d")):
+            strategy = MonteCarloStrategy(seed=7, adaptive=True, target_std_error=0.01, batch_size=250)
+            variables = strategy.calculate_recommendation(cards(hand), cards(board), 100, 20, 1000).variables
+            exact = engine.get_hand_equity(cards(hand), cards(board))
+            ci_low, ci_high = (float(bound) for bound in variables["confidence_interval"].strip("[]").split(","))
+            runs[name] = int(variables["simulations"])
+            print(f"✓ {hand} on {board}: {runs[name]} trials, equity {variables['equity']}, "
+                  f"CI [{ci_low:.3f}, {ci_high:.3f}], exact {exact:.3f}")
+            assert variables["mode"] == "adaptive", f"{name} run didn't complete"
+            assert float(variables["std_error"]) <= 0.01, f"{name} run stopped above the target"
+            assert ci_low <= exact <= ci_high, f"{name} CI misses the exact equity {exact:.3f}"
+
+        assert runs["lopsided"] < runs["close"], "lopsided spot didn't stop earlier than the close one"
+        assert runs["close"] >= 2000, "close spot stopped before reaching the target standard error"
+        print("✓ Lopsided spot stopped early, close spot ran longer")
+
+        # Confidence is P(true equity on the estimate's side of the nearest threshold)
+        assert strategy._calculate_confidence(0.50, 0.01, [0.5]) == 0.5
+        assert abs(strategy._calculate_confidence(0.52, 0.01, [0.5, 0.7]) - 0.97725) < 1e-4
+        assert strategy._calculate_confidence(0.60, 0.01, [0.5]) == 0.99
+        print("✓ Confidence follows the normal approximation at 0σ, 2σ and 10σ")
+
+        # The action follows the same equity the confidence is measured on: a board
+        # that always splits is 0% wins but 50% equity, a marginal hand, not a poor one
+        split = MonteCarloStrategy(seed=7, adaptive=True, target_std_error=0.01, batch_size=250)
+        recommendation = split.calculate_recommendation(cards("2c 3d"), cards("As Ks Qs Js Ts"), 100, 0, 1000)
+        assert recommendation.variables["win_percentage"] == "0.0%" and recommendation.variables["equity"] == "0.500"
+        assert recommendation.recommended_action == ActionType.CHECK
+        assert "Marginal hand - check and see" in recommendation.calculation_steps
+        print("✓ An always-split board is played on its equity, not its win rate")
+
+        print("✓ Adaptive Monte Carlo test passed!\n")
+        return True
+
+    except Exception as e:
+        print(f"✗ Adaptive Monte Carlo test failed: {e}\n")
+        return False
+
+def test_parallel_monte_carlo():
+    """Test the process-pool Monte Carlo backend"""
+    print("Testing Parallel Monte Carlo...")
+    
+    try:
+        from backend.strategies.simulation_backend import ProcessPoolBackend, SerialBackend
+        from backend.strategies.monte_carlo_strategy import MonteCarloStrategy
+        from backend.game.hand_evaluator import cards_to_array
+        from backend.models.game_models import Card
+        
+        player = cards_to_array([Card(rank="A", suit="h"), Card(rank="A", suit="s")])
+        board = cards_to_array([])
+        
+        pool = ProcessPoolBackend(num_workers=2, seed=11)
+        try:
+            parallel = pool.run(player, board, 20000)
+
+            # Every adaptive round must be big enough to reach all the workers
+            rounds = []
+            run = pool.run
+            pool.run = lambda player, board, num_trials: rounds.append(num_trials) or run(player, board, num_trials)
+            adaptive = MonteCarloStrategy(adaptive=True, target_std_error=0.005, backend=pool)
+            adaptive._simulate(cards_to_array([Card(rank="9", suit="h"), Card(rank="8", suit="h")]), board)
+            assert all(size >= pool.num_workers * pool.min_trials_per_worker for size in rounds[:-1]), \
+                f"adaptive rounds {rounds} leave workers idle"
+            print(f"✓ Adaptive rounds of {rounds[0]} trials use all {pool.num_workers} workers")
+        finally:
+            pool.shutdown()
+        serial = SerialBackend(seed=11).run(player, board, 20000)
+        
+        assert sum(parallel.values()) == 20000, "trials lost when merging worker results"
+        parallel_win_rate = parallel["wins"] / 20000
+        serial_win_rate = serial["wins"] / 20000
+        print(f"✓ AA win rate: parallel {parallel_win_rate:.3f}, serial {serial_win_rate:.3f}")
+        assert abs(parallel_win_rate - serial_win_rate) < 0.02, "parallel and serial results disagree"
+        
+        print("✓ Parallel Monte Carlo test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Parallel Monte Carlo test failed: {e}\n")
+        return False
+
+def test_range_equity():
+    """Test range-vs-hand equity with card removal"""
+    print("Testing Range Equity...")
+    
+    try:
+        from backend.game.poker_engine import PokerEngine
+        from backend.game.range_equity import HandRange, RangeEquityEngine
+        from backend.models.game_models import Card
+        
+        def cards(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+        
+        engine = PokerEngine()
+        range_engine = RangeEquityEngine(seed=5)
+        hero, board = cards("Ah Kh"), cards("Qh Jd 2c 7s 3h")
+        
+        # A uniform range on the river must match exact enumeration
+        uniform = range_engine.equity(hero, board, HandRange.uniform())
+        exact = engine.get_hand_equity(hero, board)
+        assert abs(uniform - exact) < 1e-9, f"uniform range {uniform} != exact {exact}"
+        print(f"✓ Uniform range equity on the river: {uniform:.3f}")
+        
+        # Explicit combos through get_hand_equity: a set of queens beats AK high
+        versus_queens = engine.get_hand_equity(hero, board, [cards("Qd Qc"), cards("Qs Qc")])
+        assert versus_queens == 0.0, f"expected 0 equity vs set of queens, got {versus_queens}"
+        print(f"✓ Equity vs {{QdQc, QsQc}}: {versus_queens:.3f}")
+        
+        # A combo sharing a board card is removed; an all-blocked range is an error
+        try:
+            range_engine.equity(hero, board, HandRange.from_combos([cards("Qh Qc")]))
+            raise AssertionError("blocked range was not rejected")
+        except ValueError:
+            print("✓ Blocked combos removed from range")
+        
+        print("✓ Range Equity test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Range Equity test failed: {e}\n")
+        return False
+
 def test_strategies():
     """Test the strategy calculations"""
     print("Testing Strategy Engine...")
     
     try:
         from backend.strategies.strategy_engine import StrategyEngine
-        from backend.models.game_models import Card, Street, PlayerAction
+        from backend.models.game_models import ActionType, Card, Street, PlayerAction
         
         strategy_engine = StrategyEngine()
         
@@ -82,6 +409,38 @@ def test_strategies():
         print(f"  Risk Utility: {strategy_overlay.risk_utility_strategy.recommended_action.value}")
         print(f"  GTO: {strategy_overlay.gto_strategy.recommended_action.value}")
         
+        # Shared decision context
+        context = strategy_engine.last_context
+        assert context.board_texture == "wet"
+        assert context.hand_category == "Pair"
+        assert context.simulation_trials > 0
+        assert all(stage in context.timings for stage in ("equity", "monte_carlo", "gto", "total"))
+        print(f"✓ Decision context: {context.preflop_class} on {context.board_texture} board, "
+              f"{context.timings['total'] * 1000:.1f}ms total")
+
+        # Every strategy also works standalone, building its own context
+        standalone = [
+            strategy_engine.ev_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75),
+            strategy_engine.kelly_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75),
+            strategy_engine.risk_utility_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75),
+            strategy_engine.monte_carlo_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75),
+            strategy_engine.bayesian_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75,
+                                                                       [], Street.FLOP),
+            strategy_engine.gto_strategy.calculate_recommendation(player_cards, community_cards, 100, 25, 75,
+                                                                  Street.FLOP)
+        ]
+        assert standalone[0].recommended_action == strategy_overlay.ev_strategy.recommended_action
+        assert standalone[0].variables == strategy_overlay.ev_strategy.variables, "standalone EV used another equity"
+        print(f"✓ Standalone calls: {', '.join(r.recommended_action.value for r in standalone)}")
+        
+        # GTO's postflop strength comes from the made hand, so a flush on an unpaired board is strong
+        flush = strategy_engine.gto_strategy.calculate_recommendation(
+            [Card(rank="2", suit="h"), Card(rank="7", suit="h")],
+            [Card(rank="A", suit="h"), Card(rank="J", suit="h"), Card(rank="9", suit="h")], 100, 0, 200, Street.FLOP)
+        assert flush.variables["hand_category"].startswith("flush, 0.8 strength"), flush.variables["hand_category"]
+        assert flush.recommended_action == ActionType.BET
+        print(f"✓ GTO on a flop flush: {flush.variables['hand_category']}")
+        
         print("✓ Strategy Engine test passed!\n")
         return True
         
@@ -143,6 +502,1239 @@ def test_bot_logic():
         print(f"✗ Bot Logic test failed: {e}\n")
         return False
 
+def test_overlay_cache():
+    """Test that unchanged decisions are served from the overlay cache"""
+    print("Testing Overlay Cache...")
+    
+    try:
+        import time
+        from backend.strategies.strategy_engine import StrategyEngine
+        from backend.game.canonical import overlay_cache
+        from backend.models.game_models import Card, Street, PlayerAction, ActionType
+        
+        def cards(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+        
+        engine = StrategyEngine()
+        overlay_cache.clear()
+        
+        def overlay(player, board, pot_size=40, history=()):
+            start = time.perf_counter()
+            result = engine.calculate_all_strategies(
+                player_cards=cards(player), community_cards=cards(board), pot_size=pot_size, to_call=10,
+                player_stack=80, action_history=list(history), street=Street.TURN
+            )
+            return result, time.perf_counter() - start
+        
+        first, compute_time = overlay("Ah Kh", "Qh Jd 2c 7s")
+        repeat, poll_time = overlay("Ah Kh", "Qh Jd 2c 7s")
+        assert repeat is first, "repeat poll recomputed the overlay"
+        isomorphic, _ = overlay("As Ks", "Qs Jc 2d 7h")
+        assert isomorphic is first, "suit-isomorphic spot missed the cache"
+        print(f"✓ Repeat poll served in {poll_time * 1e6:.0f}us (computed in {compute_time * 1000:.1f}ms)")
+        
+        # Any change to the decision state is a different entry
+        bigger_pot, _ = overlay("Ah Kh", "Qh Jd 2c 7s", pot_size=60)
+        raised, _ = overlay("Ah Kh", "Qh Jd 2c 7s", history=[PlayerAction(action_type=ActionType.RAISE, amount=10, player="bot")])
+        assert bigger_pot is not first and raised is not first
+        stats = overlay_cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 3, f"unexpected cache stats {stats}"
+        print(f"✓ Cache stats: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} entries")
+        
+        print("✓ Overlay Cache test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Overlay Cache test failed: {e}\n")
+        return False
+
+def test_strategy_deadline():
+    """Test concurrent strategies under a latency budget with degraded results"""
+    print("Testing Strategy Deadline...")
+    
+    try:
+        import time
+        from backend.strategies.strategy_engine import StrategyEngine
+        from backend.game.canonical import equity_cache, simulation_cache, overlay_cache
+        from backend.models.game_models import Card, Street
+        
+        engine = StrategyEngine(budget_ms=150)
+        player_cards = [Card(rank="Q", suit="h"), Card(rank="J", suit="h")]
+        ranks = "23456789TK"
+        
+        def overlay(board_index, budget_ms=None):
+            board = [Card(rank=ranks[(board_index + i * 3) % 10], suit="dcs"[i]) for i in range(3)]
+            start = time.perf_counter()
+            result = engine.calculate_all_strategies(
+                player_cards=player_cards, community_cards=board, pot_size=20, to_call=5,
+                player_stack=90, action_history=[], street=Street.FLOP, budget_ms=budget_ms
+            )
+            return result, time.perf_counter() - start
+        
+        # A strategy that hangs is replaced by the pot-odds estimate at the deadline
+        original_gto = engine.gto_strategy.calculate_recommendation
+        engine.gto_strategy.calculate_recommendation = lambda **kwargs: time.sleep(1.0) or original_gto(**kwargs)
+        result, elapsed = overlay(0)
+        engine.gto_strategy.calculate_recommendation = original_gto
+        assert result.gto_strategy.degraded and not result.ev_strategy.degraded
+        assert result.gto_strategy.explanation.startswith("GTO missed the 150ms budget;")
+        assert elapsed < 0.3, f"overlay took {elapsed * 1000:.0f}ms with a hung strategy"
+        print(f"✓ Hung strategy degraded, overlay returned in {elapsed * 1000:.0f}ms")
+        
+        # While it's still running it is degraded at once, not queued behind itself
+        result, elapsed = overlay(2)
+        assert result.gto_strategy.degraded and not result.monte_carlo_strategy.degraded
+        assert result.gto_strategy.explanation.startswith("GTO is still running for an earlier decision;")
+        assert elapsed < 0.3, f"overlay took {elapsed * 1000:.0f}ms behind a straggler"
+        print(f"✓ Straggler skipped, next overlay returned in {elapsed * 1000:.0f}ms")
+        
+        # Monte Carlo returns its partial estimate when the budget runs out
+        engine.monte_carlo_strategy.target_std_error = 1e-6
+        engine.monte_carlo_strategy.max_simulations = 10 ** 8
+        simulation_cache.clear()
+        result, elapsed = overlay(1, budget_ms=50)
+        assert result.monte_carlo_strategy.degraded
+        assert result.monte_carlo_strategy.variables["mode"] == "adaptive (stopped at deadline)", \
+            "Monte Carlo's partial result missed the deadline"
+        assert int(result.monte_carlo_strategy.variables["simulations"]) > 0
+        print(f"✓ Monte Carlo stopped at the deadline after {result.monte_carlo_strategy.variables['simulations']} simulations")
+        engine.monte_carlo_strategy.target_std_error = 0.01
+        engine.monte_carlo_strategy.max_simulations = 20000
+        
+        # Latency stays within the budget across fresh, uncached spots
+        latencies = []
+        for i in range(20):
+            equity_cache.clear()
+            simulation_cache.clear()
+            overlay_cache.clear()
+            latencies.append(overlay(i)[1])
+        latencies.sort()
+        print(f"✓ Overlay latency p50 {latencies[10] * 1000:.0f}ms, max {latencies[-1] * 1000:.0f}ms (budget 150ms)")
+        assert latencies[-1] < 0.25, "overlay latency exceeded the budget"
+        
+        print("✓ Strategy Deadline test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Strategy Deadline test failed: {e}\n")
+        return False
+
+def test_session_store():
+    """Test session TTL expiry, LRU cap, byte budget and the background sweeper"""
+    print("Testing Session Store...")
+    
+    try:
+        import asyncio
+        import time
+        from backend.game.session_store import SessionStore
+        
+        # Session cap: the least recently used session is evicted
+        store = SessionStore(max_sessions=3)
+        sessions = [store.create() for _ in range(3)]
+        store.get(sessions[0].session_id)
+        store.create()
+        assert sessions[1].session_id not in store and sessions[0].session_id in store
+        assert store.stats()["evictions"]["lru"] == 1
+        print("✓ LRU eviction at the session cap")
+        
+        # Byte accounting and the byte budget
+        session = store.get(sessions[0].session_id)
+        session.poker_engine.deal_new_hand()
+        store.update_size(session)
+        per_session = session.size_bytes
+        assert per_session > 0 and store.resident_bytes >= per_session
+        budget_store = SessionStore(max_bytes=int(per_session * 2.5))
+        for _ in range(5):
+            budget_store.update_size(budget_store.create())
+        assert budget_store.resident_bytes <= budget_store.max_bytes
+        assert budget_store.stats()["evictions"]["memory"] > 0
+        print(f"✓ ~{per_session} bytes per session, byte budget enforced")
+        
+        # Idle TTL, by lookup and by the sweeper
+        ttl_store = SessionStore(idle_ttl=0.05)
+        expired = ttl_store.create()
+        time.sleep(0.1)
+        assert ttl_store.get(expired.session_id) is None
+        
+        async def run_sweeper():
+            ttl_store.start_sweeper(interval=0.02)
+            for _ in range(3):
+                ttl_store.create()
+            await asyncio.sleep(0.2)
+            await ttl_store.stop_sweeper()
+        
+        asyncio.run(run_sweeper())
+        assert len(ttl_store) == 0 and ttl_store.stats()["evictions"]["ttl"] == 4
+        print("✓ Idle sessions expired by lookup and by the sweeper")
+        
+        print("✓ Session Store test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Session Store test failed: {e}\n")
+        return False
+
+def test_session_persistence():
+    """Test engine snapshots and the memory, SQLite and Redis-protocol session backends"""
+    print("Testing Session Persistence...")
+    
+    try:
+        import json
+        import os
+        import tempfile
+        from backend.game.session_store import GameSession, SessionConflictError, SessionStore
+        from backend.game.session_backends import create_session_backend
+        from backend.models.game_models import ActionType
+        from backend.utils.resp import LocalRespServer
+        
+        # Snapshot round trip keeps the deck order, so both copies deal the same flop
+        session = GameSession("snapshot")
+        session.poker_engine.deal_new_hand()
+        session.poker_engine.process_action(ActionType.CALL, 0, "user")
+        data = session.to_bytes()
+        restored = GameSession.from_snapshot(json.loads(data))
+        assert restored.poker_engine.to_snapshot() == session.poker_engine.to_snapshot()
+        session.poker_engine.process_action(ActionType.CHECK, 0, "bot")
+        restored.poker_engine.process_action(ActionType.CHECK, 0, "bot")
+        assert restored.poker_engine.community_cards == session.poker_engine.community_cards
+        print(f"✓ Snapshot round trip ({len(data)} bytes)")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            server = LocalRespServer().start()
+            host, port = server.address
+            urls = [f"sqlite:///{os.path.join(tmp, 'sessions.db')}", f"redis://{host}:{port}/0"]
+            
+            for url in urls:
+                # Two stores on one shared backend stand in for two workers
+                worker_a = SessionStore(backend=create_session_backend(url))
+                worker_b = SessionStore(backend=create_session_backend(url))
+                
+                session = worker_a.create()
+                session.poker_engine.deal_new_hand()
+                worker_a.save(session)
+                
+                other = worker_b.get(session.session_id)
+                assert other is not None and other.poker_engine.to_snapshot() == session.poker_engine.to_snapshot()
+                other.poker_engine.process_action(ActionType.CALL, 0, "user")
+                worker_b.save(other)
+                
+                # Worker A notices the newer version and reloads it
+                session = worker_a.get(session.session_id)
+                assert session.poker_engine.pot == other.poker_engine.pot
+                assert len(session.poker_engine.action_history) == 1
+
+                # Both workers now act on the same version: the second save loses
+                # and its copy is reloaded with the first one's action
+                other.poker_engine.process_action(ActionType.CHECK, 0, "bot")
+                worker_b.save(other)
+                session.poker_engine.process_action(ActionType.RAISE, 10, "bot")
+                try:
+                    worker_a.save(session)
+                    raise AssertionError("stale save overwrote a newer version")
+                except SessionConflictError:
+                    pass
+                assert session.version == other.version
+                assert session.poker_engine.to_snapshot() == other.poker_engine.to_snapshot()
+                assert worker_a.stats()["conflicts"] == 1
+                print(f"✓ {worker_a.backend.name} backend rejects a save over a newer version")
+
+                assert worker_b.delete(session.session_id)
+                assert worker_a.get(session.session_id) is None
+                print(f"✓ {worker_a.backend.name} backend shares sessions between stores")
+                worker_a.backend.close()
+                worker_b.backend.close()
+            
+            server.stop()
+        
+        # An overlay shown on one worker is in the shared snapshot, so the hand log
+        # still has it when another worker finishes the hand
+        import asyncio
+        import backend.app as app_module
+        from backend.game.hand_history import HandLogReader, HandLogWriter
+        from backend.models.game_models import ActionRequest
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'sessions.db')}"
+            worker_a = SessionStore(backend=create_session_backend(url))
+            worker_b = SessionStore(backend=create_session_backend(url))
+            log = HandLogWriter(os.path.join(tmp, "hands"), "shared")
+            real_store, real_log = app_module.session_store, app_module.hand_log
+            try:
+                app_module.session_store, app_module.hand_log = worker_a, log
+                session = worker_a.create()
+                
+                async def show_overlay():
+                    async with session.lock:
+                        response = app_module._start_game(session)
+                        worker_a.save(session)
+                        return await app_module._strategy_overlay(response.game_state, session)
+                
+                assert asyncio.run(show_overlay()) is not None
+                app_module.session_store = worker_b
+                other = worker_b.get(session.session_id)
+                assert list(other.decisions) == [0]
+                assert app_module._process_action(other, ActionRequest(action_type="fold")).game_state.is_hand_over
+            finally:
+                app_module.session_store, app_module.hand_log = real_store, real_log
+                log.close()
+                worker_a.backend.close()
+                worker_b.backend.close()
+            with HandLogReader(os.path.join(tmp, "hands"), "shared") as reader:
+                records = list(reader)
+            assert len(records) == 1 and [decision.action_index for decision in records[0].decisions] == [0]
+            print("✓ A hand finished on another worker is logged with the overlay shown on the first")
+        
+        # On the event loop a shared backend is waited for in a thread, so a slow one
+        # doesn't stall the other requests
+        import time
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = create_session_backend(f"sqlite:///{os.path.join(tmp, 'sessions.db')}")
+            backend_load = backend.load
+            def slow_load(session_id):
+                time.sleep(0.2)
+                return backend_load(session_id)
+            backend.load = slow_load
+            store = SessionStore(backend=backend)
+            
+            async def ticks_during_get():
+                session = await store.create_async()
+                async with session.lock:
+                    session.poker_engine.deal_new_hand()
+                    await store.save_async(session)
+                ticks = 0
+                async def tick():
+                    nonlocal ticks
+                    while True:
+                        await asyncio.sleep(0.01)
+                        ticks += 1
+                ticker = asyncio.ensure_future(tick())
+                try:
+                    assert await store.get_async(session.session_id) is session
+                    assert await store.delete_async(session.session_id)
+                    assert await store.get_async(session.session_id) is None
+                finally:
+                    ticker.cancel()
+                return ticks
+            
+            try:
+                ticks = asyncio.run(ticks_during_get())
+            finally:
+                backend.close()
+            assert ticks >= 20, ticks
+            print(f"✓ The event loop kept running during slow backend reads ({ticks} ticks)")
+        
+        # The process-local backend frees evicted sessions
+        store = SessionStore(max_sessions=1, backend=create_session_backend("memory://"))
+        first = store.create()
+        store.create()
+        assert store.get(first.session_id) is None
+        print("✓ memory backend drops evicted sessions")
+        
+        print("✓ Session Persistence test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Session Persistence test failed: {e}\n")
+        return False
+
+def test_concurrent_sessions():
+    """Load test: concurrent sessions through the API progress independently"""
+    print("Testing Concurrent Sessions...")
+    
+    try:
+        import asyncio
+        import time
+        import httpx
+        from backend.app import app, session_store
+        
+        hands_per_session = 2
+        
+        async def play_session(client):
+            """Check/call through a few hands, checking chip conservation on every response"""
+            response = (await client.post("/api/game/new")).json()
+            session_id = response["game_state"]["session_id"]
+            requests = 1
+            for hand in range(hands_per_session):
+                if hand > 0:
+                    response = (await client.post(f"/api/game/{session_id}/next-hand")).json()
+                    requests += 1
+                while not response["game_state"]["is_hand_over"] and response["available_actions"]:
+                    state = response["game_state"]
+                    assert state["session_id"] == session_id
+                    assert state["user_stack"] + state["bot_stack"] + state["pot_size"] == 200, "chips leaked between sessions"
+                    actions = {a["action_type"]: a for a in response["available_actions"]}
+                    action = actions.get("check") or actions.get("call") or response["available_actions"][0]
+                    response = (await client.post(f"/api/game/{session_id}/action",
+                                                  json={"action_type": action["action_type"], "amount": action["amount"]})).json()
+                    requests += 1
+            status = (await client.get(f"/api/game/{session_id}/status")).json()
+            assert status["game_state"]["session_id"] == session_id
+            return session_id, requests + 1
+        
+        async def run_load(num_sessions):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                start = time.perf_counter()
+                results = await asyncio.gather(*[play_session(client) for _ in range(num_sessions)])
+                return results, time.perf_counter() - start
+        
+        throughput = {}
+        for num_sessions in (1, 4, 8):
+            results, elapsed = asyncio.run(run_load(num_sessions))
+            session_ids = [session_id for session_id, _ in results]
+            assert len(set(session_ids)) == num_sessions, "sessions were not independent"
+            assert all(session_id in session_store for session_id in session_ids)
+            total_requests = sum(requests for _, requests in results)
+            throughput[num_sessions] = total_requests / elapsed
+        
+        for num_sessions, rate in throughput.items():
+            print(f"✓ {num_sessions} concurrent sessions: {rate:.1f} requests/s")
+        
+        print("✓ Concurrent Sessions test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Concurrent Sessions test failed: {e}\n")
+        return False
+
+def test_compute_offload():
+    """Test the bounded compute pool and that health checks stay fast during overlay computation"""
+    print("Testing Compute Offload...")
+    
+    try:
+        import asyncio
+        import time
+        import httpx
+        from backend.app import app, compute_pool, strategy_engine
+        from backend.game.canonical import equity_cache, simulation_cache, overlay_cache
+        from backend.models.game_models import Card, Street
+        from backend.utils.compute_pool import ComputePool, ComputeBusyError, ComputeTimeoutError
+        
+        async def check_limits():
+            pool = ComputePool(max_workers=1, max_queue=1, timeout=0.05)
+            jobs = [asyncio.ensure_future(pool.run(time.sleep, 0.2, timeout=None)) for _ in range(2)]
+            await asyncio.sleep(0)
+            try:
+                await pool.run(time.sleep, 0.2)
+                raise AssertionError("queue limit not enforced")
+            except ComputeBusyError:
+                pass
+            await asyncio.gather(*jobs)
+            try:
+                await pool.run(time.sleep, 0.2)
+                raise AssertionError("timeout not enforced")
+            except ComputeTimeoutError:
+                pass
+            pool.shutdown()
+            return pool.stats()
+        
+        stats = asyncio.run(check_limits())
+        assert stats["rejected"] == 1 and stats["timeouts"] == 1
+        print("✓ Queue-depth limit and timeout enforced")
+        
+        def compute_overlays(duration):
+            """Recompute overlays on fresh flops, bypassing the caches, for a while"""
+            ranks = "23456789TJQK"
+            count = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                equity_cache.clear()
+                simulation_cache.clear()
+                overlay_cache.clear()
+                board = [Card(rank=ranks[(count + i * 3) % 12], suit="hdc"[i]) for i in range(3)]
+                strategy_engine.calculate_all_strategies(
+                    player_cards=[Card(rank="A", suit="s"), Card(rank="K", suit="s")],
+                    community_cards=board, pot_size=20, to_call=5, player_stack=90,
+                    action_history=[], street=Street.FLOP
+                )
+                count += 1
+            return count
+        
+        async def measure_health():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                job = asyncio.ensure_future(compute_pool.run(compute_overlays, 1.0, timeout=None))
+                latencies = []
+                while not job.done():
+                    start = time.perf_counter()
+                    assert (await client.get("/api/health")).status_code == 200
+                    latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.01)
+                return await job, latencies
+        
+        overlays, latencies = asyncio.run(measure_health())
+        latencies.sort()
+        print(f"✓ {overlays} overlays computed while serving {len(latencies)} health checks")
+        print(f"✓ Health latency p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, max {latencies[-1] * 1000:.1f}ms")
+        assert len(latencies) >= 10 and latencies[-1] < 0.5, "health checks stalled behind overlay computation"
+        
+        print("✓ Compute Offload test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Compute Offload test failed: {e}\n")
+        return False
+
+def test_batch_engine():
+    """Test the batched engine against the scalar PokerEngine, action by action"""
+    print("Testing Batch Engine...")
+    
+    try:
+        import contextlib
+        import io
+        import time
+        import numpy as np
+        from backend.game.batch_engine import BatchPokerEngine, ACTION_TYPES, PLAYERS, CALL, RIVER
+        from backend.game.poker_engine import PokerEngine
+        from backend.game.hand_evaluator import card_to_int
+        
+        # Scalar engines dealt from their own seeds; the batch replays the same decks
+        num_hands = 200
+        with contextlib.redirect_stdout(io.StringIO()):
+            engines = [PokerEngine(seed=i) for i in range(num_hands)]
+            for engine in engines:
+                engine.deal_new_hand()
+        decks = np.array([
+            [card_to_int(card) for card in engine.user_cards + engine.bot_cards] +
+            [card_to_int(card) for card in PokerEngine._cards_from_str(engine.to_snapshot()["deck"])]
+            for engine in engines
+        ])
+        batch = BatchPokerEngine(num_hands)
+        batch.deal_new_hands(decks)
+        
+        # Random actions (illegal ones included) must leave both engines in the same state
+        rng = np.random.default_rng(0)
+        steps = 0
+        while not batch.hand_over.all():
+            players = batch.next_players()
+            actions = rng.choice(len(ACTION_TYPES), size=num_hands, p=[0.1, 0.25, 0.3, 0.15, 0.15, 0.05])
+            amounts = rng.integers(1, 30, size=num_hands)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i, engine in enumerate(engines):
+                    if not engine.hand_over:
+                        player = engine._get_next_active_player()
+                        assert player == PLAYERS[players[i]], f"hand {i}: {player} to act, batch says {players[i]}"
+                        engine.process_action(ACTION_TYPES[actions[i]], int(amounts[i]), player)
+            batch.process_actions(actions, amounts)
+            for i, engine in enumerate(engines):
+                assert batch.to_snapshot(i) == engine.to_snapshot(), f"hand {i} diverged at step {steps}"
+            steps += 1
+            assert steps < 100, "hands never finished"
+        showdowns = sum(engine.street.value == "river" and engine.winner is not None for engine in engines)
+        print(f"✓ {num_hands} hands match the scalar engine over {steps} steps ({showdowns} reached the river)")
+        
+        # Throughput: calling stations to showdown
+        batch = BatchPokerEngine(50000, seed=1)
+        start = time.perf_counter()
+        while not batch.hand_over.all():
+            batch.process_actions(CALL)
+        elapsed = time.perf_counter() - start
+        assert (batch.street == RIVER).all() and (np.abs(batch.user_net()) == 2).mean() > 0.9
+        print(f"✓ {batch.num_hands / elapsed:,.0f} hands/s played to showdown in lockstep")
+        
+        print("✓ Batch Engine test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batch Engine test failed: {e}\n")
+        return False
+
+def test_self_play():
+    """Test headless self-play: seat views, stat merging and seeded reproducibility"""
+    print("Testing Self-Play Simulator...")
+    
+    try:
+        import numpy as np
+        from backend.models.game_models import ActionType
+        from backend.game.poker_engine import PokerEngine
+        from backend.simulation.agents import SeatView
+        from backend.simulation.self_play import AgentErrorsError, RunningStats, run_self_play
+        from backend.strategies.kelly_strategy import KellyStrategy
+        
+        # Recommendations are turned into actions the engine accepts
+        engine = PokerEngine(seed=1)
+        engine.deal_new_hand()
+        view = SeatView(engine, "bot")
+        assert view.to_call == 1 and view.stack == 99
+        assert view.legalize(ActionType.CHECK, None) == (ActionType.FOLD, 0)
+        assert view.legalize(ActionType.RAISE, 1) == (ActionType.RAISE, 3)
+        assert view.legalize(ActionType.ALL_IN, None) == (ActionType.RAISE, 99)
+        print("✓ Seat view legalizes recommendations")
+        
+        # Merged chunk statistics match a single pass
+        values = np.random.default_rng(0).normal(0.5, 3.0, 1000)
+        whole, first, second = RunningStats(), RunningStats(), RunningStats()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (first if i < 300 else second).add(value)
+        first.merge(second)
+        assert abs(first.mean - values.mean()) < 1e-9 and abs(first.variance - values.var(ddof=1)) < 1e-9
+        print("✓ Streaming mean/variance merges across chunks")
+        
+        # Same seed, same result, however the hands are spread over workers
+        serial = run_self_play("bot", "call", 200, workers=1, seed=11, chunk_size=50)
+        parallel = run_self_play("bot", "call", 200, workers=2, seed=11, chunk_size=50)
+        assert serial.hands == 200 and serial.abandoned == 0
+        assert serial.summary() == parallel.summary()
+        print(f"✓ bot vs call: {serial.bb_per_100:+.1f} ± {serial.ci95_bb_per_100:.1f} bb/100, "
+              f"reproducible across worker counts")
+
+        # Kelly's sizes are valid recommendations, so it plays its own strategy
+        kelly = run_self_play("kelly", "bot", 40, workers=1, seed=3, chunk_size=40)
+        assert kelly.errors == {"hero": 0, "villain": 0}, f"kelly failed: {kelly.first_errors}"
+        print(f"✓ kelly vs bot: {kelly.decisions('hero')} decisions, no errors")
+
+        # A strategy that keeps failing stops the run instead of being rated as check/fold
+        original = KellyStrategy.calculate_recommendation
+        KellyStrategy.calculate_recommendation = lambda self, **kwargs: 1 / 0
+        try:
+            run_self_play("kelly", "bot", 20, workers=1, seed=3, chunk_size=20)
+            raise AssertionError("failing strategy wasn't reported")
+        except AgentErrorsError as e:
+            assert "ZeroDivisionError" in str(e)
+            print("✓ Failing strategy stops the run")
+        finally:
+            KellyStrategy.calculate_recommendation = original
+
+        print("✓ Self-Play Simulator test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Self-Play Simulator test failed: {e}\n")
+        return False
+
+def test_tournament():
+    """Test the round-robin tournament: reports, per-hand logs and checkpoint/resume"""
+    print("Testing Tournament Runner...")
+    
+    try:
+        import json
+        import os
+        import shutil
+        import tempfile
+        from backend.simulation.tournament import Tournament, CHECKPOINT_FILE, HANDS_DIR, format_report
+        from backend.strategies.gto_strategy import GTOStrategy
+        
+        directory = tempfile.mkdtemp()
+        try:
+            full_dir, resumed_dir = os.path.join(directory, "full"), os.path.join(directory, "resumed")
+            report = Tournament(full_dir, agents=["call", "bot", "gto"], hands_per_match=40,
+                                chunk_size=20, seed=4).run(workers=2)
+            assert report["hands_played"] == 120 and report["chunks_done"] == 6
+            assert report["bb_per_100"][0][1] == -report["bb_per_100"][1][0]
+            assert abs(sum(report["action_frequencies"]["gto"]["preflop"].values()) - 1) < 1e-9
+            hand_logs = sorted(os.listdir(os.path.join(full_dir, HANDS_DIR)))
+            with open(os.path.join(full_dir, HANDS_DIR, hand_logs[0])) as f:
+                assert len(f.readlines()) == 21
+            print(f"✓ 3 matches played, standings: {[entry['agent'] for entry in report['standings']]}")
+            
+            # Interrupted mid-way, with a half-written checkpoint line
+            shutil.copytree(full_dir, resumed_dir)
+            checkpoint = os.path.join(resumed_dir, CHECKPOINT_FILE)
+            with open(checkpoint) as f:
+                lines = f.readlines()
+            with open(checkpoint, "w") as f:
+                f.writelines(lines[:3])
+                f.write(lines[3][:20])
+            
+            tournament = Tournament(resumed_dir)
+            assert len(tournament.pending_chunks()) == 3
+            assert tournament.run(workers=1) == report
+            print("✓ Resumed tournament replays only the missing chunks and reports identically")
+
+            # Agent errors are counted per agent and flag the match
+            assert report["flagged_matches"] == [] and report["errors"]["gto"]["decisions"] > 0
+            original = GTOStrategy.calculate_recommendation
+            GTOStrategy.calculate_recommendation = lambda self, **kwargs: 1 / 0
+            try:
+                flagged = Tournament(os.path.join(directory, "flagged"), agents=["call", "gto"], hands_per_match=10,
+                                     chunk_size=10, seed=4).run(workers=1)
+            finally:
+                GTOStrategy.calculate_recommendation = original
+            assert flagged["errors"]["gto"]["errors"] == flagged["errors"]["gto"]["decisions"] > 0
+            assert [entry["agent"] for entry in flagged["standings"] if entry["flagged"]] == ["gto"]
+            assert "ZeroDivisionError" in format_report(flagged)
+            print(f"✓ gto failing on {flagged['errors']['gto']['errors']} decisions flags its match")
+        finally:
+            shutil.rmtree(directory)
+        
+        print("✓ Tournament Runner test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Tournament Runner test failed: {e}\n")
+        return False
+
+def test_variance_reduction():
+    """Test duplicate dealing and the luck-adjusted (AIVAT-style) estimator"""
+    print("Testing Variance Reduction...")
+    
+    try:
+        import numpy as np
+        from backend.game.hand_evaluator import cards_to_array, remaining_deck
+        from backend.simulation.self_play import play_chunk
+        from backend.simulation.variance import LuckEstimator
+        from backend.game.bot_logic import PokerBot
+        from backend.models.game_models import ActionType, Card, GameState, Street
+        
+        def parse(text):
+            return [Card(rank=c[0], suit=c[1]) for c in text.split()]
+        
+        # Each correction is the value after the cards came minus its mean over all cards that could have
+        estimator = LuckEstimator(np.random.SeedSequence(1))
+        estimator.start_hand(parse("Ah Kd"), parse("7c 7s"), 3)
+        turn_board = parse("2h 9d Tc Qs")
+        estimator.street_dealt(turn_board, 20)
+        assert estimator.street_dealt(turn_board + parse("Jh"), 20) > 0
+        estimator.street_dealt(turn_board, 20)
+        assert estimator.street_dealt(turn_board + parse("3c"), 20) < 0
+        board = cards_to_array(turn_board)
+        river_cards = remaining_deck(np.concatenate([estimator.user, estimator.bot, board]))
+        mean_equity = np.mean([estimator.equity(np.append(board, card)) for card in river_cards])
+        assert abs(mean_equity - estimator.equity(board)) < 1e-9
+        print(f"✓ River corrections average to zero over {len(river_cards)} cards")
+        
+        # The bot's only randomness is the nudge to its fold estimate; the policy it states matches its play
+        bot = PokerBot(np.random.SeedSequence(4))
+        bot_cards = parse("7c 2d")
+        spot = GameState(session_id="test", street=Street.RIVER, pot_size=10, user_stack=95, bot_stack=95,
+                         user_cards=[], community_cards=parse("Ah Kh Qs Jd 9c"), current_bet=0, to_call=0,
+                         active_player="bot", action_history=[], hand_number=1, is_hand_over=False)
+        policy = bot.action_probabilities(spot, bot_cards)
+        assert set(policy) == {(ActionType.BET, 5), (ActionType.CHECK, 0)}
+        bets = sum(bot.decide_action(spot, bot_cards)[0] == ActionType.BET for _ in range(4000))
+        assert abs(bets / 4000 - policy[(ActionType.BET, 5)]) < 0.03
+        print(f"✓ Bot bluffs {bets / 4000:.1%} of 4000 tries, policy says {policy[(ActionType.BET, 5)]:.1%}")
+        
+        seed = np.random.SeedSequence(21)
+        plain = play_chunk("bot", "call", 100, seed)
+        reduced = play_chunk("bot", "call", 100, seed, duplicate=True, luck_adjusted=True)
+        assert plain.hands == reduced.hands == 100
+        assert reduced.stats.count == reduced.adjusted.count == 50
+        # Equity-only corrections with duplicate dealing gave 1.9x here; with the agents' policies, 2.5x
+        assert reduced.variance_reduction > 2.25
+        assert abs(reduced.adjusted_bb_per_100 - reduced.bb_per_100) < 2 * reduced.ci95_bb_per_100
+        print(f"✓ {reduced.adjusted_bb_per_100:+.1f} ± {reduced.adjusted_ci95_bb_per_100:.1f} bb/100 adjusted vs "
+              f"{plain.bb_per_100:+.1f} ± {plain.ci95_bb_per_100:.1f} plain, "
+              f"{reduced.variance_reduction:.1f}x lower variance")
+        
+        try:
+            play_chunk("bot", "call", 5, seed, duplicate=True)
+            assert False, "odd duplicate chunk accepted"
+        except ValueError:
+            pass
+        
+        print("✓ Variance Reduction test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Variance Reduction test failed: {e}\n")
+        return False
+
+def test_hand_history():
+    """Test the binary hand-history log: round trip, rotation, torn blocks and the mmap reader"""
+    print("Testing Hand History Log...")
+    
+    try:
+        import shutil
+        import tempfile
+        import numpy as np
+        from backend.game.hand_history import HandLogWriter, HandLogReader, HandRecord, decode_varints, list_segments
+        from backend.models.game_models import ActionType, Street
+        from backend.simulation.self_play import play_chunk
+        
+        assert decode_varints(np.frombuffer(bytes([5, 0xAC, 0x02, 0x80, 0x80, 0x01]), dtype=np.uint8)).tolist() == [5, 300, 16384]
+        
+        directory = tempfile.mkdtemp()
+        try:
+            # Self-play hands, with the net results checked against the simulator's
+            result = play_chunk("bot", "call", 60, np.random.SeedSequence(5), hand_history=directory)
+            with HandLogReader(directory) as reader:
+                records = list(reader)
+                assert len(reader) == len(records) == 60
+                hero_net = sum(
+                    (1 if record.hand_number % 2 == 0 else -1) * record.user_net for record in records
+                ) / 2
+                assert abs(hero_net - result.per_hand.mean * 60) < 1e-9
+                assert records[0].session == "self-play:bot:call" and records[1].session == "self-play:call:bot"
+                assert all(len(record.board) == 5 or not record.showdown for record in records)
+            print(f"✓ 60 self-play hands round-trip, {sum(len(r.actions) for r in records)} actions")
+            
+            # Rotation, then a torn block at the end of the last segment
+            record = HandRecord("2f1c2a9e-0c5b-4c1e-9d4a-1a2b3c4d5e6f", 7, 1700000000, [51, 50], [0, 5],
+                                [12, 17, 22], "bot", False, 30, 14,
+                                [("user", Street.PREFLOP, ActionType.CALL, 0), ("bot", Street.PREFLOP, ActionType.RAISE, 300),
+                                 ("user", Street.FLOP, ActionType.FOLD, 0)])
+            # Nothing is created until the first block is written
+            unused = os.path.join(directory, "unused")
+            HandLogWriter(unused, "api").close()
+            assert not os.path.exists(unused)
+            
+            writer = HandLogWriter(directory, "api", block_hands=100, max_segment_bytes=4096)
+            for _ in range(1000):
+                writer.append(record)
+            writer.close()
+            segments = list_segments(directory, "api")
+            assert len(segments) > 1 and all(os.path.getsize(path) > 0 for path in segments)
+            with open(segments[-1], "ab") as f:
+                f.write(b"HHB2\x05\x00")
+            with HandLogReader(directory, "api") as reader:
+                assert len(reader) == 1000
+                blocks = list(reader.blocks())
+                assert all(block.user_net().tolist() == [-14.0] * len(block) for block in blocks)
+                assert next(iter(reader)) == record
+                assert sum(len(block) for block in reader.blocks(last_hands=150)) == 200
+            HandLogWriter(directory, "api").close()
+            print(f"✓ 1000 hands across {len(segments)} segments, torn block ignored and dropped on reopen")
+        finally:
+            shutil.rmtree(directory)
+        
+        print("✓ Hand History Log test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Hand History Log test failed: {e}\n")
+        return False
+
+def test_hand_store():
+    """Test the columnar analytics store: API hands with overlays, incremental ingest and queries"""
+    print("Testing Hand Store...")
+    
+    try:
+        import asyncio
+        import shutil
+        import tempfile
+        import httpx
+        import numpy as np
+        import backend.app as app_module
+        from backend.analytics.hand_store import HandStore
+        from backend.game.hand_history import HandLogWriter, HandRecord
+        from backend.models.game_models import ActionType, Street
+        
+        directory = tempfile.mkdtemp()
+        original_log = app_module.hand_log
+        try:
+            log_directory = f"{directory}/log"
+            # Hands played through the API are logged with the overlays the user saw
+            app_module.hand_log = HandLogWriter(log_directory, "api", block_hands=1)
+            
+            async def play(num_hands):
+                transport = httpx.ASGITransport(app=app_module.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    session_id = (await client.post("/api/game/new")).json()["game_state"]["session_id"]
+                    for hand in range(num_hands):
+                        if hand:
+                            await client.post(f"/api/game/{session_id}/next-hand")
+                        await client.post(f"/api/game/{session_id}/action", json={"action_type": "fold"})
+                    return session_id
+            
+            session_id = asyncio.run(play(3))
+            store = HandStore(f"{directory}/store")
+            assert store.ingest(log_directory) == 3 and store.ingest(log_directory) == 0
+            user = store.player_stats("user", session=session_id)
+            assert user["hands"] == 3 and user["vpip"] == 0 and user["bb_per_100"] == -100
+            lost = store.ev_lost(session=session_id)
+            assert lost["decisions"] == 3 and lost["by_street"]["preflop"]["decisions"] == lost["priced_decisions"]
+            print(f"✓ 3 API hands with overlays ingested, EV lost folding: ${lost['ev_lost']:.2f}")
+            
+            # Known hands: the user limps and folds to a raise; the bot raises preflop and bets the flop
+            def hand(number):
+                actions = [("user", Street.PREFLOP, ActionType.CALL, 0), ("bot", Street.PREFLOP, ActionType.RAISE, 6),
+                           ("user", Street.PREFLOP, ActionType.CALL, 0), ("user", Street.FLOP, ActionType.CHECK, 0),
+                           ("bot", Street.FLOP, ActionType.BET, 10), ("user", Street.FLOP, ActionType.FOLD, 0)]
+                return HandRecord("table", number, 1700000000 + number, [51, 47], [3, 7], [10, 20, 30], "bot",
+                                  False, 27, 8, actions)
+            
+            writer = HandLogWriter(log_directory, "synthetic", block_hands=1000)
+            for number in range(20000):
+                writer.append(hand(number))
+            writer.close()
+            assert store.ingest(log_directory) == 20000
+            user = store.player_stats("user", session="table", last_hands=5000)
+            bot = store.player_stats("bot", session="table")
+            assert user["hands"] == 5000 and user["vpip"] == 1 and user["pfr"] == 0
+            assert user["aggression"]["flop"]["frequency"] == 0 and bot["pfr"] == 1
+            assert bot["aggression"]["flop"]["factor"] is None and bot["aggression"]["preflop"]["frequency"] == 1
+            assert abs(user["bb_per_100"] + 400) < 1e-9
+            assert len(store.select_hands(session="table", since=1700019990)) == 10
+            print(f"✓ {store.rows['hands']} hands, {store.rows['actions']} actions; "
+                  f"VPIP/PFR/aggression match the hands")
+        finally:
+            app_module.hand_log = original_log
+            shutil.rmtree(directory)
+        
+        print("✓ Hand Store test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Hand Store test failed: {e}\n")
+        return False
+
+def test_batch_analysis():
+    """Test the NDJSON batch analysis endpoint: dedup of canonical spots, cached rows first, bad spots"""
+    print("Testing Batch Analysis...")
+    
+    try:
+        import asyncio
+        import json
+        import httpx
+        import numpy as np
+        from backend.app import app, strategy_engine
+        from backend.game.canonical import equity_cache, overlay_cache
+        from backend.game.hand_evaluator import HandEvaluator, cards_to_array
+        from backend.models.game_models import Card
+        
+        def cards(text):
+            return [{"rank": text[i], "suit": text[i + 1]} for i in range(0, len(text), 2)]
+        
+        def spot(hole, board, pot=20, to_call=5):
+            return {"player_cards": cards(hole), "community_cards": cards(board),
+                    "pot_size": pot, "to_call": to_call, "player_stack": 90}
+        
+        # The vectorized pass matches exact turn/river equity spot by spot
+        engine = strategy_engine.poker_engine
+        exact_spots = [("AhKh", "Qh7d2c5s"), ("9s9d", "Ts8s2h3c4d"), ("7c6c", "5c4d2hKs")]
+        equity_cache.clear()
+        parse = lambda text: [Card(**card) for card in cards(text)]
+        assert engine.prime_equities([(parse(hole), parse(board)) for hole, board in exact_spots]) == 3
+        for hole, board in exact_spots:
+            outcomes = engine.hand_evaluator.enumerate_outcomes(cards_to_array(parse(hole)), cards_to_array(parse(board)))
+            assert engine.get_hand_equity(parse(hole), parse(board)) == HandEvaluator.equity_from_outcomes(outcomes)
+        print("✓ Batched equity pass matches exact enumeration")
+        
+        async def analyze(spots):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+                async with client.stream("POST", "/api/analyze/batch", json={"spots": spots}) as response:
+                    assert response.status_code == 200
+                    assert response.headers["content-type"].startswith("application/x-ndjson")
+                    return [json.loads(line) async for line in response.aiter_lines() if line]
+        
+        overlay_cache.clear()
+        spots = [
+            spot("AhKh", "Qh7d2c"),
+            spot("AsKs", "Qs7h2d"),   # suit-isomorphic to the first spot
+            spot("AhKh", "Qh7d2c", pot=40),
+            spot("AhAh", ""),         # duplicate card
+            spot("Td9d", "8d7c2s3h"),
+            spot("QcJc", "")
+        ]
+        rows = asyncio.run(analyze(spots))
+        summary = rows[-1]
+        results = {row["index"]: row for row in rows[:-1]}
+        assert summary["done"] and summary["spots"] == 6 and summary["unique_spots"] == 4
+        assert summary["errors"] == 1 and sorted(results) == list(range(6))
+        assert "Duplicate" in results[3]["error"]
+        assert results[0]["strategy_overlay"] == results[1]["strategy_overlay"]
+        assert all("strategy_overlay" in results[index] for index in (0, 1, 2, 4, 5))
+        print(f"✓ 6 spots, {summary['unique_spots']} unique, streamed in {summary['elapsed_ms']:.0f}ms")
+        
+        # Cached overlays stream ahead of spots that still need computing
+        rows = asyncio.run(analyze([spot("KdQd", "Jd5c4h"), spot("QsJs", "")]))
+        assert rows[0]["index"] == 1 and rows[-1]["cached"] == 1
+        print("✓ Cached spots streamed first")
+        
+        print("✓ Batch Analysis test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batch Analysis test failed: {e}\n")
+        return False
+
+def test_overlay_stream():
+    """Test progressive overlay streaming: each strategy as it finishes, then Monte Carlo refinements"""
+    print("Testing Overlay Stream...")
+    
+    try:
+        import asyncio
+        import json
+        import httpx
+        from backend.app import app, session_store
+        from backend.game.canonical import simulation_cache, overlay_cache
+        
+        async def stream():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+                response = (await client.post("/api/game/new", params={"overlay": "false"})).json()
+                assert response["strategy_overlay"] is None
+                session_id = response["game_state"]["session_id"]
+                
+                runs = []
+                for _ in range(2):
+                    events = []
+                    async with client.stream("GET", f"/api/game/{session_id}/overlay/stream") as response:
+                        assert response.headers["content-type"].startswith("text/event-stream")
+                        event = None
+                        async for line in response.aiter_lines():
+                            if line.startswith("event: "):
+                                event = line[len("event: "):]
+                            elif line.startswith("data: "):
+                                events.append((event, json.loads(line[len("data: "):])))
+                    runs.append(events)
+                return session_id, runs
+        
+        simulation_cache.clear()
+        overlay_cache.clear()
+        session_id, (fresh, cached) = asyncio.run(stream())
+        
+        recommendations = [data for event, data in fresh if event == "recommendation"]
+        progress = [data for event, data in fresh if event == "monte_carlo"]
+        assert fresh[-1][0] == "done" and fresh[-1][1]["strategies"] == 6
+        assert len({data["strategy"] for data in recommendations}) == 6
+        assert progress and all(p["ci_low"] <= p["equity"] <= p["ci_high"] for p in progress)
+        assert [p["trials"] for p in progress] == sorted(p["trials"] for p in progress)
+        
+        # Refinements precede the final Monte Carlo recommendation, which isn't the first to arrive
+        order = [event if event != "recommendation" else data["strategy"] for event, data in fresh]
+        assert order.index("monte_carlo_strategy") > max(i for i, event in enumerate(order) if event == "monte_carlo")
+        assert recommendations[0]["strategy"] != "monte_carlo_strategy"
+        first_ms = recommendations[0]["elapsed_ms"]
+        print(f"✓ First recommendation after {first_ms:.1f}ms, {len(progress)} Monte Carlo refinements, "
+              f"done after {fresh[-1][1]['elapsed_ms']:.1f}ms")
+        
+        # A cached overlay streams straight away, without refinements
+        assert [event for event, _ in cached] == ["recommendation"] * 6 + ["done"]
+        assert 0 in session_store.get(session_id).decisions
+        print("✓ Cached overlay streamed in one go, decision kept for the hand log")
+        
+        print("✓ Overlay Stream test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Overlay Stream test failed: {e}\n")
+        return False
+
+def test_game_socket():
+    """Test the WebSocket game transport: full state once, then deltas that rebuild the server state"""
+    print("Testing Game Socket...")
+    
+    try:
+        import asyncio
+        import json
+        from backend.app import app, session_store, _game_status
+        
+        class Socket:
+            """Minimal in-process ASGI WebSocket client"""
+            
+            def __init__(self, query=""):
+                self.inbound = asyncio.Queue()
+                self.outbound = asyncio.Queue()
+                scope = {"type": "websocket", "path": "/api/game/ws", "raw_path": b"/api/game/ws",
+                         "query_string": query.encode(), "headers": [], "scheme": "ws", "root_path": "",
+                         "server": ("test", 80), "client": ("test", 1234), "subprotocols": [],
+                         "asgi": {"version": "3.0"}}
+                self.task = asyncio.ensure_future(app(scope, self.inbound.get, self.outbound.put))
+                self.inbound.put_nowait({"type": "websocket.connect"})
+            
+            async def send(self, message):
+                self.inbound.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+            
+            async def receive(self):
+                event = await asyncio.wait_for(self.outbound.get(), 30)
+                if event["type"] != "websocket.send":
+                    return event, 0
+                return json.loads(event["text"]), len(event["text"])
+            
+            async def receive_until(self, kinds):
+                """Next message of one of the given types, skipping overlay messages before it"""
+                while True:
+                    message, size = await self.receive()
+                    if message.get("type") in kinds:
+                        return message, size
+            
+            async def close(self):
+                self.inbound.put_nowait({"type": "websocket.disconnect", "code": 1000})
+                await asyncio.wait_for(self.task, 30)
+        
+        def apply(state, delta):
+            """Client side: fold a delta into the state it was computed against"""
+            state.update(delta["changes"])
+            state["action_history"] = delta["actions"] if delta.get("new_hand") else state["action_history"] + delta["actions"]
+        
+        async def play():
+            socket = Socket()
+            assert (await socket.receive())[0]["type"] == "websocket.accept"
+            message, _ = await socket.receive()
+            assert message["type"] == "state"
+            state, actions = message["game_state"], message["available_actions"]
+            session = session_store.get(state["session_id"])
+            decision = (message["hand_number"], message["action_index"])
+            assert decision == (1, 0)
+            
+            # The overlay follows on the user's turn, one strategy at a time, tagged with its decision
+            recommendations = []
+            while True:
+                message, _ = await socket.receive()
+                assert (message["hand_number"], message["action_index"]) == decision
+                if message["type"] == "overlay_done":
+                    break
+                if message["type"] == "overlay_recommendation":
+                    recommendations.append(message["strategy"])
+            assert len(set(recommendations)) == 6
+            
+            # Play two hands, checking or calling, and compare bytes with the full responses
+            delta_bytes, full_bytes, hands = [], [], 0
+            while hands < 2:
+                if state["is_hand_over"]:
+                    await socket.send({"type": "next_hand"})
+                    hands += 1
+                else:
+                    kinds = [action["action_type"] for action in actions]
+                    await socket.send({"type": "action", "action_type": "check" if "check" in kinds else "call"})
+                delta, size = await socket.receive_until({"delta", "error"})
+                assert delta["type"] == "delta", delta
+                assert delta["hand_number"] == session.hand_count
+                assert delta["action_index"] == len(session.poker_engine.action_history)
+                apply(state, delta)
+                actions = delta.get("available_actions", actions)
+                delta_bytes.append(size)
+                full_bytes.append(len(_game_status(session).model_dump_json()))
+            
+            expected = _game_status(session)
+            assert state == expected.game_state.model_dump(mode="json")
+            assert actions == [action.model_dump(mode="json") for action in expected.available_actions]
+            
+            # Errors don't close the socket; sync resends the full state
+            await socket.send({"type": "fly"})
+            assert (await socket.receive_until({"error"}))[0]["message"].startswith("Unknown")
+            await socket.send({"type": "sync"})
+            synced = (await socket.receive_until({"state"}))[0]
+            assert synced["game_state"] == state
+            await socket.close()
+            
+            # Reconnecting resumes the session; an unknown one is refused
+            socket = Socket(f"session_id={state['session_id']}")
+            await socket.receive()
+            assert (await socket.receive())[0]["game_state"] == state
+            await socket.close()
+            socket = Socket("session_id=missing")
+            await socket.receive()
+            assert (await socket.receive())[0]["type"] == "error"
+            assert (await socket.receive())[0] == {"type": "websocket.close", "code": 4404, "reason": ""}
+            return delta_bytes, full_bytes
+        
+        delta_bytes, full_bytes = asyncio.run(play())
+        assert sum(delta_bytes) < sum(full_bytes)
+        print(f"✓ {len(delta_bytes)} deltas rebuilt the server state: {sum(delta_bytes)} bytes "
+              f"vs {sum(full_bytes)} for full responses without overlays")
+        print("✓ Errors, sync and reconnect handled")
+        
+        print("✓ Game Socket test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Game Socket test failed: {type(e).__name__}: {e}\n")
+        return False
+
+def test_response_shaping():
+    """Test fields= selection, since= deltas and ETag/304 on the game endpoints"""
+    print("Testing Response Shaping...")
+    
+    try:
+        import asyncio
+        import httpx
+        import backend.app as app_module
+        from backend.app import app
+        from backend.models.game_models import StrategyOverlay
+        
+        def apply(state, delta):
+            """Client side: fold a delta into the state it was computed against"""
+            state.update(delta["changes"])
+            state["action_history"] = delta["actions"] if delta.get("new_hand") else state["action_history"] + delta["actions"]
+        
+        async def play():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/game/new", params={"overlay": "false"})
+                body = response.json()
+                state, actions = body["game_state"], body["available_actions"]
+                session_id = state["session_id"]
+                url = f"/api/game/{session_id}"
+                
+                # A version this worker hasn't sent a delta client yet gets a full response
+                response = await client.get(f"{url}/status", params={"overlay": "false", "since": response.headers["x-game-version"]})
+                assert "delta" not in response.json() and response.json()["game_state"] == state
+                version = response.headers["x-game-version"]
+                
+                # Deltas through the end of a hand and into the next one rebuild the full state
+                delta_bytes = full_bytes = 0
+                for _ in range(12):
+                    if state["is_hand_over"]:
+                        response = await client.post(f"{url}/next-hand", params={"overlay": "false", "since": version})
+                    else:
+                        kinds = [action["action_type"] for action in actions]
+                        response = await client.post(f"{url}/action", params={"overlay": "false", "since": version},
+                                                     json={"action_type": "check" if "check" in kinds else "call"})
+                    delta = response.json()
+                    assert delta["delta"] and response.headers["x-game-version"] != version
+                    version = response.headers["x-game-version"]
+                    apply(state, delta)
+                    actions = delta.get("available_actions", actions)
+                    full = await client.get(f"{url}/status", params={"overlay": "false"})
+                    delta_bytes += len(response.content)
+                    full_bytes += len(full.content)
+                    if state["is_hand_over"]:
+                        # The action response reveals the bot's cards and has no actions left; status differs
+                        state["bot_cards"] = None
+                    else:
+                        assert actions == full.json()["available_actions"]
+                    assert state == full.json()["game_state"]
+                
+                # Field selection, down to one attribute of every strategy
+                await client.post(f"{url}/next-hand", params={"overlay": "false"})
+                full = await client.get(f"{url}/status")
+                selected = await client.get(f"{url}/status", params={
+                    "fields": "game_state.pot_size,game_state.to_call,strategy_overlay.*.recommended_action"
+                })
+                body = selected.json()
+                assert set(body) == {"game_state", "strategy_overlay"}
+                assert set(body["game_state"]) == {"pot_size", "to_call"} and len(body["strategy_overlay"]) == 6
+                assert all(set(recommendation) == {"recommended_action"} for recommendation in body["strategy_overlay"].values())
+                assert (await client.get(f"{url}/status", params={"fields": "game_state.nope"})).status_code == 400
+                
+                # A status missing part of its overlay gets no ETag, so polling can't get stuck on it
+                overlay = StrategyOverlay.model_validate(full.json()["strategy_overlay"])
+                for name in StrategyOverlay.model_fields:
+                    getattr(overlay, name).degraded = False
+                degraded = overlay.model_copy(deep=True)
+                degraded.monte_carlo_strategy.degraded = True
+                etags = {}
+                real_overlay = app_module._strategy_overlay
+                try:
+                    for label, result in (("skipped", None), ("degraded", degraded), ("complete", overlay)):
+                        async def fixed_overlay(game_state, session, result=result):
+                            return result
+                        app_module._strategy_overlay = fixed_overlay
+                        etags[label] = (await client.get(f"{url}/status")).headers.get("etag")
+                finally:
+                    app_module._strategy_overlay = real_overlay
+                assert etags["skipped"] is None and etags["degraded"] is None
+                without_overlay = (await client.get(f"{url}/status", params={"overlay": "false"})).headers["etag"]
+                assert without_overlay != etags["complete"]
+                assert (await client.get(f"{url}/status", headers={"If-None-Match": without_overlay})).status_code == 200
+                
+                # Polling with the ETag costs a 304 until the game changes
+                etag = etags["complete"]
+                unchanged = await client.get(f"{url}/status", headers={"If-None-Match": etag})
+                assert unchanged.status_code == 304 and not unchanged.content
+                await client.post(f"{url}/action", params={"overlay": "false"}, json={"action_type": "call"})
+                changed = await client.get(f"{url}/status", params={"overlay": "false"}, headers={"If-None-Match": etag})
+                assert changed.status_code == 200 and changed.headers["etag"] != etag
+                return delta_bytes, full_bytes, len(selected.content), len(full.content)
+        
+        delta_bytes, full_bytes, selected_bytes, overlay_bytes = asyncio.run(play())
+        assert delta_bytes < full_bytes and selected_bytes * 10 < overlay_bytes
+        print(f"✓ 12 deltas rebuilt the state: {delta_bytes} bytes vs {full_bytes} for full responses")
+        print(f"✓ fields= cut a status with overlay from {overlay_bytes} to {selected_bytes} bytes")
+        print("✓ No ETag while the overlay is skipped or degraded")
+        print("✓ ETag polling answered with 304 until the game changed")
+        
+        print("✓ Response Shaping test passed!\n")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Response Shaping test failed: {type(e).__name__}: {e}\n")
+        return False
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -154,8 +1746,32 @@ def main():
     
     # Run tests
     all_passed &= test_poker_engine()
+    all_passed &= test_hand_evaluator()
+    all_passed &= test_exact_equity()
+    all_passed &= test_lookup_evaluator()
+    all_passed &= test_preflop_equity_table()
+    all_passed &= test_equity_cache()
+    all_passed &= test_adaptive_monte_carlo()
+    all_passed &= test_parallel_monte_carlo()
+    all_passed &= test_range_equity()
     all_passed &= test_strategies()
     all_passed &= test_bot_logic()
+    all_passed &= test_overlay_cache()
+    all_passed &= test_strategy_deadline()
+    all_passed &= test_session_store()
+    all_passed &= test_session_persistence()
+    all_passed &= test_concurrent_sessions()
+    all_passed &= test_compute_offload()
+    all_passed &= test_self_play()
+    all_passed &= test_batch_engine()
+    all_passed &= test_tournament()
+    all_passed &= test_variance_reduction()
+    all_passed &= test_hand_history()
+    all_passed &= test_hand_store()
+    all_passed &= test_batch_analysis()
+    all_passed &= test_overlay_stream()
+    all_passed &= test_game_socket()
+    all_passed &= test_response_shaping()
     
     # Summary
     print("=" * 60)